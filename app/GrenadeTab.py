@@ -4,19 +4,22 @@
 
 Handles the logic and state for the PyQT tab related to grenade generation
 """
-from PyQt5.QtGui import QFont, QPixmap
+from PyQt5.QtGui import QFont
 
 from classes.Grenade import Grenade
 from classes.GrenadeImage import GrenadeImage
 
-from app.tab_utils import add_stat_to_layout, split_effect_text, clear_layout, copy_image_action, update_config, \
-    save_image_action
-from classes.json_reader import get_file_data
+from app.ItemCard import ItemCard
+from app.tab_utils import add_stat_to_layout, copy_image_action, update_config, save_image_action, show_trace_summary
+from classes import tracing
+from classes.profiling import profiled
+from classes.resource_registry import get_table
+from classes.dice_engine import describe_dice
 
 from PyQt5.QtCore import Qt, QTimer
-from PyQt5 import QtCore, QtWidgets
+from PyQt5 import QtWidgets
 from PyQt5.QtWidgets import (QComboBox, QGridLayout, QGroupBox, QLabel, QWidget, QPushButton,
-                             QLineEdit, QFileDialog, QCheckBox, QTextEdit)
+                             QLineEdit, QFileDialog, QCheckBox)
 
 
 class GrenadeTab(QWidget):
@@ -53,7 +56,7 @@ class GrenadeTab(QWidget):
         ##### Information Separator
         information_separator = QLabel("Grenade Information")
         information_separator.setFont(font)
-        information_separator.setAlignment(QtCore.Qt.AlignCenter)
+        information_separator.setAlignment(Qt.AlignCenter)
         grenade_stats_layout.addWidget(information_separator, idx, 0, 1, -1)
         idx += 1
 
@@ -65,7 +68,7 @@ class GrenadeTab(QWidget):
         grenade_stats_layout.addWidget(QLabel("Guild: "), idx, 0)
         self.guild_grenade_type_box = QComboBox()
         self.guild_grenade_type_box.addItem("Random")
-        for item in get_file_data(basedir + "resources/misc/grenades/grenade.json").keys():
+        for item in get_table(basedir, "resources/misc/grenades/grenade.json").keys():
             self.guild_grenade_type_box.addItem(item)
         grenade_stats_layout.addWidget(self.guild_grenade_type_box, idx, 1)
         idx += 1
@@ -74,7 +77,7 @@ class GrenadeTab(QWidget):
         grenade_stats_layout.addWidget(QLabel("Tier: "), idx, 0)
         self.tier_grenade_type_box = QComboBox()
         self.tier_grenade_type_box.addItem("Random")
-        for item in get_file_data(basedir + "resources/misc/grenades/grenade.json")["Ashen"].keys():
+        for item in get_table(basedir, "resources/misc/grenades/grenade.json")["Ashen"].keys():
             self.tier_grenade_type_box.addItem(item)
         grenade_stats_layout.addWidget(self.tier_grenade_type_box, idx, 1)
         idx += 1
@@ -101,7 +104,7 @@ class GrenadeTab(QWidget):
         ##### Art Separator
         art_separator = QLabel("Custom Art Selection")
         art_separator.setFont(font)
-        art_separator.setAlignment(QtCore.Qt.AlignCenter)
+        art_separator.setAlignment(Qt.AlignCenter)
         grenade_stats_layout.addWidget(art_separator, idx, 0, 1, -1)
         idx += 1
 
@@ -132,7 +135,7 @@ class GrenadeTab(QWidget):
         ##### External Tools Separator
         api_separator = QLabel("External Tools")
         api_separator.setFont(font)
-        api_separator.setAlignment(QtCore.Qt.AlignCenter)
+        api_separator.setAlignment(Qt.AlignCenter)
         grenade_stats_layout.addWidget(api_separator, idx, 0, 1, -1)
         idx += 1
 
@@ -185,6 +188,19 @@ class GrenadeTab(QWidget):
         self.grenade_card_layout = QGridLayout()
         self.grenade_card_layout.setAlignment(Qt.AlignTop)
 
+        # Card rows are built once and updated in place on each generation
+        self.grenade_card = ItemCard(self.grenade_card_layout, effect_width=249)
+        self.grenade_card.add_image("art")
+        self.grenade_card.add_spacer()
+        self.grenade_card.add_stat("name", "Name: ")
+        self.grenade_card.add_stat("guild", "Guild: ")
+        self.grenade_card.add_stat("tier", "Item Tier: ")
+        self.grenade_card.add_stat("type", "Type: ")
+        self.grenade_card.add_stat("damage", "Damage: ")
+        self.grenade_card.add_stat("expected", "Avg. Damage: ")
+        self.grenade_card.add_effect("effect", "Effect: ")
+        self.grenade_card.add_spacer()
+
         # Give a right-click menu for copying image cards
         self.display_height = 600
         self.grenade_card_group.setContextMenuPolicy(Qt.ActionsContextMenu)
@@ -255,8 +271,12 @@ class GrenadeTab(QWidget):
         # Set label text for output
         self.output_grenade_pdf_label.setText(f"Saved to output/grenades/{self.output_name}.png")
 
+    @profiled("grenade")
     def generate_grenade(self):
         """ Handles performing the call to generate a grenade given the parameters and updating the Grenade Card image """
+        # Start of the spans shown in the trace summary
+        trace_start = tracing.mark()
+
         # Load in properties that are currently set in the program
         grenade_name = self.grenade_line_edit.text()
         grenade_guild = self.guild_grenade_type_box.currentText()
@@ -274,65 +294,16 @@ class GrenadeTab(QWidget):
         # Generate output name and check if it is already in use
         self.output_name = "{}_Tier{}_{}".format(grenade.guild, grenade.tier, grenade.name.replace(" ", ""))
 
-        # Clear current grenade card
-        clear_layout(self.grenade_card_layout)
-
-        # Index counter for gridlayout across all widgets
-        idx = 0
-
-        # Pixmap for the Grenade Image
-        grenade_display = QLabel()
-        grenade_pixmap = QPixmap(grenade.grenade_art_path).scaled(300, 300, Qt.KeepAspectRatio,
-                                                               transformMode=QtCore.Qt.SmoothTransformation)
-        grenade_display.setAlignment(Qt.AlignCenter)
-        grenade_display.setPixmap(grenade_pixmap)
-        self.grenade_card_layout.addWidget(grenade_display, idx, 0, 1, -1)
-        idx += 1
-
-        # Add spacing between groups
-        self.grenade_card_layout.addWidget(QLabel(""), idx, 0)
-        idx += 1
-
-        # Grenade Name
-        grenade_name = add_stat_to_layout(self.grenade_card_layout, "Name: ", idx)
-        grenade_name.setText(grenade.name)
-        idx += 1
-
-        # Grenade Guild
-        grenade_guild = add_stat_to_layout(self.grenade_card_layout, "Guild: ", idx)
-        grenade_guild.setText(grenade.guild.title())
-        idx += 1
-
-        # Grenade Tier
-        grenade_tier = add_stat_to_layout(self.grenade_card_layout, "Item Tier: ", idx)
-        grenade_tier.setText(str(grenade.tier))
-        idx += 1
-
-        # Grenade Capacity
-        grenade_capacity = add_stat_to_layout(self.grenade_card_layout, "Type: ", idx)
-        grenade_capacity.setText(str(grenade.type))
-        idx += 1
-
-        # Grenade Recharge
-        grenade_recharge = add_stat_to_layout(self.grenade_card_layout, "Damage: ", idx)
-        grenade_recharge.setText(str(grenade.damage))
-        idx += 1
-
-        # Grenade Guild effect, dynamically expanded
-        grenade_effect = QTextEdit()
-        prefix_info = split_effect_text(grenade.effect)
-        numOfLinesInText = prefix_info.count("\n") + 2
-        grenade_effect.setFixedHeight(numOfLinesInText * 15)
-        grenade_effect.setFixedWidth(249)
-        grenade_effect.setText(prefix_info)
-
-        self.grenade_card_layout.addWidget(QLabel("Effect: "), idx, 0, numOfLinesInText, 1)
-        self.grenade_card_layout.addWidget(grenade_effect, idx, 1, numOfLinesInText, 1)
-        idx += numOfLinesInText
-
-        # Add spacing between groups
-        self.grenade_card_layout.addWidget(QLabel(""), idx, 0)
-        idx += 1
+        # Update the grenade card in place
+        self.grenade_card.set_image("art", grenade.grenade_art)
+        self.grenade_card.set_text("name", grenade.name)
+        self.grenade_card.set_text("guild", grenade.guild.title())
+        self.grenade_card.set_text("tier", grenade.tier)
+        self.grenade_card.set_text("type", grenade.type)
+        self.grenade_card.set_text("damage", grenade.damage)
+        self.grenade_card.set_text("expected", describe_dice(str(grenade.damage)))
+        self.grenade_card.set_effect("effect", grenade.effect)
+        self.grenade_card.show()
 
         # Save as output
         QTimer.singleShot(1000, self.save_screenshot)
@@ -340,3 +311,6 @@ class GrenadeTab(QWidget):
         # FoundryVTT Check
         if self.foundry_export_check.isChecked() is True:
             self.foundry_translator.export_grenade(grenade, self.output_name)
+
+        # Show the slowest stages of this generation if tracing is enabled
+        show_trace_summary(self.basedir, self.statusbar, trace_start, "grenade")
@@ -4,19 +4,25 @@
 
 Handles the logic and state for the PyQT tab related to gun generation
 """
-import os
-from pathlib import Path
+import time
+import threading
 
 from classes.Gun import Gun
 from classes.GunPDF import GunPDF
 from classes.GunImage import GunImage
+from classes.asset_cache import PRINT_DPI
 
-from app.tab_utils import add_stat_to_layout, copy_image_action, save_image_action, update_config
-from classes.json_reader import get_file_data
+from app.PdfPreview import PdfPreview
+from app.tab_utils import add_stat_to_layout, copy_image_action, save_image_action, update_config, show_trace_summary
+from classes import tracing
+from classes.profiling import profiled
+from classes.resource_registry import get_table
+from classes.dice_engine import describe_dice
+from classes.print_sheet import impose_cards
 
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QIcon, QFont
-from PyQt5 import QAxContainer, QtCore, QtWidgets
+from PyQt5 import QtCore, QtWidgets
 from PyQt5.QtWidgets import (QComboBox, QGridLayout, QGroupBox, QLabel, QWidget, QPushButton,
                              QCheckBox, QFileDialog, QLineEdit)
 
@@ -29,13 +35,19 @@ class GunTab(QWidget):
         self.basedir = basedir
         self.statusbar = statusbar
 
-        # PDF and Image Classes
-        self.gun_images = GunImage(self.basedir)
-        self.gun_pdf = GunPDF(self.basedir, self.statusbar, self.gun_images)
-
         # Config
         self.config = config
 
+        # PDF and Image Classes, with the gun art fitted to the card at the configured resolution
+        art_dpi = self.config['gun_tab'].get('art_dpi', PRINT_DPI)
+        self.gun_images = GunImage(self.basedir, art_dpi=art_dpi)
+        self.gun_pdf = GunPDF(self.basedir, self.statusbar, self.gun_images, art_dpi=art_dpi,
+                              output_profile=self.config['gun_tab'].get('output_profile', 'small'))
+
+        # Read the card overlays into the asset pool in the background, so the first card does not wait on the disk.
+        # They are encoded for their boxes as cards use them, as PyMuPDF is not thread-safe
+        threading.Thread(target=self.gun_pdf.load_sources, daemon=True).start()
+
         # API Classes
         self.foundry_translator = foundry_translator
 
@@ -68,13 +80,13 @@ class GunTab(QWidget):
         base_stats_layout.addWidget(QLabel("Item Level: "), idx, 0)
         self.item_level_box = QComboBox()
         self.item_level_box.addItem("Random")
-        for item in get_file_data(basedir + "resources/guns/gun_types.json").get("pistol").keys():
+        for item in get_table(basedir, "resources/guns/gun_types.json").get("pistol").keys():
             self.item_level_box.addItem(item)
         base_stats_layout.addWidget(self.item_level_box, idx, 1)
         idx += 1
 
         # Gun Type
-        self.gun_type_choices = list(get_file_data(basedir + "resources/guns/gun_types.json").keys())
+        self.gun_type_choices = list(get_table(basedir, "resources/guns/gun_types.json").keys())
         base_stats_layout.addWidget(QLabel("Gun Type: "), idx, 0)
         self.gun_type_box = QComboBox()
         self.gun_type_box.addItem("Random")
@@ -87,7 +99,7 @@ class GunTab(QWidget):
         base_stats_layout.addWidget(QLabel("Guild: "), idx, 0)
         self.guild_type_box = QComboBox()
         self.guild_type_box.addItem("Random")
-        for item in get_file_data(basedir + "resources/guns/guild_table.json").keys():
+        for item in get_table(basedir, "resources/guns/guild_table.json").keys():
             self.guild_type_box.addItem(item.capitalize())
         base_stats_layout.addWidget(self.guild_type_box, idx, 1)
         idx += 1
@@ -106,7 +118,7 @@ class GunTab(QWidget):
         self.prefix_box = QComboBox()
         self.prefix_box.addItem("None")
         self.prefix_box.addItem("Random")
-        for pidx, (key, item) in enumerate(get_file_data(basedir + "resources/guns/prefix.json").items()):
+        for pidx, (key, item) in enumerate(get_table(basedir, "resources/guns/prefix.json").items()):
             self.prefix_box.addItem(f"[{pidx + 1}] {item['name']}")
         self.prefix_box.setStatusTip("Choose whether to add a random Prefix or a specific one")
         base_stats_layout.addWidget(self.prefix_box, idx, 1)
@@ -119,7 +131,7 @@ class GunTab(QWidget):
         self.redtext_box.addItem("Random (All Rarities)")
         self.redtext_box.addItem("Random (Epics+)")
         self.redtext_box.addItem("Random (Legendaries)")
-        for key, item in get_file_data(basedir + "resources/guns/redtext.json").items():
+        for key, item in get_table(basedir, "resources/guns/redtext.json").items():
             self.redtext_box.addItem(f"[{key}] {item['name']}")
 
         self.redtext_box.setCurrentIndex(3)
@@ -278,6 +290,19 @@ class GunTab(QWidget):
         base_stats_layout.addWidget(self.form_design_check, idx, 1)
         idx += 1
 
+        # Which output profile to save the PDF with
+        output_profile_tip = "Choose whether to save the PDF small, linearized for print, or as fast as possible. " \
+                             "All use the same art, resampled to the art DPI (300 by default)."
+        output_profile_label = QLabel("PDF Output Profile:")
+        output_profile_label.setStatusTip(output_profile_tip)
+        base_stats_layout.addWidget(output_profile_label, idx, 0)
+        self.output_profile_box = QComboBox()
+        for profile in self.gun_pdf.output_profiles.keys():
+            self.output_profile_box.addItem(profile.title())
+        self.output_profile_box.setStatusTip(output_profile_tip)
+        base_stats_layout.addWidget(self.output_profile_box, idx, 1)
+        idx += 1
+
         # Add spacing between groups
         base_stats_layout.addWidget(QLabel(""), idx, 0)
         idx += 1
@@ -344,11 +369,23 @@ class GunTab(QWidget):
         self.numgun_line_edit = add_stat_to_layout(multi_layout, "# Guns to Generate:", 0, force_int=True)
         self.numgun_line_edit.setStatusTip("Choose how many guns to automatically generate and save.")
 
+        # Whether to impose the guns onto print sheets rather than saving a PDF per gun
+        print_sheet_label = QLabel("Save as Print Sheets:")
+        print_sheet_label.setStatusTip("Choose whether to save the guns 9 to a page with cut marks in a single PDF.")
+        multi_layout.addWidget(print_sheet_label, 1, 0)
+        self.print_sheet_check = QCheckBox()
+        self.print_sheet_check.setStatusTip("Choose whether to save the guns 9 to a page with cut marks in a single PDF.")
+        multi_layout.addWidget(self.print_sheet_check, 1, 1)
+
         # Generate button
         button = QPushButton("Generate Multiple Guns")
         button.setStatusTip("Handles generating the guns and locally saving their PDFs in \"outputs/\".")
         button.clicked.connect(lambda: self.generate_multiple_guns())
-        multi_layout.addWidget(button, 1, 0, 1, -1)
+        multi_layout.addWidget(button, 2, 0, 1, -1)
+
+        # Label for savefile output
+        self.multi_output_label = QLabel()
+        multi_layout.addWidget(self.multi_output_label, 3, 0, 1, -1)
 
         # Grid layout
         multi_group.setLayout(multi_layout)
@@ -363,20 +400,17 @@ class GunTab(QWidget):
         gun_card_layout = QGridLayout()
         gun_card_layout.setAlignment(Qt.AlignVCenter)
 
-        self.WebBrowser = QAxContainer.QAxWidget(self)
-        self.WebBrowser.setFixedHeight(800)
-        self.WebBrowser.setControl("{8856F961-340A-11D0-A96B-00C04FD705A2}")
-        self.WebBrowser.setStatusTip("If nothing is displaying or the text is not displaying, then either "
-                                   "1.) you do not have a local PDF Viewer or 2.) the OS you are on doesn't support annotation rendering.")
-        gun_card_layout.addWidget(self.WebBrowser, 0, 1, -1, 1)
+        self.pdf_preview = PdfPreview(max_width=960)
+        self.pdf_preview.setFixedHeight(800)
+        self.pdf_preview.setStatusTip("Preview of the last generated Gun Card, the PDF itself is saved in \"outputs/\".")
+        gun_card_layout.addWidget(self.pdf_preview, 0, 1, -1, 1)
 
         # Need to check if attempting to re-save when the PDF name is already taken
         self.current_pdf = "EXAMPLE_GUN.pdf"
         self.output_name = ""
 
         # Load in Gun Card Template
-        f = Path(os.path.abspath(self.basedir + "output/examples/EXAMPLE_GUN.pdf")).as_uri()
-        self.WebBrowser.dynamicCall('Navigate(const QString&)', f)
+        self.pdf_preview.show_pdf(self.basedir + "output/guns/EXAMPLE.pdf", "EXAMPLE")
 
         # Give a right-click menu for copying image cards
         self.display_height = 660
@@ -415,6 +449,10 @@ class GunTab(QWidget):
         self.form_design_check.clicked.connect(
             lambda: update_config(basedir, self.form_design_check, self.config, 'gun_tab', 'pdf_two_page_design'))
 
+        self.output_profile_box.setCurrentText(self.config['gun_tab'].get('output_profile', 'small').title())
+        self.output_profile_box.currentTextChanged.connect(
+            lambda: update_config(basedir, self.output_profile_box, self.config, 'gun_tab', 'output_profile'))
+
         self.foundry_export_check.setChecked(self.config['gun_tab']['foundry_export'])
         self.foundry_export_check.clicked.connect(
             lambda: update_config(basedir, self.foundry_export_check, self.config, 'gun_tab', 'foundry_export'))
@@ -464,8 +502,12 @@ class GunTab(QWidget):
         screenshot = screen.grabWindow(self.gun_card_group.winId(), height=self.display_height, y=100)
         screenshot.save(f"output/guns/{self.output_name}.png", "png")
 
+    @profiled("gun")
     def generate_gun(self):
         """ Handles performing the call to generate a gun given the parameters and updating the Gun Card image """
+        # Start of the spans shown in the trace summary
+        trace_start = tracing.mark()
+
         # Load in properties that are currently set in the program
         name = None if self.name_line_edit.text() == "" else self.name_line_edit.text()
         item_level = self.item_level_box.currentText().lower()
@@ -491,6 +533,7 @@ class GunTab(QWidget):
         redtext_check = self.hide_redtext_check.isChecked()
         color_check = self.rarity_border_check.isChecked()
         form_check = self.form_fill_check.isChecked()
+        output_profile = self.output_profile_box.currentText().lower()
 
         art_filepath = self.art_filepath.text()
 
@@ -523,22 +566,38 @@ class GunTab(QWidget):
         self.output_pdf_label.setText("Saved to output/guns/{}.pdf!".format(self.output_name))
         self.current_pdf = self.output_name
 
-        # Generate the local gun card PDF depending on the form design chosen
+        # Generate the local gun card PDF depending on the form design chosen, tracking any warning it raises
+        self.gun_pdf.warning = None
         if self.form_design_check.isChecked():
-            self.gun_pdf.generate_split_gun_pdf(self.output_name, gun, color_check, form_check, redtext_check)
+            self.gun_pdf.generate_split_gun_pdf(self.output_name, gun, color_check, form_check, redtext_check,
+                                                output_profile)
         else:
-            self.gun_pdf.generate_gun_pdf(self.output_name, gun, color_check, form_check, redtext_check)
+            self.gun_pdf.generate_gun_pdf(self.output_name, gun, color_check, form_check, redtext_check, output_profile)
 
         # Load in gun card PDF
-        f = Path(os.path.abspath("output/guns/{}.pdf".format(self.output_name))).as_uri()
-        self.WebBrowser.dynamicCall('Navigate(const QString&)', f)
+        self.pdf_preview.show_pdf(f"{self.basedir}output/guns/{self.output_name}.pdf", self.output_name)
 
         # FoundryVTT Check
         if self.foundry_export_check.isChecked() is True:
             self.foundry_translator.export_gun(gun, self.output_name, redtext_check)
 
+        # Show the expected damage per hit, including any element bonus die, on the saved label and, unless generating
+        # the card raised a warning, in the statusbar
+        dice_summary = f"Damage per hit {gun.damage} {gun.element_bonus}".strip() + \
+                       f": {describe_dice(gun.damage, gun.element_bonus)}"
+        self.output_pdf_label.setToolTip(dice_summary)
+        if self.gun_pdf.warning is None:
+            self.statusbar.showMessage(dice_summary, 10000)
+
+        # Show the slowest stages of this card if tracing is enabled
+        show_trace_summary(self.basedir, self.statusbar, trace_start, "gun")
+
+    @profiled("multiple_guns")
     def generate_multiple_guns(self):
         """ Handles performing the call to automatically generate multiple guns and save them to outputs  """
+        # Start of the spans shown in the trace summary
+        trace_start = tracing.mark()
+
         # Check for set constants
         item_level = self.item_level_box.currentText().lower()
 
@@ -569,6 +628,7 @@ class GunTab(QWidget):
         redtext_check = self.hide_redtext_check.isChecked()
         color_check = self.rarity_border_check.isChecked()
         form_check = self.form_fill_check.isChecked()
+        output_profile = self.output_profile_box.currentText().lower()
 
         art_filepath = self.art_filepath.text()
 
@@ -585,6 +645,13 @@ class GunTab(QWidget):
             if self.element_checkboxes[element_key].isChecked():
                 selected_elements.append(element_key)
 
+        # Whether the cards are only kept in memory until they are imposed onto print sheets, in which case they are
+        # built with the fast profile as the sheets are optimized as a whole
+        print_sheet_check = self.print_sheet_check.isChecked()
+        if print_sheet_check:
+            output_profile = "fast"
+        sheet_cards = []
+
         # Generate N guns
         for _ in range(number_gen):
             # Generate the gun object
@@ -603,20 +670,39 @@ class GunTab(QWidget):
                 self.multi_output_label.setText("PDF Name already in use!".format(self.output_name))
                 continue
 
-            # Generate the local gun card PDF
-            if self.form_design_check.isChecked():
-                self.gun_pdf.generate_split_gun_pdf(self.output_name, gun, color_check, form_check, redtext_check)
+            # Generate the gun card PDF, kept in memory for the print sheets or otherwise saved locally
+            if print_sheet_check and self.form_design_check.isChecked():
+                sheet_cards.append(self.gun_pdf.render_split_gun_pdf(gun, color_check, form_check, redtext_check,
+                                                                     output_profile))
+            elif print_sheet_check:
+                sheet_cards.append(self.gun_pdf.render_gun_pdf(gun, color_check, form_check, redtext_check,
+                                                               output_profile))
+            elif self.form_design_check.isChecked():
+                self.gun_pdf.generate_split_gun_pdf(self.output_name, gun, color_check, form_check, redtext_check,
+                                                    output_profile)
             else:
-                self.gun_pdf.generate_gun_pdf(self.output_name, gun, color_check, form_check, redtext_check)
+                self.gun_pdf.generate_gun_pdf(self.output_name, gun, color_check, form_check, redtext_check,
+                                              output_profile)
 
             # FoundryVTT Check
             if self.foundry_export_check.isChecked() is True:
                 self.foundry_translator.export_gun(gun, self.output_name, redtext_check)
 
+        # Impose the cards onto print sheets in a single PDF
+        if print_sheet_check and len(sheet_cards) > 0:
+            self.output_name = f"PrintSheet_{len(sheet_cards)}Guns_{time.strftime('%Y%m%d_%H%M%S')}"
+            impose_cards(sheet_cards, f"{self.basedir}output/guns/{self.output_name}.pdf")
+
         # Set text and current PDF name
-        self.multi_output_label.setText("Saved {} guns to 'output/guns/'!".format(number_gen))
+        if print_sheet_check:
+            self.multi_output_label.setText(f"Saved {len(sheet_cards)} guns to 'output/guns/{self.output_name}.pdf'!")
+        else:
+            self.multi_output_label.setText("Saved {} guns to 'output/guns/'!".format(number_gen))
         self.current_pdf = self.output_name
 
         # Load in last generated gun card PDF
-        f = Path(os.path.abspath("output/guns/{}.pdf".format(self.output_name))).as_uri()
-        self.WebBrowser.dynamicCall('Navigate(const QString&)', f)
+        self.pdf_preview.show_pdf(f"{self.basedir}output/guns/{self.output_name}.pdf", self.output_name)
+
+        # Show the average size and save time of the cards, or the slowest stages if tracing is enabled
+        self.statusbar.showMessage(self.gun_pdf.describe_output(output_profile), 10000)
+        show_trace_summary(self.basedir, self.statusbar, trace_start, "multiple_guns")
@@ -0,0 +1,111 @@
+"""
+@file ItemCard.py
+@author Ryan Missel
+
+Handles the item card display shared by the Melee, Shield, Relic, Grenade, and Potion tabs.
+
+Every row of a card is built once, when the tab is built, and kept hidden until the first generation. Regenerating
+an item only updates the rows whose text changed and resizes the effect boxes to their new number of lines, rather
+than tearing down and rebuilding every widget on each click.
+"""
+from app.pixmap_cache import get_scaled_pixmap
+from app.tab_utils import add_stat_to_layout, split_effect_text
+
+from PyQt5 import QtCore
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QGridLayout, QLabel, QTextEdit, QWidget
+
+
+# Font size of the effect boxes' text, and the inset of the text from each side of the box, in pixels
+EFFECT_FONT_SIZE = 12
+EFFECT_PADDING = 8
+
+
+class ItemCard:
+    def __init__(self, card_layout, effect_width=245, image_size=300):
+        """
+        Empty card added to the given layout, rows are then added in display order
+        :param card_layout: QGridLayout of the card group
+        :param effect_width: fixed width of the multi-line effect boxes
+        :param image_size: size the item art is scaled to fit in
+        """
+        self.effect_width = effect_width
+        self.image_size = image_size
+
+        # Widgets of the card by row key
+        self.widgets = {}
+
+        self.layout = QGridLayout()
+        self.layout.setContentsMargins(0, 0, 0, 0)
+        self.layout.setAlignment(Qt.AlignTop)
+        self.row = 0
+
+        # Hidden until the first item is shown, as the card starts out empty
+        self.widget = QWidget()
+        self.widget.setLayout(self.layout)
+        self.widget.setVisible(False)
+        card_layout.addWidget(self.widget, 0, 0, Qt.AlignTop)
+
+    def add_image(self, key):
+        """ Adds a centered row for the item art """
+        display = QLabel()
+        display.setAlignment(Qt.AlignCenter)
+        self.layout.addWidget(display, self.row, 0, 1, -1)
+        self.widgets[key] = display
+        self.row += 1
+
+    def add_spacer(self):
+        """ Adds spacing between groups """
+        self.layout.addWidget(QLabel(""), self.row, 0)
+        self.row += 1
+
+    def add_stat(self, key, label):
+        """ Adds a single line stat row """
+        self.widgets[key] = add_stat_to_layout(self.layout, label, self.row)
+        self.row += 1
+
+    def add_effect(self, key, label):
+        """ Adds a multi-line effect row, whose box is resized to the number of lines of each effect shown """
+        effect = QTextEdit()
+        effect.setFixedWidth(self.effect_width)
+        self.layout.addWidget(QLabel(label), self.row, 0)
+        self.layout.addWidget(effect, self.row, 1)
+        self.widgets[key] = effect
+        self.row += 1
+
+    def add_layout(self, label, layout, rows=1):
+        """ Adds a row holding a custom layout, i.e. the melee element checkboxes """
+        self.layout.addWidget(QLabel(label), self.row, 0, QtCore.Qt.AlignTop)
+        self.layout.addLayout(layout, self.row, 1, QtCore.Qt.AlignTop)
+        self.row += rows
+
+    def set_image(self, key, path):
+        """
+        Shows the art scaled to fit the card, reusing the shared scaled pixmap cache
+        :param path: image file of the art, or the encoded image bytes
+        """
+        self.widgets[key].setPixmap(get_scaled_pixmap(path, self.image_size, self.image_size))
+
+    def set_text(self, key, text):
+        """ Sets the text of a stat row, skipping the update if it is unchanged """
+        text = "" if text is None else str(text)
+        if self.widgets[key].text() != text:
+            self.widgets[key].setText(text)
+
+    def set_effect(self, key, text, lines=None):
+        """
+        Sets the text of an effect row, resizing its box to the number of lines
+        :param text: effect text, split into lines to fit the box
+        :param lines: fixed height of the box in lines, i.e. for a blank effect, otherwise fit to the text
+        """
+        info = split_effect_text(text, self.effect_width - 2 * EFFECT_PADDING, EFFECT_FONT_SIZE) if lines is None else text
+        lines = info.count("\n") + 2 if lines is None else lines
+        effect = self.widgets[key]
+        if effect.maximumHeight() != lines * 15:
+            effect.setFixedHeight(lines * 15)
+        if effect.toPlainText() != info:
+            effect.setText(info)
+
+    def show(self):
+        """ Shows the card once it holds an item """
+        self.widget.setVisible(True)
@@ -7,14 +7,18 @@ Handles the logic and state for the PyQT tab related to melee generation
 from classes.GunImage import GunImage
 from classes.MeleeWeapon import MeleeWeapon
 
-from app.tab_utils import add_stat_to_layout, copy_image_action, save_image_action
-from classes.json_reader import get_file_data
-
-from PyQt5 import QtCore, QtWidgets
+from app.ItemCard import ItemCard
+from app.tab_utils import add_stat_to_layout, copy_image_action, save_image_action, show_trace_summary
+from classes import tracing
+from classes.profiling import profiled
+from classes.resource_registry import get_table
+from classes.dice_engine import describe_dice
+
+from PyQt5 import QtWidgets
 from PyQt5.QtCore import Qt, QTimer
-from PyQt5.QtGui import QIcon, QFont, QPixmap, QKeySequence, QClipboard, QGuiApplication
+from PyQt5.QtGui import QIcon, QFont
 from PyQt5.QtWidgets import (QComboBox, QGridLayout, QGroupBox, QLabel, QWidget, QPushButton,
-                             QCheckBox, QFileDialog, QLineEdit, QTextEdit, QShortcut, QAction)
+                             QCheckBox, QFileDialog, QLineEdit)
 
 
 class MeleeTab(QWidget):
@@ -48,7 +52,7 @@ class MeleeTab(QWidget):
         ##### Information Separator
         information_separator = QLabel("Melee Information")
         information_separator.setFont(font)
-        information_separator.setAlignment(QtCore.Qt.AlignCenter)
+        information_separator.setAlignment(Qt.AlignCenter)
         base_stats_layout.addWidget(information_separator, idx, 0, 1, -1)
         idx += 1
 
@@ -60,7 +64,7 @@ class MeleeTab(QWidget):
         base_stats_layout.addWidget(QLabel("Item Level: "), idx, 0)
         self.item_level_box = QComboBox()
         self.item_level_box.addItem("Random")
-        for item in get_file_data(basedir + "resources/guns/gun_types.json").get("pistol").keys():
+        for item in get_table(basedir, "resources/guns/gun_types.json").get("pistol").keys():
             self.item_level_box.addItem(item)
         base_stats_layout.addWidget(self.item_level_box, idx, 1)
         idx += 1
@@ -69,7 +73,7 @@ class MeleeTab(QWidget):
         base_stats_layout.addWidget(QLabel("Guild: "), idx, 0)
         self.guild_type_box = QComboBox()
         self.guild_type_box.addItem("Random")
-        for item in get_file_data(basedir + "resources/misc/melees/guild_table.json").keys():
+        for item in get_table(basedir, "resources/misc/melees/guild_table.json").keys():
             self.guild_type_box.addItem(item.title())
         base_stats_layout.addWidget(self.guild_type_box, idx, 1)
         idx += 1
@@ -87,7 +91,7 @@ class MeleeTab(QWidget):
         base_stats_layout.addWidget(QLabel("Prefix: "), idx, 0)
         self.prefix_box = QComboBox()
         self.prefix_box.addItem("Random")
-        for pidx, (key, item) in enumerate(get_file_data(basedir + "resources/misc/melees/prefix.json").items()):
+        for pidx, (key, item) in enumerate(get_table(basedir, "resources/misc/melees/prefix.json").items()):
             if item['name'] == "":
                 self.prefix_box.addItem(f"[{key}] None")
             else:
@@ -113,7 +117,7 @@ class MeleeTab(QWidget):
         ##### Element Separator
         element_separator = QLabel("Element Selection")
         element_separator.setFont(font)
-        element_separator.setAlignment(QtCore.Qt.AlignCenter)
+        element_separator.setAlignment(Qt.AlignCenter)
         base_stats_layout.addWidget(element_separator, idx, 0, 1, -1)
         idx += 1
 
@@ -141,8 +145,8 @@ class MeleeTab(QWidget):
                 element_buttons.addWidget(element_checkbox, 1, i % 3)
             self.element_checkboxes[icon] = element_checkbox
 
-        base_stats_layout.addWidget(QLabel("Select Specific Elements:"), idx, 0, QtCore.Qt.AlignTop)
-        base_stats_layout.addLayout(element_buttons, idx, 1, QtCore.Qt.AlignTop)
+        base_stats_layout.addWidget(QLabel("Select Specific Elements:"), idx, 0, Qt.AlignTop)
+        base_stats_layout.addLayout(element_buttons, idx, 1, Qt.AlignTop)
         idx += 2
 
         # Setting a custom element damage die
@@ -170,7 +174,7 @@ class MeleeTab(QWidget):
         ##### Art Separator
         art_separator = QLabel("Custom Art Selection")
         art_separator.setFont(font)
-        art_separator.setAlignment(QtCore.Qt.AlignCenter)
+        art_separator.setAlignment(Qt.AlignCenter)
         base_stats_layout.addWidget(art_separator, idx, 0, 1, -1)
         idx += 1
 
@@ -234,6 +238,41 @@ class MeleeTab(QWidget):
         self.melee_card_layout = QGridLayout()
         self.melee_card_layout.setAlignment(Qt.AlignTop)
 
+        # Card rows are built once and updated in place on each generation
+        self.melee_card = ItemCard(self.melee_card_layout, effect_width=220)
+        self.melee_card.add_image("art")
+        self.melee_card.add_spacer()
+        self.melee_card.add_stat("name", "Name: ")
+        self.melee_card.add_stat("item_level", "Item Level: ")
+        self.melee_card.add_stat("rarity", "Rarity: ")
+        self.melee_card.add_stat("guild", "Guild: ")
+        self.melee_card.add_effect("guild_effect", "Guild Effect: ")
+        self.melee_card.add_spacer()
+        self.melee_card.add_stat("prefix", "Prefix: ")
+        self.melee_card.add_effect("prefix_effect", "Prefix Effect: ")
+        self.melee_card.add_spacer()
+        self.melee_card.add_stat("redtext_name", "RedText Name: ")
+        self.melee_card.add_effect("redtext_effect", "RedText Effect: ")
+        self.melee_card.add_spacer()
+
+        # Build a dictionary of button object IDs
+        self.melee_element_checkboxes = dict()
+        melee_elements = QGridLayout()
+        melee_elements.setAlignment(Qt.AlignCenter)
+        for i, icon in enumerate(self.element_icon_paths.keys()):
+            element_checkbox = QCheckBox()
+            element_checkbox.setIcon(QIcon(f"resources/images/element_icons/{self.element_icon_paths[icon]}"))
+
+            if i < len(self.element_icon_paths.keys()) // 2:
+                melee_elements.addWidget(element_checkbox, 0, i)
+            else:
+                melee_elements.addWidget(element_checkbox, 1, i % 3)
+            self.melee_element_checkboxes[icon] = element_checkbox
+
+        self.melee_card.add_layout("Elements:", melee_elements, rows=2)
+        self.melee_card.add_stat("element_damage", "Element Die: ")
+        self.melee_card.add_stat("element_expected", "Avg. Element Dmg: ")
+
         # Give a right-click menu for copying image cards
         self.display_height = 750
         self.melee_card_group.setContextMenuPolicy(Qt.ActionsContextMenu)
@@ -284,39 +323,6 @@ class MeleeTab(QWidget):
         else:
             self.art_filepath.setText(filename)
 
-    def clear_layout(self, layout):
-        """
-        Wipe the current melee card. Technically has a memory leak on the 'wiped' components, but
-        really a non-issue with how much memory it would accumulate.
-        :param layout: QtLayout of the Melee Card
-        """
-        if layout is not None:
-            while layout.count():
-                child = layout.takeAt(0)
-                if child.widget() is not None:
-                    child.widget().deleteLater()
-                elif child.layout() is not None:
-                    self.clear_layout(child.layout())
-
-    def split_effect_text(self, initial_string, line_length=32):
-        """
-        Handles splitting an effect string into multiple lines depending on the length of words.
-        Cleaner for visualizing in the cards
-        :param initial_string: effect string to split
-        :param line_length: length of line to split
-        :return: line with newlines put in
-        """
-        cur_chars = 0
-        info = ""
-        for idx, word in enumerate(initial_string.split(" ")):
-            cur_chars += len(word)
-            if cur_chars > line_length:
-                info += "\n"
-                cur_chars = len(word)
-
-            info += f"{word} "
-        return info
-
     def save_screenshot(self):
         """ Screenshots the Melee Card layout and saves to a local file """
         # Save as local image
@@ -327,11 +333,15 @@ class MeleeTab(QWidget):
         # Set label text for output
         self.output_pdf_label.setText(f"Saved to output/melees/{self.output_name}.png")
 
+    @profiled("melee")
     def generate_melee(self):
         """
         Handles performing the call to generate a Melee Weapon given the
         parameters and updating the Melee Card image
         """
+        # Start of the spans shown in the trace summary
+        trace_start = tracing.mark()
+
         # Load in properties that are currently set in the program
         name = None if self.name_line_edit.text() == "" else self.name_line_edit.text()
         item_level = self.item_level_box.currentText().lower()
@@ -362,160 +372,39 @@ class MeleeTab(QWidget):
                   element_damage=element_damage, rarity_element=element_roll, selected_elements=selected_elements,
                   prefix=prefix, redtext_name=redtext_name, redtext_info=redtext_info, melee_art=art_filepath)
 
-        # Clear current melee card
-        self.clear_layout(self.melee_card_layout)
-
-        # Index counter for gridlayout across all widgets
-        idx = 0
-
-        # Pixmap for the MeleeWeapon Image
-        melee_display = QLabel()
-        melee_pixmap = QPixmap(melee.melee_art_path).scaled(300, 300, Qt.KeepAspectRatio,
-                                                            transformMode=QtCore.Qt.SmoothTransformation)
-        melee_display.setAlignment(Qt.AlignCenter)
-        melee_display.setPixmap(melee_pixmap)
-        self.melee_card_layout.addWidget(melee_display, idx, 0, 1, -1)
-        idx += 1
-
-        # Add spacing between groups
-        self.melee_card_layout.addWidget(QLabel(""), idx, 0)
-        idx += 1
+        # Update the melee card in place
+        self.melee_card.set_image("art", melee.melee_art_path)
+        self.melee_card.set_text("name", melee.name)
+        self.melee_card.set_text("item_level", melee.item_level)
+        self.melee_card.set_text("rarity", melee.rarity.title())
+        self.melee_card.set_text("guild", melee.guild.title())
+        self.melee_card.set_effect("guild_effect", melee.guild_mod)
 
-        # Melee Weapon Name
-        melee_name = add_stat_to_layout(self.melee_card_layout, "Name: ", idx)
-        melee_name.setText(melee.name)
-        idx += 1
-
-        # Melee Weapon Item Level
-        melee_item_level = add_stat_to_layout(self.melee_card_layout, "Item Level: ", idx)
-        melee_item_level.setText(melee.item_level)
-        idx += 1
-
-        # Melee Weapon Item Level
-        melee_rarity = add_stat_to_layout(self.melee_card_layout, "Rarity: ", idx)
-        melee_rarity.setText(melee.rarity.title())
-        idx += 1
-
-        # Melee Weapon Guild Name
-        melee_guild = add_stat_to_layout(self.melee_card_layout, "Guild: ", idx)
-        melee_guild.setText(melee.guild.title())
-        idx += 1
-
-        # Melee Guild effect, dynamically expanded
-        melee_guild_effect = QTextEdit()
-        prefix_info = self.split_effect_text(melee.guild_mod)
-        numOfLinesInText = prefix_info.count("\n") + 2
-        melee_guild_effect.setFixedHeight(numOfLinesInText * 15)
-        melee_guild_effect.setFixedWidth(220)
-        melee_guild_effect.setText(prefix_info)
-
-        self.melee_card_layout.addWidget(QLabel("Guild Effect: "), idx, 0, numOfLinesInText, 1)
-        self.melee_card_layout.addWidget(melee_guild_effect, idx, 1, numOfLinesInText, 1)
-        idx += numOfLinesInText
-
-        # Add spacing between groups
-        self.melee_card_layout.addWidget(QLabel(""), idx, 0)
-        idx += 1
-
-        # Melee Weapon Prefix
-        melee_prefix = add_stat_to_layout(self.melee_card_layout, "Prefix: ", idx)
-        melee_prefix.setText(melee.prefix_name)
-        idx += 1
-
-        # Melee Weapon Prefix Info
+        # Prefix and RedText effects are left as blank boxes with a fixed number of lines when there are none
+        self.melee_card.set_text("prefix", melee.prefix_name)
         if melee.prefix_name != "":
-            # If the prefix has information, make it a multi-line TextEdit
-            melee_prefix_effect = QTextEdit()
-            prefix_info = self.split_effect_text(melee.prefix_info)
-            numOfLinesInText = prefix_info.count("\n") + 2
-            melee_prefix_effect.setFixedHeight(numOfLinesInText * 15)
-            melee_prefix_effect.setFixedWidth(220)
-            melee_prefix_effect.setText(prefix_info)
-
-            self.melee_card_layout.addWidget(QLabel("Prefix Effect: "), idx, 0, numOfLinesInText, 1)
-            self.melee_card_layout.addWidget(melee_prefix_effect, idx, 1, numOfLinesInText, 1)
-            idx += numOfLinesInText
+            self.melee_card.set_effect("prefix_effect", melee.prefix_info)
         else:
-            # Otherwise just make it a blank TextEdit with fixed height and number of lienes
-            numOfLinesInText = 4
-
-            melee_prefix_effect = QTextEdit()
-            melee_prefix_effect.setText("")
-            melee_prefix_effect.setFixedHeight(numOfLinesInText * 15)
-            melee_prefix_effect.setFixedWidth(220)
+            self.melee_card.set_effect("prefix_effect", "", lines=4)
 
-            self.melee_card_layout.addWidget(QLabel("Prefix Effect: "), idx, 0, numOfLinesInText, 1)
-            self.melee_card_layout.addWidget(melee_prefix_effect, idx, 1, numOfLinesInText, 1)
-            idx += numOfLinesInText
-
-        # Add spacing between groups
-        self.melee_card_layout.addWidget(QLabel(""), idx, 0)
-        idx += 1
-
-        # Melee Weapon RedText
-        melee_redtext_name = add_stat_to_layout(self.melee_card_layout, "RedText Name: ", idx)
-        melee_redtext_name.setText(melee.redtext_name)
-        idx += 1
-
-        # Melee Weapon RedText Information
+        self.melee_card.set_text("redtext_name", melee.redtext_name)
         if melee.redtext_name != "":
-            # If the redtext has information, make it a multi-line TextEdit
-            melee_redtext_effect = QTextEdit()
-            prefix_info = self.split_effect_text(melee.redtext_info)
-            numOfLinesInText = prefix_info.count("\n") + 2
-            melee_redtext_effect.setFixedHeight(numOfLinesInText * 15)
-            melee_redtext_effect.setFixedWidth(220)
-            melee_redtext_effect.setText(prefix_info)
-
-            self.melee_card_layout.addWidget(QLabel("RedText Effect: "), idx, 0, numOfLinesInText, 1)
-            self.melee_card_layout.addWidget(melee_redtext_effect, idx, 1, numOfLinesInText, 1)
-            idx += numOfLinesInText
+            self.melee_card.set_effect("redtext_effect", melee.redtext_info)
         else:
-            # Otherwise just make it a blank TextEdit with fixed height and number of lines
-            numOfLinesInText = 4
-
-            melee_redtext_effect = QTextEdit()
-            melee_redtext_effect.setText("")
-            melee_redtext_effect.setFixedHeight(numOfLinesInText * 15)
-            melee_redtext_effect.setFixedWidth(220)
-
-            self.melee_card_layout.addWidget(QLabel("RedText Effect: "), idx, 0, numOfLinesInText, 1)
-            self.melee_card_layout.addWidget(melee_redtext_effect, idx, 1, numOfLinesInText, 1)
-            idx += numOfLinesInText
-
-        # Add spacing between groups
-        self.melee_card_layout.addWidget(QLabel(""), idx, 0)
-        idx += 1
-
-        # Build a dictionary of button object IDs
-        melee_element_checkboxes = dict()
-        melee_elements = QGridLayout()
-        melee_elements.setAlignment(Qt.AlignCenter)
-        for i, icon in enumerate(self.element_icon_paths.keys()):
-            element_checkbox = QCheckBox()
-            element_checkbox.setIcon(QIcon(f"resources/images/element_icons/{self.element_icon_paths[icon]}"))
-
-            if i < len(self.element_icon_paths.keys()) // 2:
-                melee_elements.addWidget(element_checkbox, 0, i)
-            else:
-                melee_elements.addWidget(element_checkbox, 1, i % 3)
-            melee_element_checkboxes[icon] = element_checkbox
-
-        self.melee_card_layout.addWidget(QLabel("Elements:"), idx, 0, QtCore.Qt.AlignTop)
-        self.melee_card_layout.addLayout(melee_elements, idx, 1, QtCore.Qt.AlignTop)
-        idx += 2
+            self.melee_card.set_effect("redtext_effect", "", lines=4)
 
         # Set elements to checked
-        for element in melee_element_checkboxes.keys():
-            if element in melee.element:
-                melee_element_checkboxes[element].setChecked(True)
+        for element, element_checkbox in self.melee_element_checkboxes.items():
+            element_checkbox.setChecked(element in melee.element)
 
-        # Melee Weapon Guild
-        melee_element_damage = add_stat_to_layout(self.melee_card_layout, "Element Die: ", idx)
-        melee_element_damage.setText(melee.element_bonus)
-        idx += 1
+        self.melee_card.set_text("element_damage", melee.element_bonus)
+        self.melee_card.set_text("element_expected", describe_dice(melee.element_bonus))
+        self.melee_card.show()
 
         # Save as output
         self.output_name = f"Level{int(melee.item_level.split('-')[0])}_{melee.guild.title()}_" \
                            f"{melee.rarity.title()}_{melee.name}".replace(' ', '')
         QTimer.singleShot(1000, self.save_screenshot)
+
+        # Show the slowest stages of this generation if tracing is enabled
+        show_trace_summary(self.basedir, self.statusbar, trace_start, "melee")
@@ -0,0 +1,140 @@
+"""
+@file PdfPreview.py
+@author Ryan Missel
+
+Handles previewing a generated PDF card inside the app, rasterized by fitz straight to QPixmaps at the screen's DPI.
+Replaces the ActiveX WebBrowser, so the preview works on every OS and does not need an external PDF viewer.
+
+Rendered pages are kept in a small LRU cache keyed by the output name and page number, so re-showing a card is
+instant. An entry is only reused while the PDF on disk and the render scale are unchanged.
+"""
+import os
+from collections import OrderedDict
+
+from classes import tracing
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QImage, QPixmap
+from PyQt5.QtWidgets import QLabel, QScrollArea, QVBoxLayout, QWidget
+
+
+def render_pdf_pages(path, dpi, max_width, device_ratio=1.0):
+    """
+    Rasterizes every page of a PDF, including its form fields
+    :param path: PDF file to render
+    :param dpi: logical DPI of the screen
+    :param max_width: widest a page is shown in logical pixels, larger pages are scaled down to fit
+    :param device_ratio: screen device pixel ratio, so the pages stay sharp on high DPI screens
+    :return: list of QPixmaps, one per page
+    """
+    # Only needed once a preview is shown, so it is not imported with the tab
+    import fitz
+
+    pixmaps = []
+    with tracing.span("PdfPreview.render", pdf=os.path.basename(path)):
+        with fitz.open(path) as document:
+            zoom = min(dpi / 72, max_width / max(page.rect.width for page in document))
+            matrix = fitz.Matrix(zoom * device_ratio, zoom * device_ratio)
+            for page in document:
+                pix = page.get_pixmap(matrix=matrix, alpha=False)
+
+                # The QImage only wraps the fitz buffer, so it is copied before the pixmap is freed
+                image = QImage(pix.samples, pix.width, pix.height, pix.stride, QImage.Format_RGB888).copy()
+                pixmap = QPixmap.fromImage(image)
+                pixmap.setDevicePixelRatio(device_ratio)
+                pixmaps.append(pixmap)
+    return pixmaps
+
+
+class PdfPreview(QScrollArea):
+    def __init__(self, max_width=960, cache_size=16):
+        """
+        Scrollable preview of every page of a PDF card
+        :param max_width: widest a page is shown, pages larger than this at screen DPI are scaled down to fit
+        :param cache_size: number of rendered pages to keep
+        """
+        super(PdfPreview, self).__init__()
+        self.max_width = max_width
+        self.cache_size = cache_size
+
+        # (output name, page) -> (PDF modified time, render settings, page count, QPixmap), most recently shown last
+        self.cache = OrderedDict()
+
+        self.pages_layout = QVBoxLayout()
+        self.pages_layout.setAlignment(Qt.AlignHCenter | Qt.AlignTop)
+
+        pages_widget = QWidget()
+        pages_widget.setLayout(self.pages_layout)
+        self.setWidget(pages_widget)
+        self.setWidgetResizable(True)
+
+    def get_settings(self):
+        """ Render settings of the current screen, cached pages are only reused while these are unchanged """
+        return self.logicalDpiX(), self.max_width, self.devicePixelRatioF()
+
+    def get_cached(self, name, modified, settings):
+        """
+        Gets every rendered page of a card if all of them are cached and up to date
+        :return: list of QPixmaps, or None on a miss
+        """
+        entry = self.cache.get((name, 0))
+        if entry is None:
+            return None
+
+        pixmaps = []
+        for page in range(entry[2]):
+            entry = self.cache.get((name, page))
+            if entry is None or entry[0] != modified or entry[1] != settings:
+                return None
+
+            self.cache.move_to_end((name, page))
+            pixmaps.append(entry[3])
+        return pixmaps
+
+    def show_pdf(self, path, name=None):
+        """
+        Shows every page of the PDF, rendering it only if it is not already cached
+        :param path: PDF file to show
+        :param name: output name of the card, used as the cache key, defaulting to the path
+        """
+        name = path if name is None else name
+        try:
+            modified = os.stat(path).st_mtime_ns
+        except OSError:
+            self.show_message(f"No PDF found at {path}!")
+            return
+
+        settings = self.get_settings()
+        pixmaps = self.get_cached(name, modified, settings)
+        if pixmaps is None:
+            pixmaps = render_pdf_pages(path, *settings)
+            for page, pixmap in enumerate(pixmaps):
+                self.cache[(name, page)] = (modified, settings, len(pixmaps), pixmap)
+                self.cache.move_to_end((name, page))
+
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+
+        self.set_pages([self.make_label(pixmap=pixmap) for pixmap in pixmaps])
+
+    def show_message(self, text):
+        """ Replaces the preview with a line of text, i.e. when the PDF is missing """
+        self.set_pages([self.make_label(text=text)])
+
+    @staticmethod
+    def make_label(pixmap=None, text=""):
+        label = QLabel(text)
+        label.setAlignment(Qt.AlignCenter)
+        if pixmap is not None:
+            label.setPixmap(pixmap)
+        return label
+
+    def set_pages(self, labels):
+        """ Swaps the shown pages for the given labels """
+        while self.pages_layout.count():
+            child = self.pages_layout.takeAt(0)
+            if child.widget() is not None:
+                child.widget().deleteLater()
+
+        for label in labels:
+            self.pages_layout.addWidget(label)
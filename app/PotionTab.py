@@ -4,19 +4,22 @@
 
 Handles the logic and state for the PyQT tab related to potion generation
 """
-from PyQt5.QtGui import QFont, QPixmap
+from PyQt5.QtGui import QFont
 
 from classes.Potion import Potion
 from classes.PotionImage import PotionImage
 
-from app.tab_utils import add_stat_to_layout, split_effect_text, clear_layout, copy_image_action, update_config, \
-    save_image_action
-from classes.json_reader import get_file_data
+from app.ItemCard import ItemCard
+from app.tab_utils import copy_image_action, update_config, save_image_action, show_trace_summary
+from classes import tracing
+from classes.profiling import profiled
+from classes.resource_registry import get_table
+from classes.dice_engine import describe_dice
 
 from PyQt5.QtCore import Qt, QTimer
-from PyQt5 import QtCore, QtWidgets
+from PyQt5 import QtWidgets
 from PyQt5.QtWidgets import (QComboBox, QGridLayout, QGroupBox, QLabel, QWidget, QPushButton,
-                             QCheckBox, QLineEdit, QFileDialog, QTextEdit)
+                             QCheckBox, QLineEdit, QFileDialog)
 
 
 class PotionTab(QWidget):
@@ -53,7 +56,7 @@ class PotionTab(QWidget):
         ##### Information Separator
         information_separator = QLabel("Potion Information")
         information_separator.setFont(font)
-        information_separator.setAlignment(QtCore.Qt.AlignCenter)
+        information_separator.setAlignment(Qt.AlignCenter)
         potion_stats_layout.addWidget(information_separator, idx, 0, 1, -1)
         idx += 1
 
@@ -61,7 +64,7 @@ class PotionTab(QWidget):
         potion_stats_layout.addWidget(QLabel("Potion %: "), idx, 0)
         self.potion_id_box = QComboBox()
         self.potion_id_box.addItem("Random")
-        for item in get_file_data(basedir + "resources/misc/potions/potion.json").keys():
+        for item in get_table(basedir, "resources/misc/potions/potion.json").keys():
             self.potion_id_box.addItem(item)
         potion_stats_layout.addWidget(self.potion_id_box, idx, 1)
         idx += 1
@@ -73,7 +76,7 @@ class PotionTab(QWidget):
         ##### Art Separator
         art_separator = QLabel("Custom Art Selection")
         art_separator.setFont(font)
-        art_separator.setAlignment(QtCore.Qt.AlignCenter)
+        art_separator.setAlignment(Qt.AlignCenter)
         potion_stats_layout.addWidget(art_separator, idx, 0, 1, -1)
         idx += 1
 
@@ -104,7 +107,7 @@ class PotionTab(QWidget):
         ##### External Tools Separator
         api_separator = QLabel("External Tools")
         api_separator.setFont(font)
-        api_separator.setAlignment(QtCore.Qt.AlignCenter)
+        api_separator.setAlignment(Qt.AlignCenter)
         potion_stats_layout.addWidget(api_separator, idx, 0, 1, -1)
         idx += 1
 
@@ -157,6 +160,15 @@ class PotionTab(QWidget):
         self.potion_card_layout = QGridLayout()
         self.potion_card_layout.setAlignment(Qt.AlignTop)
 
+        # Card rows are built once and updated in place on each generation
+        self.potion_card = ItemCard(self.potion_card_layout, effect_width=263)
+        self.potion_card.add_image("art")
+        self.potion_card.add_spacer()
+        self.potion_card.add_stat("name", "Name: ")
+        self.potion_card.add_effect("effect", "Effect: ")
+        self.potion_card.add_stat("expected", "Avg. Roll: ")
+        self.potion_card.add_spacer()
+
         # Give a right-click menu for copying image cards
         self.display_height = 750
         self.potion_card_group.setContextMenuPolicy(Qt.ActionsContextMenu)
@@ -227,8 +239,12 @@ class PotionTab(QWidget):
         # Set label text for output
         self.output_potion_pdf_label.setText(f"Saved to output/potions/{self.output_name}.png")
 
+    @profiled("potion")
     def generate_potion(self):
         """ Handles performing the call to generate a potion given the parameters and updating the Potion Card image """
+        # Start of the spans shown in the trace summary
+        trace_start = tracing.mark()
+
         # Load in properties that are currently set in the program
         potion_id = self.potion_id_box.currentText()
         potion_art_path = self.art_filepath.text()
@@ -239,48 +255,12 @@ class PotionTab(QWidget):
         # Generate output name and check if it is already in use
         self.output_name = potion.name.replace(" ", "")
 
-        # Clear current potion card
-        clear_layout(self.potion_card_layout)
-
-        # Index counter for gridlayout across all widgets
-        idx = 0
-
-        # Pixmap for the Potion Image
-        potion_display = QLabel()
-        potion_pixmap = QPixmap(potion.potion_art_path).scaled(300, 300, Qt.KeepAspectRatio,
-                                                               transformMode=QtCore.Qt.SmoothTransformation)
-        potion_display.setAlignment(Qt.AlignCenter)
-        potion_display.setPixmap(potion_pixmap)
-        self.potion_card_layout.addWidget(potion_display, idx, 0, 1, -1)
-        idx += 1
-
-        # Add spacing between groups
-        self.potion_card_layout.addWidget(QLabel(""), idx, 0)
-        idx += 1
-
-        # Potion Name
-        potion_name = add_stat_to_layout(self.potion_card_layout, "Name: ", idx)
-        if potion.tina_potion is True:
-            potion_name.setText(f"{potion.name} (Tina Potion)")
-        else:
-            potion_name.setText(potion.name)
-        idx += 1
-
-        # Potion Effect, dynamically expanded
-        potion_effect = QTextEdit()
-        prefix_info = split_effect_text(potion.effect)
-        numOfLinesInText = prefix_info.count("\n") + 2
-        potion_effect.setFixedHeight(numOfLinesInText * 15)
-        potion_effect.setFixedWidth(263)
-        potion_effect.setText(prefix_info)
-
-        self.potion_card_layout.addWidget(QLabel("Effect: "), idx, 0, numOfLinesInText, 1)
-        self.potion_card_layout.addWidget(potion_effect, idx, 1, numOfLinesInText, 1)
-        idx += numOfLinesInText
-
-        # Add spacing between groups
-        self.potion_card_layout.addWidget(QLabel(""), idx, 0)
-        idx += 1
+        # Update the potion card in place
+        self.potion_card.set_image("art", potion.potion_art)
+        self.potion_card.set_text("name", f"{potion.name} (Tina Potion)" if potion.tina_potion is True else potion.name)
+        self.potion_card.set_effect("effect", potion.effect)
+        self.potion_card.set_text("expected", describe_dice(potion.effect))
+        self.potion_card.show()
 
         # Save as output
         QTimer.singleShot(1000, self.save_screenshot)
@@ -288,3 +268,6 @@ class PotionTab(QWidget):
         # FoundryVTT Check
         if self.foundry_export_check.isChecked() is True:
             self.foundry_translator.export_potion(potion, self.output_name)
+
+        # Show the slowest stages of this generation if tracing is enabled
+        show_trace_summary(self.basedir, self.statusbar, trace_start, "potion")
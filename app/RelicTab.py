@@ -4,19 +4,21 @@
 
 Handles the logic and state for the PyQT tab related to relic generation
 """
-from PyQt5.QtGui import QFont, QPixmap
+from PyQt5.QtGui import QFont
 
 from classes.Relic import Relic
 from classes.RelicImage import RelicImage
 
-from app.tab_utils import add_stat_to_layout, clear_layout, split_effect_text, copy_image_action, update_config, \
-    save_image_action
-from classes.json_reader import get_file_data
+from app.ItemCard import ItemCard
+from app.tab_utils import add_stat_to_layout, copy_image_action, update_config, save_image_action, show_trace_summary
+from classes import tracing
+from classes.profiling import profiled
+from classes.resource_registry import get_table
 
 from PyQt5.QtCore import Qt, QTimer
-from PyQt5 import QtCore, QtWidgets
+from PyQt5 import QtWidgets
 from PyQt5.QtWidgets import (QComboBox, QGridLayout, QGroupBox, QLabel, QWidget, QPushButton,
-                             QCheckBox, QLineEdit, QFileDialog, QTextEdit)
+                             QCheckBox, QLineEdit, QFileDialog)
 
 
 class RelicTab(QWidget):
@@ -53,7 +55,7 @@ class RelicTab(QWidget):
         ##### Information Separator
         information_separator = QLabel("Relic Information")
         information_separator.setFont(font)
-        information_separator.setAlignment(QtCore.Qt.AlignCenter)
+        information_separator.setAlignment(Qt.AlignCenter)
         relic_stats_layout.addWidget(information_separator, idx, 0, 1, -1)
         idx += 1
 
@@ -65,7 +67,7 @@ class RelicTab(QWidget):
         relic_stats_layout.addWidget(QLabel("{:<15} ".format("Relic %:")), idx, 0)
         self.relic_id_box = QComboBox()
         self.relic_id_box.addItem("Random")
-        for item in get_file_data(basedir + "resources/misc/relics/relic.json").keys():
+        for item in get_table(basedir, "resources/misc/relics/relic.json").keys():
             self.relic_id_box.addItem(item)
         relic_stats_layout.addWidget(self.relic_id_box, idx, 1)
         idx += 1
@@ -112,7 +114,7 @@ class RelicTab(QWidget):
         ##### Art Separator
         art_separator = QLabel("Custom Art Selection")
         art_separator.setFont(font)
-        art_separator.setAlignment(QtCore.Qt.AlignCenter)
+        art_separator.setAlignment(Qt.AlignCenter)
         relic_stats_layout.addWidget(art_separator, idx, 0, 1, -1)
         idx += 1
 
@@ -143,7 +145,7 @@ class RelicTab(QWidget):
         ##### External Tools Separator
         api_separator = QLabel("External Tools")
         api_separator.setFont(font)
-        api_separator.setAlignment(QtCore.Qt.AlignCenter)
+        api_separator.setAlignment(Qt.AlignCenter)
         relic_stats_layout.addWidget(api_separator, idx, 0, 1, -1)
         idx += 1
 
@@ -196,6 +198,17 @@ class RelicTab(QWidget):
         self.relic_card_layout = QGridLayout()
         self.relic_card_layout.setAlignment(Qt.AlignTop)
 
+        # Card rows are built once and updated in place on each generation
+        self.relic_card = ItemCard(self.relic_card_layout, effect_width=235)
+        self.relic_card.add_image("art")
+        self.relic_card.add_spacer()
+        self.relic_card.add_stat("name", "Name: ")
+        self.relic_card.add_stat("type", "Type: ")
+        self.relic_card.add_stat("rarity", "Rarity: ")
+        self.relic_card.add_effect("effect", "Effect: ")
+        self.relic_card.add_effect("class_effect", "Class Effect: ")
+        self.relic_card.add_spacer()
+
         # Give a right-click menu for copying image cards
         self.display_height = 550
         self.relic_card_group.setContextMenuPolicy(Qt.ActionsContextMenu)
@@ -266,8 +279,12 @@ class RelicTab(QWidget):
         # Set label text for output
         self.output_relic_pdf_label.setText(f"Saved to output/relics/{self.output_name}.png")
 
+    @profiled("relic")
     def generate_relic(self):
         """ Handles performing the call to generate a relic given the parameters and updating the Potion Card image """
+        # Start of the spans shown in the trace summary
+        trace_start = tracing.mark()
+
         # Load in properties that are currently set in the program
         relic_id = self.relic_id_box.currentText()
         relic_name = self.relic_line_edit.text()
@@ -287,67 +304,14 @@ class RelicTab(QWidget):
         # Generate output name and check if it is already in use
         self.output_name = f"{relic.class_id}_{relic.type}_{relic.name.replace(' ', '')}"
 
-        # Clear current relic card
-        clear_layout(self.relic_card_layout)
-
-        # Index counter for gridlayout across all widgets
-        idx = 0
-
-        # Pixmap for the Relic Image
-        relic_display = QLabel()
-        relic_pixmap = QPixmap(relic.relic_art_path).scaled(300, 300, Qt.KeepAspectRatio,
-                                                            transformMode=QtCore.Qt.SmoothTransformation)
-        relic_display.setAlignment(Qt.AlignCenter)
-        relic_display.setPixmap(relic_pixmap)
-        self.relic_card_layout.addWidget(relic_display, idx, 0, 1, -1)
-        idx += 1
-
-        # Add spacing between groups
-        self.relic_card_layout.addWidget(QLabel(""), idx, 0)
-        idx += 1
-
-        # Relic Name
-        relic_name = add_stat_to_layout(self.relic_card_layout, "Name: ", idx)
-        relic_name.setText(relic.name)
-        idx += 1
-
-        # Relic Type
-        relic_type = add_stat_to_layout(self.relic_card_layout, "Type: ", idx)
-        relic_type.setText(relic.type)
-        idx += 1
-
-        # Relic Rarity
-        relic_tier = add_stat_to_layout(self.relic_card_layout, "Rarity: ", idx)
-        relic_tier.setText(relic.rarity.title())
-        idx += 1
-
-        # Relic Guild effect, dynamically expanded
-        relic_effect = QTextEdit()
-        prefix_info = split_effect_text(relic.effect)
-        numOfLinesInText = prefix_info.count("\n") + 2
-        relic_effect.setFixedHeight(numOfLinesInText * 15)
-        relic_effect.setFixedWidth(235)
-        relic_effect.setText(prefix_info)
-
-        self.relic_card_layout.addWidget(QLabel("Effect: "), idx, 0, numOfLinesInText, 1)
-        self.relic_card_layout.addWidget(relic_effect, idx, 1, numOfLinesInText, 1)
-        idx += numOfLinesInText
-
-        # Relic Guild effect, dynamically expanded
-        relic_effect = QTextEdit()
-        prefix_info = split_effect_text(f"({relic.class_id.title()}): {relic.class_effect}")
-        numOfLinesInText = prefix_info.count("\n") + 2
-        relic_effect.setFixedHeight(numOfLinesInText * 15)
-        relic_effect.setFixedWidth(235)
-        relic_effect.setText(prefix_info)
-
-        self.relic_card_layout.addWidget(QLabel("Class Effect: "), idx, 0, numOfLinesInText, 1)
-        self.relic_card_layout.addWidget(relic_effect, idx, 1, numOfLinesInText, 1)
-        idx += numOfLinesInText
-
-        # Add spacing between groups
-        self.relic_card_layout.addWidget(QLabel(""), idx, 0)
-        idx += 1
+        # Update the relic card in place
+        self.relic_card.set_image("art", relic.relic_art)
+        self.relic_card.set_text("name", relic.name)
+        self.relic_card.set_text("type", relic.type)
+        self.relic_card.set_text("rarity", relic.rarity.title())
+        self.relic_card.set_effect("effect", relic.effect)
+        self.relic_card.set_effect("class_effect", f"({relic.class_id.title()}): {relic.class_effect}")
+        self.relic_card.show()
 
         # Save as output
         QTimer.singleShot(1000, self.save_screenshot)
@@ -355,3 +319,6 @@ class RelicTab(QWidget):
         # FoundryVTT Check
         if self.foundry_export_check.isChecked() is True:
             self.foundry_translator.export_relic(relic, self.output_name)
+
+        # Show the slowest stages of this generation if tracing is enabled
+        show_trace_summary(self.basedir, self.statusbar, trace_start, "relic")
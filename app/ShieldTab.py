@@ -4,18 +4,20 @@
 
 Handles the logic and state for the PyQT tab related to shield generation
 """
-from PyQt5.QtGui import QFont, QPixmap
+from PyQt5.QtGui import QFont
 
 from classes.Shield import Shield
 from classes.ShieldImage import ShieldImage
-from classes.json_reader import get_file_data
-from app.tab_utils import add_stat_to_layout, clear_layout, split_effect_text, copy_image_action, update_config, \
-    save_image_action
+from classes.resource_registry import get_table
+from app.ItemCard import ItemCard
+from app.tab_utils import add_stat_to_layout, copy_image_action, update_config, save_image_action, show_trace_summary
+from classes import tracing
+from classes.profiling import profiled
 
 from PyQt5.QtCore import Qt, QTimer
-from PyQt5 import QtCore, QtWidgets
+from PyQt5 import QtWidgets
 from PyQt5.QtWidgets import (QComboBox, QGridLayout, QGroupBox, QLabel, QWidget, QPushButton,
-                             QCheckBox, QLineEdit, QFileDialog, QTextEdit)
+                             QCheckBox, QLineEdit, QFileDialog)
 
 
 class ShieldTab(QWidget):
@@ -52,7 +54,7 @@ class ShieldTab(QWidget):
         ##### Information Separator
         information_separator = QLabel("Shield Information")
         information_separator.setFont(font)
-        information_separator.setAlignment(QtCore.Qt.AlignCenter)
+        information_separator.setAlignment(Qt.AlignCenter)
         shield_stats_layout.addWidget(information_separator, idx, 0, 1, -1)
         idx += 1
 
@@ -64,7 +66,7 @@ class ShieldTab(QWidget):
         shield_stats_layout.addWidget(QLabel("Guild: "), idx, 0)
         self.guild_shield_type_box = QComboBox()
         self.guild_shield_type_box.addItem("Random")
-        for item in get_file_data(basedir + "resources/misc/shields/shield.json").keys():
+        for item in get_table(basedir, "resources/misc/shields/shield.json").keys():
             self.guild_shield_type_box.addItem(item)
         shield_stats_layout.addWidget(self.guild_shield_type_box, idx, 1)
         idx += 1
@@ -73,7 +75,7 @@ class ShieldTab(QWidget):
         shield_stats_layout.addWidget(QLabel("Tier: "), idx, 0)
         self.tier_shield_type_box = QComboBox()
         self.tier_shield_type_box.addItem("Random")
-        for item in get_file_data(basedir + "resources/misc/shields/shield.json")["Ashen"].keys():
+        for item in get_table(basedir, "resources/misc/shields/shield.json")["Ashen"].keys():
             self.tier_shield_type_box.addItem(item)
         shield_stats_layout.addWidget(self.tier_shield_type_box, idx, 1)
         idx += 1
@@ -100,7 +102,7 @@ class ShieldTab(QWidget):
         ##### Art Separator
         art_separator = QLabel("Custom Art Selection")
         art_separator.setFont(font)
-        art_separator.setAlignment(QtCore.Qt.AlignCenter)
+        art_separator.setAlignment(Qt.AlignCenter)
         shield_stats_layout.addWidget(art_separator, idx, 0, 1, -1)
         idx += 1
 
@@ -131,7 +133,7 @@ class ShieldTab(QWidget):
         ##### External Tools Separator
         api_separator = QLabel("External Tools")
         api_separator.setFont(font)
-        api_separator.setAlignment(QtCore.Qt.AlignCenter)
+        api_separator.setAlignment(Qt.AlignCenter)
         shield_stats_layout.addWidget(api_separator, idx, 0, 1, -1)
         idx += 1
 
@@ -184,6 +186,18 @@ class ShieldTab(QWidget):
         self.shield_card_layout = QGridLayout()
         self.shield_card_layout.setAlignment(Qt.AlignTop)
 
+        # Card rows are built once and updated in place on each generation
+        self.shield_card = ItemCard(self.shield_card_layout, effect_width=245)
+        self.shield_card.add_image("art")
+        self.shield_card.add_spacer()
+        self.shield_card.add_stat("name", "Name: ")
+        self.shield_card.add_stat("guild", "Guild: ")
+        self.shield_card.add_stat("tier", "Item Tier: ")
+        self.shield_card.add_stat("capacity", "Capacity: ")
+        self.shield_card.add_stat("recharge", "Recharge: ")
+        self.shield_card.add_effect("effect", "Effect: ")
+        self.shield_card.add_spacer()
+
         # Give a right-click menu for copying image cards
         self.display_height = 600
         self.shield_card_group.setContextMenuPolicy(Qt.ActionsContextMenu)
@@ -254,8 +268,12 @@ class ShieldTab(QWidget):
         # Set label text for output
         self.output_shield_pdf_label.setText(f"Saved to output/shields/{self.output_name}.png")
 
+    @profiled("shield")
     def generate_shield(self):
         """ Handles performing the call to generate a shield given the parameters and updating the Shield Card image """
+        # Start of the spans shown in the trace summary
+        trace_start = tracing.mark()
+
         # Load in properties that are currently set in the program
         shield_name = self.shield_line_edit.text()
         shield_guild = self.guild_shield_type_box.currentText()
@@ -274,65 +292,15 @@ class ShieldTab(QWidget):
         # Generate output name and check if it is already in use
         self.output_name = "{}_Tier{}_{}".format(shield.guild, shield.tier, shield.name.replace(" ", ""))
 
-        # Clear current shield card
-        clear_layout(self.shield_card_layout)
-
-        # Index counter for gridlayout across all widgets
-        idx = 0
-
-        # Pixmap for the Shield Image
-        shield_display = QLabel()
-        shield_pixmap = QPixmap(shield.shield_art_path).scaled(300, 300, Qt.KeepAspectRatio,
-                                                               transformMode=QtCore.Qt.SmoothTransformation)
-        shield_display.setAlignment(Qt.AlignCenter)
-        shield_display.setPixmap(shield_pixmap)
-        self.shield_card_layout.addWidget(shield_display, idx, 0, 1, -1)
-        idx += 1
-
-        # Add spacing between groups
-        self.shield_card_layout.addWidget(QLabel(""), idx, 0)
-        idx += 1
-
-        # Shield Name
-        shield_name = add_stat_to_layout(self.shield_card_layout, "Name: ", idx)
-        shield_name.setText(shield.name)
-        idx += 1
-
-        # Shield Guild
-        shield_guild = add_stat_to_layout(self.shield_card_layout, "Guild: ", idx)
-        shield_guild.setText(shield.guild)
-        idx += 1
-
-        # Shield Tier
-        shield_tier = add_stat_to_layout(self.shield_card_layout, "Item Tier: ", idx)
-        shield_tier.setText(shield.tier)
-        idx += 1
-
-        # Shield Capacity
-        shield_capacity = add_stat_to_layout(self.shield_card_layout, "Capacity: ", idx)
-        shield_capacity.setText(str(shield.capacity))
-        idx += 1
-
-        # Shield Recharge
-        shield_recharge = add_stat_to_layout(self.shield_card_layout, "Recharge: ", idx)
-        shield_recharge.setText(str(shield.recharge))
-        idx += 1
-
-        # Shield Guild effect, dynamically expanded
-        shield_effect = QTextEdit()
-        prefix_info = split_effect_text(shield.effect)
-        numOfLinesInText = prefix_info.count("\n") + 2
-        shield_effect.setFixedHeight(numOfLinesInText * 15)
-        shield_effect.setFixedWidth(245)
-        shield_effect.setText(prefix_info)
-
-        self.shield_card_layout.addWidget(QLabel("Effect: "), idx, 0, numOfLinesInText, 1)
-        self.shield_card_layout.addWidget(shield_effect, idx, 1, numOfLinesInText, 1)
-        idx += numOfLinesInText
-
-        # Add spacing between groups
-        self.shield_card_layout.addWidget(QLabel(""), idx, 0)
-        idx += 1
+        # Update the shield card in place
+        self.shield_card.set_image("art", shield.shield_art)
+        self.shield_card.set_text("name", shield.name)
+        self.shield_card.set_text("guild", shield.guild)
+        self.shield_card.set_text("tier", shield.tier)
+        self.shield_card.set_text("capacity", shield.capacity)
+        self.shield_card.set_text("recharge", shield.recharge)
+        self.shield_card.set_effect("effect", shield.effect)
+        self.shield_card.show()
 
         # Save as output
         QTimer.singleShot(1000, self.save_screenshot)
@@ -340,3 +308,6 @@ class ShieldTab(QWidget):
         # FoundryVTT Check
         if self.foundry_export_check.isChecked() is True:
             self.foundry_translator.export_shield(shield, self.output_name)
+
+        # Show the slowest stages of this generation if tracing is enabled
+        show_trace_summary(self.basedir, self.statusbar, trace_start, "shield")
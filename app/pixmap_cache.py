@@ -0,0 +1,70 @@
+"""
+@file pixmap_cache.py
+@author Ryan Missel
+
+Shared LRU cache of decoded and pre-scaled item art for the Qt cards, so showing the same art again (i.e. a
+recently generated item, or the same game image sampled twice) skips the PNG decode and the smooth rescale.
+
+Entries are keyed by a hash of the image's content rather than its path, as most items hold their art in memory
+rather than in a file, and the melee tab writes its art to the same temporary file on each generation.
+"""
+import hashlib
+from collections import OrderedDict
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QPixmap
+
+
+# Number of scaled pixmaps kept across all of the tabs
+CACHE_SIZE = 32
+
+# (content hash, width, height) -> QPixmap, most recently used last
+_pixmaps = OrderedDict()
+_stats = {"hits": 0, "misses": 0}
+
+
+def get_scaled_pixmap(path, width, height):
+    """
+    Gets the image at the given path scaled to fit in width x height, decoding it only if it is not cached
+    :param path: image file to show, or the encoded image bytes
+    :param width: width to fit in, keeping the aspect ratio
+    :param height: height to fit in, keeping the aspect ratio
+    :return: QPixmap, null if the image could not be read
+    """
+    if isinstance(path, bytes):
+        data = path
+    else:
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return QPixmap()
+
+    key = (hashlib.blake2b(data, digest_size=16).digest(), width, height)
+    pixmap = _pixmaps.get(key)
+    if pixmap is not None:
+        _stats['hits'] += 1
+        _pixmaps.move_to_end(key)
+        return pixmap
+
+    _stats['misses'] += 1
+    pixmap = QPixmap()
+    pixmap.loadFromData(data)
+    if not pixmap.isNull():
+        pixmap = pixmap.scaled(width, height, Qt.KeepAspectRatio, transformMode=Qt.SmoothTransformation)
+
+    _pixmaps[key] = pixmap
+    while len(_pixmaps) > CACHE_SIZE:
+        _pixmaps.popitem(last=False)
+    return pixmap
+
+
+def get_cache_stats():
+    """ Number of cache hits, misses, and pixmaps currently kept """
+    return dict(_stats, size=len(_pixmaps))
+
+
+def clear_cache():
+    """ Drops every cached pixmap and resets the stats """
+    _pixmaps.clear()
+    _stats.update(hits=0, misses=0)
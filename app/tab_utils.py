@@ -6,9 +6,12 @@ Holds shared functions across the PyQT tabs
 """
 import json
 
+from classes import tracing
+from classes.text_layout import wrap_text
+
 from PyQt5 import QtWidgets
 from PyQt5.QtGui import QIntValidator, QGuiApplication, QClipboard
-from PyQt5.QtWidgets import QLabel, QLineEdit, QAction, QMenu, QFileDialog
+from PyQt5.QtWidgets import QComboBox, QLabel, QLineEdit, QAction, QMenu, QFileDialog
 
 
 def add_stat_to_layout(layout, label, row, force_int=False, placeholder=None, read_only=False):
@@ -35,39 +38,16 @@ def add_stat_to_layout(layout, label, row, force_int=False, placeholder=None, re
     return new_line_edit
 
 
-def clear_layout(layout):
-    """
-    Wipe the current melee card. Technically has a memory leak on the 'wiped' components, but
-    really a non-issue with how much memory it would accumulate.
-    :param layout: QtLayout of the Melee Card
-    """
-    if layout is not None:
-        while layout.count():
-            child = layout.takeAt(0)
-            if child.widget() is not None:
-                child.widget().deleteLater()
-            elif child.layout() is not None:
-                clear_layout(child.layout())
-
-
-def split_effect_text(initial_string, line_length=32):
+def split_effect_text(initial_string, width=229, font_size=12):
     """
-    Handles splitting an effect string into multiple lines depending on the length of words.
-    Cleaner for visualizing in the cards
+    Handles splitting an effect string into multiple lines depending on the width of its words, measured by the
+    shared card text layout. Cleaner for visualizing in the cards
     :param initial_string: effect string to split
-    :param line_length: length of line to split
+    :param width: width of the text in the effect box in pixels, by default that of the 245 pixel wide boxes
+    :param font_size: font size of the effect box in pixels
     :return: line with newlines put in
     """
-    cur_chars = 0
-    info = ""
-    for idx, word in enumerate(initial_string.split(" ")):
-        cur_chars += len(word)
-        if cur_chars > line_length:
-            info += "\n"
-            cur_chars = len(word)
-
-        info += f"{word} "
-    return info
+    return "\n".join(wrap_text(initial_string, "Helvetica", font_size, width))
 
 
 def copy_image_action(self, winID, height=750, y=0):
@@ -110,10 +90,26 @@ def save_card(self, winID, image_type, height, y=0):
 
 
 def update_config(basedir, widget, config, config_tab, config_variable):
-    """ For a given widget that has a configuration associated with it, update the config when checked """
-    # Set config variable to current widget
-    config[config_tab][config_variable] = widget.isChecked()
+    """ For a given widget that has a configuration associated with it, update the config when checked or chosen """
+    # Set config variable to current widget, the choice of a dropdown or whether a checkbox is checked
+    if isinstance(widget, QComboBox):
+        config[config_tab][config_variable] = widget.currentText().lower()
+    else:
+        config[config_tab][config_variable] = widget.isChecked()
 
     # Update configuration file
     with open(f"{basedir}resources/CONFIG.json", 'w') as f:
         json.dump(config, f)
+
+
+def show_trace_summary(basedir, statusbar, since, trace_name):
+    """
+    When span tracing is enabled, shows the slowest stages of the last generation and saves them as a Chrome trace
+    :param since: tracing.mark() taken when the generation started
+    :param trace_name: name of the trace file under output/traces/
+    """
+    if not tracing.is_enabled():
+        return
+
+    tracing.export_chrome_trace(f"{basedir}output/traces/{trace_name}.json", since)
+    statusbar.showMessage(tracing.format_summary(since), 10000)
@@ -0,0 +1,285 @@
+"""
+@file CardRenderer.py
+@author Ryan Missel
+
+Headless renderer of the Melee, Shield, Relic, Grenade, and Potion cards with PIL, laying out the same fields as the
+cards of the app's tabs straight from the item objects. Unlike screenshotting the Qt card, this needs no window, so
+cards can be rendered in batch scripts and in parallel.
+
+Layout sizes are given in the app's logical pixels (96 DPI) and scaled to the DPI chosen, so a card rendered at
+96 DPI matches the one shown in the app and one at 300 DPI is the same card at print resolution.
+
+Batches are split into chunks rendered on a ProcessPoolExecutor, each worker keeping its own cache of scaled art.
+"""
+import io
+import os
+import hashlib
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from classes.dice_engine import describe_dice
+
+
+# Card layout in logical pixels at 96 DPI, matching the card groups of the app
+CARD_WIDTH = 325
+PADDING = 12
+ART_SIZE = 300
+LABEL_WIDTH = 118
+ROW_HEIGHT = 26
+LINE_HEIGHT = 15
+FONT_SIZE = 12
+
+# Attribute holding the art of each item class, either its encoded bytes or the path of a file holding it
+ART_ATTRIBUTES = {
+    "MeleeWeapon": "melee_art_path",
+    "Shield": "shield_art",
+    "Relic": "relic_art",
+    "Grenade": "grenade_art",
+    "Potion": "potion_art"
+}
+
+
+def card_rows(item):
+    """
+    Rows of the item's card, in the same order as its card in the app
+    :param item: MeleeWeapon, Shield, Relic, Grenade, or Potion
+    :return: list of (label, text, whether it is a multi-line effect)
+    """
+    kind = type(item).__name__
+    if kind == "MeleeWeapon":
+        return [
+            ("Name: ", item.name, False),
+            ("Item Level: ", item.item_level, False),
+            ("Rarity: ", item.rarity.title(), False),
+            ("Guild: ", item.guild.title(), False),
+            ("Guild Effect: ", item.guild_mod, True),
+            ("Prefix: ", item.prefix_name, False),
+            ("Prefix Effect: ", item.prefix_info, True),
+            ("RedText Name: ", item.redtext_name, False),
+            ("RedText Effect: ", item.redtext_info, True),
+            ("Elements: ", ", ".join(element.title() for element in item.element), False),
+            ("Element Die: ", item.element_bonus, False),
+            ("Avg. Element Dmg: ", describe_dice(item.element_bonus), False)
+        ]
+
+    if kind == "Shield":
+        return [
+            ("Name: ", item.name, False),
+            ("Guild: ", item.guild, False),
+            ("Item Tier: ", item.tier, False),
+            ("Capacity: ", item.capacity, False),
+            ("Recharge: ", item.recharge, False),
+            ("Effect: ", item.effect, True)
+        ]
+
+    if kind == "Relic":
+        return [
+            ("Name: ", item.name, False),
+            ("Type: ", item.type, False),
+            ("Rarity: ", item.rarity.title(), False),
+            ("Effect: ", item.effect, True),
+            ("Class Effect: ", f"({item.class_id.title()}): {item.class_effect}", True)
+        ]
+
+    if kind == "Grenade":
+        return [
+            ("Name: ", item.name, False),
+            ("Guild: ", item.guild.title(), False),
+            ("Item Tier: ", item.tier, False),
+            ("Type: ", item.type, False),
+            ("Damage: ", item.damage, False),
+            ("Avg. Damage: ", describe_dice(str(item.damage)), False),
+            ("Effect: ", item.effect, True)
+        ]
+
+    if kind == "Potion":
+        return [
+            ("Name: ", f"{item.name} (Tina Potion)" if item.tina_potion is True else item.name, False),
+            ("Effect: ", item.effect, True),
+            ("Avg. Roll: ", describe_dice(item.effect), False)
+        ]
+
+    raise ValueError(f"No card layout for {kind}!")
+
+
+def card_name(item):
+    """ Output name of the item's card, the same as the app saves it under """
+    kind = type(item).__name__
+    if kind == "MeleeWeapon":
+        return f"Level{int(item.item_level.split('-')[0])}_{item.guild.title()}_{item.rarity.title()}_{item.name}".replace(' ', '')
+    if kind in ["Shield", "Grenade"]:
+        return "{}_Tier{}_{}".format(item.guild, item.tier, item.name.replace(" ", ""))
+    if kind == "Relic":
+        return f"{item.class_id}_{item.type}_{item.name.replace(' ', '')}"
+    return item.name.replace(" ", "")
+
+
+def make_job(item, name=None):
+    """
+    Snapshots an item into a job for render_batch, reading its art right away when it is a file, as melee weapons
+    reuse one temporary art file
+    :param item: item to render
+    :param name: output name of the card, defaulting to card_name
+    :return: (name, rows, art bytes or None)
+    """
+    art = getattr(item, ART_ATTRIBUTES[type(item).__name__], None)
+    if isinstance(art, str):
+        art_path, art = art, None
+        if art_path != "" and os.path.exists(art_path):
+            with open(art_path, 'rb') as f:
+                art = f.read()
+    return card_name(item) if name is None else name, card_rows(item), art
+
+
+class CardRenderer:
+    def __init__(self, dpi=96, art_cache_size=32):
+        """
+        Renderer of the item cards at a given DPI
+        :param dpi: output resolution, 96 matches the cards in the app
+        :param art_cache_size: number of scaled art images kept, as batches often share the same art
+        """
+        from PIL import ImageFont
+
+        self.dpi = dpi
+        self.scale = dpi / 96
+        self.font = ImageFont.load_default(self.px(FONT_SIZE))
+
+        self.art_cache_size = art_cache_size
+        self.art_cache = OrderedDict()
+
+    def px(self, value):
+        """ Logical pixels at 96 DPI to output pixels """
+        return int(round(value * self.scale))
+
+    def get_art(self, art):
+        """
+        Decodes and scales the art to fit the card, reusing it if the same art was scaled before
+        :param art: image bytes or path
+        :return: PIL image, or None if there is no art
+        """
+        from PIL import Image
+
+        if art in ["", None]:
+            return None
+
+        if isinstance(art, (bytes, bytearray)):
+            key = hashlib.blake2b(art, digest_size=16).digest()
+        else:
+            key = art
+
+        image = self.art_cache.get(key)
+        if image is not None:
+            self.art_cache.move_to_end(key)
+            return image
+
+        image = Image.open(io.BytesIO(art) if isinstance(art, (bytes, bytearray)) else art).convert("RGBA")
+
+        # Scaled up or down to fit the art box, keeping the aspect ratio like the app's cards
+        ratio = min(self.px(ART_SIZE) / image.width, self.px(ART_SIZE) / image.height)
+        image = image.resize((max(1, round(image.width * ratio)), max(1, round(image.height * ratio))), Image.LANCZOS)
+
+        self.art_cache[key] = image
+        while len(self.art_cache) > self.art_cache_size:
+            self.art_cache.popitem(last=False)
+        return image
+
+    def wrap(self, text, width):
+        """ Splits text into lines that fit in the given width in output pixels """
+        lines, line = [], ""
+        for word in str(text).split():
+            candidate = f"{line} {word}".strip()
+            if line != "" and self.font.getlength(candidate) > width:
+                lines.append(line)
+                line = word
+            else:
+                line = candidate
+        return lines + [line] if line != "" else lines
+
+    def render(self, rows, art=None):
+        """
+        Renders a card from its rows
+        :param rows: list of (label, text, is effect) from card_rows
+        :param art: image bytes or path of the item art
+        :return: PIL image of the card
+        """
+        from PIL import Image, ImageDraw
+
+        art_image = self.get_art(art)
+        value_x = self.px(PADDING + LABEL_WIDTH)
+        value_width = self.px(CARD_WIDTH - PADDING) - value_x
+
+        # Lay out the rows first, as the card height depends on how many lines the effects wrap to
+        layout, height = [], self.px(PADDING + ART_SIZE + ROW_HEIGHT)
+        for label, text, is_effect in rows:
+            text = "" if text is None else str(text)
+            lines = self.wrap(text, value_width - self.px(8)) if is_effect else [text]
+            row_height = self.px(max(ROW_HEIGHT, (max(len(lines), 1) + 1) * LINE_HEIGHT + 4)) if is_effect else self.px(ROW_HEIGHT)
+            layout.append((label, lines, height, row_height))
+            height += row_height + self.px(4)
+        height += self.px(PADDING)
+
+        card = Image.new("RGB", (self.px(CARD_WIDTH), height), (236, 236, 236))
+        draw = ImageDraw.Draw(card)
+
+        # Art centered at the top of the card
+        if art_image is not None:
+            left = (card.width - art_image.width) // 2
+            top = self.px(PADDING) + (self.px(ART_SIZE) - art_image.height) // 2
+            card.paste(art_image, (left, top), art_image)
+
+        # Label and value box of every row
+        for label, lines, top, row_height in layout:
+            text_offset = (self.px(ROW_HEIGHT) - self.px(FONT_SIZE)) // 2
+            draw.text((self.px(PADDING), top + text_offset), label, fill=(0, 0, 0), font=self.font)
+            draw.rectangle([value_x, top, value_x + value_width, top + row_height - self.px(4)],
+                           fill=(255, 255, 255), outline=(170, 170, 170), width=max(1, self.px(1)))
+            for line_idx, line in enumerate(lines):
+                draw.text((value_x + self.px(4), top + text_offset + line_idx * self.px(LINE_HEIGHT)), line,
+                          fill=(0, 0, 0), font=self.font)
+        return card
+
+    def render_item(self, item):
+        """ Renders the card of an item object """
+        _, rows, art = make_job(item)
+        return self.render(rows, art)
+
+    def save(self, image, path):
+        """ Saves a rendered card as a PNG tagged with the renderer's DPI """
+        if os.path.dirname(path) != "":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        # A lower zlib level than Pillow's default, as it saves in about half the time for slightly larger files
+        image.save(path, dpi=(self.dpi, self.dpi), compress_level=3)
+
+
+def _render_chunk(dpi, jobs, output_dir):
+    """ Process pool entry point, rendering one chunk of jobs with its own renderer """
+    renderer = CardRenderer(dpi)
+
+    paths = []
+    for name, rows, art in jobs:
+        path = os.path.join(output_dir, f"{name}.png")
+        renderer.save(renderer.render(rows, art), path)
+        paths.append(path)
+    return paths
+
+
+def render_batch(jobs, output_dir, dpi=300, workers=None, chunk_size=64):
+    """
+    Renders many cards to PNGs in parallel
+    :param jobs: list of (name, rows, art) from make_job
+    :param output_dir: folder the PNGs are saved to
+    :param dpi: output resolution
+    :param workers: number of worker processes, 1 to render in this process
+    :param chunk_size: number of cards each worker renders per task
+    :return: list of the saved paths, in the order of the jobs
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    chunks = [jobs[idx:idx + chunk_size] for idx in range(0, len(jobs), chunk_size)]
+
+    if workers == 1:
+        results = [_render_chunk(dpi, chunk, output_dir) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_render_chunk, [dpi] * len(chunks), chunks, [output_dir] * len(chunks)))
+
+    return [path for paths in results for path in paths]
@@ -0,0 +1,227 @@
+"""
+@file EconomySimulator.py
+@author Ryan Missel
+
+Class that handles Monte Carlo simulation of the gold and loot flow of whole campaigns, so that house-rule drop rates
+can be tuned offline instead of over months of real play.
+
+Each session the party fights a Poisson number of enemies, each of which drops loot with the given drop rate. Drops
+are rolled on the Enemy Drop table (1d4 row, 1d6 column) and valued with the item cost tables:
+    - Gold drops are taken at face value.
+    - Named potions are valued by the potion with the same name and dice, Random Potions by a d100 potion roll.
+    - Grenade Mods, Shield Mods, and Random Guns use the tier of the party's Badass Rank, with guns rolling their
+      rarity on the gun rarity table.
+    - Relics are valued by their rarity, and grenade ammo refills carry no resale value.
+The chest tables under resources/chests/ are empty in this tree, so chest loot is not part of the simulation.
+
+Campaigns are split into chunks that run on a ProcessPoolExecutor, each with its own stream spawned from a single
+SeedSequence, so results are reproducible for a seed regardless of the number of workers.
+"""
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from classes.dice_engine import parse_dice
+from classes.resource_registry import get_table
+
+
+# Item kinds that drops are tallied under
+DROP_KINDS = ["gold", "potion", "grenade", "shield", "relic", "gun", "ammo"]
+
+
+def _simulate_chunk(simulator, seed_sequence, campaigns, sessions, enemies_per_session, drop_rate):
+    """ Process pool entry point, simulating one chunk of campaigns on its own random stream """
+    rng = np.random.default_rng(seed_sequence)
+    return simulator.simulate_campaigns(rng, campaigns, sessions, enemies_per_session, drop_rate)
+
+
+class EconomySimulator:
+    def __init__(self, base_dir, start_level=1, sessions_per_level=2):
+        """
+        Compiles the drop and cost tables into per-rank outcome arrays for the simulation
+        :param base_dir: system executable base directory
+        :param start_level: party level of the first session
+        :param sessions_per_level: number of sessions the party spends on each level
+        """
+        self.base_dir = base_dir
+        self.start_level = start_level
+        self.sessions_per_level = sessions_per_level
+
+        self.gun_costs = get_table(base_dir, "resources/guns/gun_cost.json")
+        self.grenade_costs = get_table(base_dir, "resources/misc/grenades/grenade_cost.json")
+        self.shield_costs = get_table(base_dir, "resources/misc/shields/shield_cost.json")
+        self.relic_costs = get_table(base_dir, "resources/misc/relics/relic_cost.json")
+
+        self.potions = get_table(base_dir, "resources/misc/potions/potion.json")
+        self.potion_costs = np.array([potion['cost'] for potion in self.potions.values()], dtype=float)
+
+        # Badass Rank per party level, from the level range keys of the rank table
+        self.level_ranks = np.zeros(31, dtype=int)
+        for key, rank in get_table(base_dir, "resources/badass_rank.json").items():
+            lower, upper = (int(key[:-1]), 30) if key.endswith('+') else [int(i) for i in key.split('-')]
+            self.level_ranks[lower:upper + 1] = rank
+        self.ranks = sorted(set(self.level_ranks[1:].tolist()))
+
+        # Outcome arrays per rank: probability, gold value, and kind index of every distinct drop outcome
+        self.outcomes = {rank: self.compile_outcomes(rank) for rank in self.ranks}
+
+    def compile_outcomes(self, rank):
+        """
+        Compiles the Enemy Drop table at a Badass Rank into a flat distribution over (value, kind) outcomes
+        :param rank: party Badass Rank
+        :return: tuple of probability, value, and kind index arrays
+        """
+        tier = str(min(rank, 5))
+        probs, values, kinds = [], [], []
+
+        drop_table = get_table(self.base_dir, "resources/enemy_drop.json")
+        cells = [cell for row in drop_table.values() for cell in row.values()]
+        for cell in cells:
+            for prob, value, kind in self.value_drop(cell, tier):
+                probs.append(prob / len(cells))
+                values.append(value)
+                kinds.append(DROP_KINDS.index(kind))
+
+        return np.array(probs), np.array(values, dtype=float), np.array(kinds, dtype=int)
+
+    def value_drop(self, drop, tier):
+        """
+        Values a single Enemy Drop table entry as a list of (probability, gold value, kind) outcomes
+        :param drop: table entry, e.g. "30g", "Health Potion (2d8+5)", "Random Potion (2)", "Random Gun"
+        :param tier: item tier given by the party's Badass Rank
+        :return: list of outcome tuples
+        """
+        count = re.search(r"\((\d+)\)$", drop)
+        count = int(count.group(1)) if count is not None else 1
+
+        if re.fullmatch(r"\d+g", drop):
+            return [(1.0, float(drop[:-1]), "gold")]
+
+        if drop.startswith("Random Potion"):
+            # Sum of count independent d100 potion rolls
+            values = self.potion_costs
+            for _ in range(count - 1):
+                values = np.add.outer(values, self.potion_costs).ravel()
+            return [(1.0 / len(values), float(value), "potion") for value in values]
+
+        if "Potion" in drop:
+            return [(1.0, self.named_potion_cost(drop), "potion")]
+
+        if drop == "Grenade Mod":
+            return [(1.0, float(self.grenade_costs[tier]), "grenade")]
+
+        if drop == "Shield Mod":
+            return [(1.0, float(self.shield_costs[tier]), "shield")]
+
+        if drop.endswith("Relic"):
+            rarity = drop.split(' ')[0].lower()
+            return [(1.0, float(self.relic_costs[rarity]), "relic")]
+
+        if drop == "Random Gun":
+            return [(prob, float(cost), "gun") for prob, cost in self.gun_rarity_costs(tier)]
+
+        # Grenade refills and anything else without a cost table
+        return [(1.0, 0.0, "ammo")]
+
+    def named_potion_cost(self, drop):
+        """ Cost of the potion with the same name and dice as the drop, i.e. "Health Potion (3d8+10)" """
+        name = drop.split('(')[0].strip()
+        dice = parse_dice(drop)
+
+        matches = [potion for potion in self.potions.values() if potion['name'].startswith(name)]
+        for potion in matches:
+            potion_dice = parse_dice(potion['info'] or "")
+            if dice is not None and potion_dice is not None and potion_dice.key == dice.key:
+                return float(potion['cost'])
+        return float(min(potion['cost'] for potion in matches))
+
+    def gun_rarity_costs(self, tier):
+        """ Cost distribution of a gun rolled on the rarity table row of the given tier, as in Gun """
+        rarity_table = get_table(self.base_dir, "resources/guns/rarity_table.json")
+
+        row = rarity_table[str(min(int(tier), len(rarity_table)))]
+        rarities = [rarity[0] if type(rarity) == list else rarity for rarity in row.values()]
+        return [(1.0 / len(rarities), self.gun_costs[rarity]) for rarity in rarities]
+
+    def session_ranks(self, sessions):
+        """ Badass Rank of the party for each session, as it levels up over the campaign """
+        levels = np.minimum(self.start_level + np.arange(sessions) // self.sessions_per_level, 30)
+        return self.level_ranks[levels]
+
+    def simulate_campaigns(self, rng, campaigns, sessions, enemies_per_session=8.0, drop_rate=0.5):
+        """
+        Simulates a batch of campaigns on a single random stream
+        :param rng: numpy Generator
+        :param campaigns: number of independent campaigns
+        :param sessions: number of sessions per campaign
+        :param enemies_per_session: mean number of enemies fought each session
+        :param drop_rate: probability that a defeated enemy drops loot
+        :return: dictionary of (campaign, session) gold and loot value, and (campaign, session, kind) item counts
+        """
+        gold = np.zeros((campaigns, sessions))
+        loot = np.zeros((campaigns, sessions))
+        counts = np.zeros((campaigns, sessions, len(DROP_KINDS)), dtype=int)
+
+        drops = rng.binomial(rng.poisson(enemies_per_session, size=(campaigns, sessions)), drop_rate)
+        for s, rank in enumerate(self.session_ranks(sessions)):
+            probs, values, kinds = self.outcomes[rank]
+            total = int(drops[:, s].sum())
+
+            # Draw every drop of this session across all campaigns at once, then scatter back to their campaign
+            picks = rng.choice(len(probs), size=total, p=probs)
+            owners = np.repeat(np.arange(campaigns), drops[:, s])
+            is_gold = kinds[picks] == DROP_KINDS.index("gold")
+
+            gold[:, s] = np.bincount(owners, weights=values[picks] * is_gold, minlength=campaigns)
+            loot[:, s] = np.bincount(owners, weights=values[picks] * ~is_gold, minlength=campaigns)
+            np.add.at(counts[:, s], (owners, kinds[picks]), 1)
+
+        return {"gold": gold, "loot": loot, "counts": counts}
+
+    def run(self, campaigns=10000, sessions=40, enemies_per_session=8.0, drop_rate=0.5, seed=None, workers=None,
+            chunks=None):
+        """
+        Runs many independent campaigns in parallel and aggregates them
+        :param campaigns: total number of campaigns
+        :param sessions: number of sessions per campaign
+        :param enemies_per_session: mean number of enemies fought each session
+        :param drop_rate: probability that a defeated enemy drops loot
+        :param seed: seed of the root SeedSequence, None for fresh entropy
+        :param workers: number of worker processes, 1 to run in this process
+        :param chunks: number of campaign chunks, each with its own spawned stream (defaults to 16)
+        :return: dictionary of the concatenated per-campaign arrays
+        """
+        chunks = min(chunks or 16, campaigns)
+        sizes = np.full(chunks, campaigns // chunks)
+        sizes[:campaigns % chunks] += 1
+        seeds = np.random.SeedSequence(seed).spawn(chunks)
+
+        args = [(self, seed_sequence, int(size), sessions, enemies_per_session, drop_rate)
+                for seed_sequence, size in zip(seeds, sizes)]
+        if workers == 1:
+            results = [_simulate_chunk(*arg) for arg in args]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(_simulate_chunk, *zip(*args)))
+
+        return {key: np.concatenate([result[key] for result in results]) for key in results[0]}
+
+    @staticmethod
+    def summarize(results, percentiles=(5, 25, 50, 75, 95)):
+        """
+        Aggregates simulated campaigns into percentiles of the cumulative gold and loot value per session
+        :param results: output of run()
+        :param percentiles: percentiles to compute
+        :return: dictionary of (percentile, session) arrays and the mean item counts per session by kind
+        """
+        cumulative_gold = np.cumsum(results['gold'], axis=1)
+        cumulative_loot = np.cumsum(results['loot'], axis=1)
+
+        return {
+            "percentiles": list(percentiles),
+            "gold": np.percentile(cumulative_gold, percentiles, axis=0),
+            "loot": np.percentile(cumulative_loot, percentiles, axis=0),
+            "wealth": np.percentile(cumulative_gold + cumulative_loot, percentiles, axis=0),
+            "counts": dict(zip(DROP_KINDS, results['counts'].mean(axis=(0, 1))))
+        }
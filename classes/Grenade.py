@@ -5,25 +5,24 @@
 Class that handles generating and holding the state of a Grenade.
 Takes in user-input on Grenade Type, Rarity, etc - if provided.
 """
-import shutil
 from random import choice, randint
 
-import requests
-from PIL import Image
-
-from classes.json_reader import get_file_data
+from classes.asset_cache import load_art
+from classes.resource_registry import get_table
+from classes.tracing import traced
 
 
 class Grenade:
+    @traced("Grenade.__init__")
     def __init__(self, base_dir, grenade_images,
                  name='', guild="Random", tier="Random",
                  grenade_type="", damage="", effect="", grenade_art=None):
         """ Handles generating a grenade, modified to specifics by user info """
         # Load in grenade data
-        grenade_data = get_file_data(base_dir + 'resources/misc/grenades/grenade.json')
-        grenade_cost = get_file_data(base_dir + 'resources/misc/grenades/grenade_cost.json')
-        grenade_guild = get_file_data(base_dir + 'resources/misc/grenades/grenade_guild.json')
-        grenade_names = get_file_data(base_dir + 'resources/misc/grenades/grenade_lexicon.json')
+        grenade_data = get_table(base_dir, 'resources/misc/grenades/grenade.json')
+        grenade_cost = get_table(base_dir, 'resources/misc/grenades/grenade_cost.json')
+        grenade_guild = get_table(base_dir, 'resources/misc/grenades/grenade_guild.json')
+        grenade_names = get_table(base_dir, 'resources/misc/grenades/grenade_lexicon.json')
 
         # Grab a grenade name if not given
         self.name = name if name != '' else grenade_names.get(choice(list(grenade_names.keys())))
@@ -63,22 +62,19 @@ class Grenade:
         # For Malefactor grenades that have the default effect, replace the damage type to a random element
         self.element = None
         if self.guild == "Malefactor" and effect == "":
-            elements = list(get_file_data('resources/elements/elemental_type.json').keys())
+            elements = list(get_table(base_dir, 'resources/elements/elemental_type.json').keys())
             self.element = choice(elements)
             self.effect = self.effect.replace("xx", self.element.title())
 
-        # Set file art path; sample if not given
-        self.grenade_art_path = base_dir + 'output/grenades/temporary_grenade_image.png'
+        # Set the art, kept in memory as its encoded bytes along with the file or URL it came from; sample if not
+        # given or if it cannot be read
+        self.grenade_art_path, self.grenade_art = None, None
         if grenade_art not in ["", None]:
             try:
-                try:
-                    # Test URL
-                    response = requests.get(grenade_art, stream=True)
-                    img = Image.open(response.raw)
-                    img.save(self.grenade_art_path)
-                except:
-                    shutil.copy(grenade_art, self.grenade_art_path)
-            except:
-                grenade_images.sample_grenade_image()
-        else:
-            grenade_images.sample_grenade_image()
+                self.grenade_art = load_art(grenade_art)
+                self.grenade_art_path = grenade_art
+            except Exception:
+                pass
+
+        if self.grenade_art is None:
+            self.grenade_art_path, self.grenade_art = grenade_images.sample_grenade_image()
@@ -4,11 +4,11 @@
 
 Handles filtering the scrapped game source dataset for specific properties for a given Grenade image
 """
-import json
 import random
-import requests
 
-from PIL import Image
+from classes.asset_cache import load_art
+from classes.resource_registry import get_table
+from classes.tracing import traced
 
 
 class GrenadeImage:
@@ -16,22 +16,21 @@ class GrenadeImage:
         self.basedir = basedir
 
         # List of individual JSONs
-        PREFIX = basedir + "resources/images/grenade_images/"
+        PREFIX = "resources/images/grenade_images/"
         FILELIST = [PREFIX + "bl2_grenades.json", PREFIX + "bl3_grenades.json", PREFIX + "bltps_grenades.json"]
 
         # Concatenating all JSONs into one block
         self.grenades_data = []
         for filename in FILELIST:
-            with open(filename, "r") as f:
-                data = json.load(f)
-                self.grenades_data.extend(data)
+            self.grenades_data.extend(get_table(basedir, filename))
 
+    @traced("GrenadeImage.sample_grenade_image")
     def sample_grenade_image(self):
-        """ Handles sampling and downloading a relevant grenade image from the games """
+        """
+        Handles sampling and downloading a relevant grenade image from the games
+        :return: (URL of the image, encoded image bytes)
+        """
         url = random.sample(self.grenades_data, 1)[0]['image_link']
 
-        # Get image and then save locally temporarily
-        response = requests.get(url, stream=True)
-        img = Image.open(response.raw)
-        img.save(self.basedir + 'output/grenades/temporary_grenade_image.png')
-        return url
+        # Kept in memory on the item rather than saved to a shared temporary file
+        return url, load_art(url)
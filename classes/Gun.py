@@ -8,10 +8,12 @@ Takes in user-input on gun type, gun guild, and item level - if provided.
 Unless a gun type is input, then the gun table is only rolled through Gun Table 1-6 on Pg. 81.
 """
 from random import randint
-from classes.json_reader import get_file_data
+from classes.resource_registry import get_table
+from classes.tracing import traced
 
 
 class Gun:
+    @traced("Gun.__init__")
     def __init__(self, base_dir, gun_images,
                  name=None, item_level=None, gun_type=None, gun_guild=None, gun_rarity=None,
                  damage_balance=False,
@@ -28,7 +30,7 @@ class Gun:
         self.name = name
         if name in ['random', None]:
             roll_name_len = randint(1, 2)
-            name_table = get_file_data(base_dir + 'resources/guns/lexicon.json')
+            name_table = get_table(base_dir, 'resources/guns/lexicon.json')
             number_names = len(name_table.keys()) - 1
             names = [name_table.get(str(randint(1, number_names))) + ' ' for _ in range(roll_name_len)]
             self.name = ''.join(names)
@@ -36,9 +38,9 @@ class Gun:
         # Get relevant portion of the gun table based on the roll
         if gun_type in ['random', None]:
             roll_type = str(randint(1, 6))
-            gun_table = get_file_data(base_dir + "resources/guns/gun_table.json").get(roll_type)
+            gun_table = get_table(base_dir, "resources/guns/gun_table.json").get(roll_type)
         else:
-            gun_table = get_file_data(base_dir + "resources/guns/gun_table.json").get(gun_type)
+            gun_table = get_table(base_dir, "resources/guns/gun_table.json").get(gun_type)
 
         # Get gun type
         self.type = gun_table.get("type")
@@ -50,11 +52,11 @@ class Gun:
         else:
             self.guild = gun_guild
 
-        self.guild_table = get_file_data(base_dir + "resources/guns/guild_table.json").get(self.guild)
+        self.guild_table = get_table(base_dir, "resources/guns/guild_table.json").get(self.guild)
         self.guild_element_roll = self.guild_table.get("element_roll")
 
         # Get gun stats table
-        self.stats = get_file_data(base_dir + f"resources/guns/{damage_balance}.json").get(self.type).get(self.item_level)
+        self.stats = get_table(base_dir, f"resources/guns/{damage_balance}.json").get(self.type).get(self.item_level)
         self.accuracy = self.stats['accuracy']
         self.range = self.stats['range']
         self.damage = self.stats['damage']
@@ -63,7 +65,7 @@ class Gun:
         if gun_rarity in ['random', None]:
             roll_row = str(randint(1, 4))
             roll_col = str(randint(1, 6))
-            self.rarity = get_file_data(base_dir + "resources/guns/rarity_table.json").get(str(roll_row)).get(roll_col)
+            self.rarity = get_table(base_dir, "resources/guns/rarity_table.json").get(str(roll_row)).get(roll_col)
         # If a rarity is specified, then roll for including an element
         else:
             self.rarity = gun_rarity
@@ -81,7 +83,7 @@ class Gun:
             self.rarity = self.rarity[0]
 
         # Add cost information
-        self.cost = get_file_data(base_dir + "resources/guns/gun_cost.json").get(self.rarity.lower())
+        self.cost = get_table(base_dir, "resources/guns/gun_cost.json").get(self.rarity.lower())
 
         # Get guild information
         self.guild_mod = self.guild_table.get("tiers").get(self.rarity)
@@ -99,8 +101,10 @@ class Gun:
             roll_element = str(randint(1, 100))
             roll_element = self.check_element_boost(roll_element, self.guild, self.rarity)
 
-            element_table = get_file_data(base_dir + "resources/elements/elemental_table.json")
-            self.element = element_table.get(self.get_element_tier(roll_element, element_table)).get(self.rarity)
+            element_table = get_table(base_dir, "resources/elements/elemental_table.json")
+            element = element_table.get(self.get_element_tier(roll_element, element_table)).get(self.rarity)
+            # Copied as the table is shared and the element list is edited in place below
+            self.element = list(element) if element is not None else None
 
         # If the gun is Malefactor guild and it does not have an element yet, keep rolling until an element is picked
         if self.guild == "malefactor" and self.element is None:
@@ -108,8 +112,10 @@ class Gun:
                 roll_element = str(randint(1, 100))
                 roll_element = self.check_element_boost(roll_element, self.guild, self.rarity)
 
-                element_table = get_file_data(base_dir + "resources/elements/elemental_table.json")
-                self.element = element_table.get(self.get_element_tier(roll_element, element_table)).get(self.rarity)
+                element_table = get_table(base_dir, "resources/elements/elemental_table.json")
+                element = element_table.get(self.get_element_tier(roll_element, element_table)).get(self.rarity)
+                # Copied as the table is shared and the element list is edited in place below
+                self.element = list(element) if element is not None else None
 
         # Check for passed in element, overwrites any rolled damage die
         if element_damage != "":
@@ -124,7 +130,7 @@ class Gun:
         # Get element info if it exists
         if self.element is not None:
             for element in self.element:
-                self.element_info.append(get_file_data(f"{base_dir}resources/elements/elemental_type.json").get(element))
+                self.element_info.append(get_table(base_dir, "resources/elements/elemental_type.json").get(element))
 
         # Prefix parsing, either Random or Selected
         self.prefix_name = None
@@ -135,7 +141,7 @@ class Gun:
             roll_prefix = prefix
 
         if prefix != "None":
-            prefix_table = get_file_data(base_dir + "resources/guns/prefix.json").get(roll_prefix)
+            prefix_table = get_table(base_dir, "resources/guns/prefix.json").get(roll_prefix)
             self.prefix_name = prefix_table['name']
             self.prefix_info = prefix_table['info']
             self.name = self.prefix_name + ' ' + self.name
@@ -160,7 +166,7 @@ class Gun:
             redtext = "None"
 
         if redtext != "None":
-            redtext_table = get_file_data(base_dir + "resources/guns/redtext.json")
+            redtext_table = get_table(base_dir, "resources/guns/redtext.json")
             redtext_item = redtext_table.get(self.get_redtext_tier(roll_redtext, redtext_table))
             self.redtext_name = redtext_item['name']
             self.redtext_info = redtext_item['info']
@@ -172,12 +178,12 @@ class Gun:
                 # If there is no element, just simply add the element
                 if self.element is None:
                     self.element = [element]
-                    self.element_info = [get_file_data(base_dir + "resources/elements/elemental_type.json").get(element)]
+                    self.element_info = [get_table(base_dir, "resources/elements/elemental_type.json").get(element)]
 
                 # Other check if element already is applied
                 elif self.redtext_info.split(' ')[1].lower() not in self.element:
                     self.element.append(element)
-                    self.element_info.append(get_file_data(base_dir + "resources/elements/elemental_type.json").get(element))
+                    self.element_info.append(get_table(base_dir, "resources/elements/elemental_type.json").get(element))
 
         # Check for combination elements
         self.element = self.convert_element(self.element)
@@ -194,7 +200,7 @@ class Gun:
         roll_level = randint(1, 30)
 
         tier = None
-        for key in get_file_data(base_dir + "resources/guns/gun_types.json").get("pistol").keys():
+        for key in get_table(base_dir, "resources/guns/gun_types.json").get("pistol").keys():
             lower, upper = [int(i) for i in key.split('-')]
             if lower <= roll_level <= upper:
                 tier = key
@@ -233,7 +239,7 @@ class Gun:
         :return: True if an element roll
         """
         elements, total = 0, 0
-        for key in get_file_data(base_dir + "resources/guns/rarity_table.json").values():
+        for key in get_table(base_dir, "resources/guns/rarity_table.json").values():
             for val in key.values():
                 # Check for non-element
                 if type(val) == str and val == rarity:
@@ -0,0 +1,252 @@
+"""
+@file GunAnalyzer.py
+@author Ryan Missel
+
+Class that handles computing the expected and exact damage per turn of guns, either for a single generated Gun or
+vectorized over the whole (balance x type x level x guild x rarity) space of the gun tables.
+
+Damage per turn is modelled as:
+    - One d20 accuracy roll per attack, shifted by the guild's ACC Mod. A natural 1, or a total of 1 or less, misses.
+      Otherwise the total picks the 2-7 / 8-15 / 16+ band of the gun's accuracy table.
+    - Every Hit deals the damage die plus the element bonus die plus the guild's DMG Mod.
+    - Every Crit deals the same, but rolls the damage die crit_dice times and adds the guild's Crit Damage.
+    - Guild "+N Hit" adds hits to every band that lands, and "Extra Attack" doubles the attacks taken per turn.
+Guild effects outside of the attack (Overheat, Splash, grenade damage on reload) are not modelled.
+"""
+import re
+
+import numpy as np
+
+from classes.dice_engine import DiceExpression, DiceDistribution, parse_dice, expected_value, \
+    get_expression_distribution, mixture
+from classes.resource_registry import get_table
+
+
+class GunAnalyzer:
+    def __init__(self, base_dir, balances=("gun_types", "gun_types_mccoby", "gun_types_robmwj"), crit_dice=2):
+        """
+        Compiles the gun tables into NumPy arrays for the vectorized analysis
+        :param base_dir: system executable base directory
+        :param balances: names of the damage balance JSONs under resources/guns/ to compile
+        :param crit_dice: number of times the damage die is rolled on a Crit
+        """
+        self.base_dir = base_dir
+        self.balances = list(balances)
+        self.crit_dice = crit_dice
+
+        # Accuracy bands in the order they are stored in the compiled tables
+        self.bands = ["2-7", "8-15", "16+"]
+
+        # Pattern for the numeric guild modifiers, e.g. "+2 ACC Mod", "-2 DMG Mod", "+1 Hit", "+3 Crit Damage"
+        self.guild_mod_pattern = re.compile(r"([+-]\d+)\s+(ACC Mod|DMG Mod|Hit|Crit Damage)", re.IGNORECASE)
+
+        # Axes of the gun space
+        source_table = get_table(base_dir, f"resources/guns/{self.balances[0]}.json")
+        self.types = list(source_table.keys())
+        self.levels = list(source_table[self.types[0]].keys())
+        self.guilds = list(get_table(base_dir, "resources/guns/guild_table.json").keys())
+        self.rarities = ["common", "uncommon", "rare", "epic", "legendary"]
+
+        self.compile_stat_tables()
+        self.compile_guild_tables()
+
+    def compile_stat_tables(self):
+        """ Compiles the hits, crits, and expected damage of every balance x type x level into arrays """
+        shape = (len(self.balances), len(self.types), len(self.levels))
+        self.hits = np.zeros(shape + (len(self.bands),))
+        self.crits = np.zeros(shape + (len(self.bands),))
+        self.damage_mean = np.zeros(shape)
+        self.damage = np.empty(shape, dtype=object)
+
+        for b, balance in enumerate(self.balances):
+            table = get_table(self.base_dir, f"resources/guns/{balance}.json")
+            for t, gun_type in enumerate(self.types):
+                for l, level in enumerate(self.levels):
+                    stats = table[gun_type][level]
+                    for a, band in enumerate(self.bands):
+                        self.hits[b, t, l, a] = stats['accuracy'][band]['hits']
+                        self.crits[b, t, l, a] = stats['accuracy'][band]['crits']
+
+                    self.damage[b, t, l] = stats['damage']
+                    self.damage_mean[b, t, l] = expected_value(stats['damage'])
+
+        # Guilds that can actually roll for each type on the gun table
+        gun_table = get_table(self.base_dir, "resources/guns/gun_table.json")
+        self.valid = np.zeros((len(self.types), len(self.guilds)), dtype=bool)
+        for entry in gun_table.values():
+            if entry['type'] in self.types:
+                for guild in entry['guild'].values():
+                    self.valid[self.types.index(entry['type']), self.guilds.index(guild)] = True
+
+    def compile_guild_tables(self):
+        """ Compiles the parsed guild modifiers and expected element bonus of every guild x rarity into arrays """
+        shape = (len(self.guilds), len(self.rarities))
+        self.acc_mod = np.zeros(shape)
+        self.hit_bonus = np.zeros(shape)
+        self.dmg_mod = np.zeros(shape)
+        self.crit_damage = np.zeros(shape)
+        self.attacks = np.ones(shape)
+        self.element_bonus_mean = np.zeros(shape)
+
+        guild_table = get_table(self.base_dir, "resources/guns/guild_table.json")
+        for g, guild in enumerate(self.guilds):
+            for r, rarity in enumerate(self.rarities):
+                mods = self.parse_guild_mod(guild_table[guild]['tiers'][rarity])
+                self.acc_mod[g, r] = mods['acc_mod']
+                self.hit_bonus[g, r] = mods['hit_bonus']
+                self.dmg_mod[g, r] = mods['dmg_mod']
+                self.crit_damage[g, r] = mods['crit_damage']
+                self.attacks[g, r] = mods['attacks']
+                self.element_bonus_mean[g, r] = self.expected_element_bonus(guild, rarity)
+
+        # Band probabilities for each guild x rarity, given its ACC Mod
+        self.band_probs = self.band_probabilities(self.acc_mod)
+
+    def parse_guild_mod(self, guild_mod):
+        """
+        Parses the numeric parts of a guild modifier string that affect the damage per turn
+        :param guild_mod: guild tier string, e.g. "+1 Hit, +2 ACC Mod."
+        :return: dictionary of acc_mod, hit_bonus, dmg_mod, crit_damage, and attacks
+        """
+        mods = {"acc_mod": 0, "hit_bonus": 0, "dmg_mod": 0, "crit_damage": 0, "attacks": 1}
+        keys = {"acc mod": "acc_mod", "hit": "hit_bonus", "dmg mod": "dmg_mod", "crit damage": "crit_damage"}
+
+        for value, name in self.guild_mod_pattern.findall(guild_mod or ""):
+            mods[keys[name.lower()]] += int(value)
+
+        if guild_mod is not None and "extra attack" in guild_mod.lower():
+            mods["attacks"] = 2
+        return mods
+
+    def band_probabilities(self, acc_mod):
+        """
+        Probability of the accuracy roll landing in each band for the given ACC Mod(s)
+        :param acc_mod: scalar or array of accuracy modifiers
+        :return: array of shape acc_mod.shape + (3,) for the 2-7 / 8-15 / 16+ bands
+        """
+        acc_mod = np.asarray(acc_mod, dtype=float)
+
+        # Natural 1 always misses, every other face is shifted by the modifier
+        totals = np.arange(2, 21) + acc_mod[..., None]
+        probs = np.stack([
+            ((totals >= 2) & (totals <= 7)).sum(-1),
+            ((totals >= 8) & (totals <= 15)).sum(-1),
+            (totals >= 16).sum(-1)
+        ], axis=-1)
+        return probs / 20.0
+
+    def element_roll_odds(self, rarity):
+        """ Odds that a gun of a specified rarity gets an element roll, as in Gun.check_element_odds """
+        elements, total = 0, 0
+        for row in get_table(self.base_dir, "resources/guns/rarity_table.json").values():
+            for val in row.values():
+                if type(val) == str and val == rarity:
+                    total += 1
+                elif type(val) == list and val[0] == rarity:
+                    elements += 1
+                    total += 1
+        return elements / total if total > 0 else 0.0
+
+    def expected_element_bonus(self, guild, rarity):
+        """
+        Expected element bonus damage per hit for a guild and rarity, over the element table roll
+        :param guild: guild name
+        :param rarity: rarity name
+        :return: expected bonus damage
+        """
+        guild_info = get_table(self.base_dir, "resources/guns/guild_table.json")[guild]
+        if guild_info['element_roll'] is not True:
+            return 0.0
+
+        # Malefactor rolls get boosted at higher rarities, as in Gun.check_element_boost
+        boost = {"rare": 0.10, "epic": 0.15, "legendary": 0.20}.get(rarity, 0.0) if guild == "malefactor" else 0.0
+
+        element_table = get_table(self.base_dir, "resources/elements/elemental_table.json")
+        bonuses, has_element = [], []
+        for roll in range(1, 101):
+            roll = min(roll + int(roll * boost), 100)
+            for key, tier in element_table.items():
+                lower, upper = [int(i) for i in key.split('-')]
+                if lower <= roll <= upper:
+                    entry = tier.get(rarity)
+                    has_element.append(entry is not None)
+                    bonuses.append(sum(expected_value(element) for element in entry) if entry is not None else 0.0)
+
+        bonuses, has_element = np.array(bonuses), np.array(has_element)
+
+        # Malefactor keeps rolling until it gets an element, so condition on having one
+        if guild == "malefactor":
+            return float(bonuses[has_element].mean()) if has_element.any() else 0.0
+        return self.element_roll_odds(rarity) * float(bonuses.mean())
+
+    def expected_grid(self):
+        """
+        Expected damage per turn over the whole gun space, computed in one vectorized pass
+        :return: array of shape (balance, type, level, guild, rarity), NaN where the guild cannot roll the type
+        """
+        # Stat tables broadcast to (B, T, L, 1, 1, bands) and guild tables to (1, 1, 1, G, R[, bands])
+        hits = self.hits[:, :, :, None, None, :] + self.hit_bonus[None, None, None, :, :, None]
+        crits = self.crits[:, :, :, None, None, :]
+        damage = self.damage_mean[:, :, :, None, None]
+
+        per_hit = damage + self.element_bonus_mean + self.dmg_mod
+        per_crit = self.crit_dice * damage + self.element_bonus_mean + self.dmg_mod + self.crit_damage
+
+        per_band = hits * per_hit[..., None] + crits * per_crit[..., None]
+        grid = self.attacks * (per_band * self.band_probs).sum(-1)
+
+        # Mask out the guild and type combinations the gun table cannot produce
+        return np.where(self.valid[None, :, None, :, None], grid, np.nan)
+
+    def analyze_gun(self, gun):
+        """
+        Computes the exact damage per turn distribution of a generated Gun, using its actual damage and element dice
+        :param gun: Gun object
+        :return: dictionary of the expected damage, distribution, band probabilities, and per-band expectations
+        """
+        mods = self.parse_guild_mod(gun.guild_mod)
+        band_probs = self.band_probabilities(mods['acc_mod'])
+        miss_prob = 1.0 - band_probs.sum()
+
+        # Single hit and crit expressions, e.g. "2d8+1d6+3" and "4d8+1d6+3"
+        damage = parse_dice(gun.damage)
+        bonus = parse_dice(gun.element_bonus) or DiceExpression((), 0)
+        hit_expression = damage + bonus + DiceExpression((), mods['dmg_mod'])
+        crit_expression = damage.scaled(self.crit_dice) + bonus + \
+            DiceExpression((), mods['dmg_mod'] + mods['crit_damage'])
+
+        distributions, weights, band_means = [], [], {}
+        for band, prob in zip(self.bands, band_probs):
+            hits = gun.accuracy[band]['hits'] + mods['hit_bonus']
+            crits = gun.accuracy[band]['crits']
+
+            # Each attack in this band sums its hits and crits
+            band_expression = hit_expression.scaled(hits) + crit_expression.scaled(crits)
+            distribution = get_expression_distribution(band_expression)
+            distributions.append(distribution)
+            weights.append(prob)
+            band_means[band] = distribution.mean
+
+        # A miss deals no damage
+        distributions.append(DiceDistribution(0, np.ones(1)))
+        weights.append(miss_prob)
+        per_attack = mixture(distributions, weights)
+
+        # Extra attacks convolve the per-attack distribution with itself
+        distribution = per_attack
+        for _ in range(mods['attacks'] - 1):
+            distribution = self.sum_distributions(distribution, per_attack)
+
+        return {
+            "expected": distribution.mean,
+            "distribution": distribution,
+            "band_probabilities": dict(zip(self.bands, band_probs)),
+            "miss_probability": miss_prob,
+            "band_expected": band_means,
+            "attacks": mods['attacks']
+        }
+
+    @staticmethod
+    def sum_distributions(a, b):
+        """ Distribution of the sum of two independent distributions """
+        return DiceDistribution(a.minimum + b.minimum, np.convolve(a.pmf, b.pmf))
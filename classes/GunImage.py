@@ -4,21 +4,25 @@
 
 Handles filtering the scrapped game source dataset for specific properties, i.e. Hyperion manufacturer
 """
-import json
 import random
-import shutil
-import requests
-import numpy as np
+import threading
 
-from PIL import Image
+from functools import cached_property
+
+from classes.asset_cache import GUN_ART_BOX, PRINT_DPI, download_art, load_art
+from classes.resource_registry import get_table
+from classes.tracing import traced
 
 
 class GunImage:
-    def __init__(self, prefix):
+    def __init__(self, prefix, art_dpi=PRINT_DPI):
         self.prefix = prefix
 
+        # Resolution the downloaded gun art is fitted to the card's art box at
+        self.art_dpi = art_dpi
+
         # List of individual JSONs
-        PREFIX = prefix + "resources/images/gun_images/"
+        PREFIX = "resources/images/gun_images/"
         FILELIST = [PREFIX + "bl1_guns.json", PREFIX + "bl2_guns.json",
                     PREFIX + "bl3_guns.json", PREFIX + "bltps_guns.json",
                     PREFIX + "blwl_guns.json"]
@@ -58,22 +62,42 @@ class GunImage:
             "legendary": [255, 180, 0, 255]
         }
 
-        # Concatenating all JSONs into one block
-        self.guns_data = []
-        for filename in FILELIST:
-            with open(filename, "r") as f:
-                data = json.load(f)
-                self.guns_data.extend(data)
-
-        # Get statistics on types for conversions
-        types = []
-        manus = []
-        for entry in self.guns_data:
-            types.append(entry['type'])
-            manus.append(entry['manufacturer'])
-
-        self.types = np.unique(types)
-        self.manus = np.unique(manus)
+        # Concatenating all JSONs into one block, loaded in the background so constructing this class is immediate
+        self._guns_data = None
+        self._load_error = None
+        self._loader = threading.Thread(target=self.load_guns_data, args=(FILELIST,), daemon=True)
+        self._loader.start()
+
+    def load_guns_data(self, filelist):
+        """ Handles reading and concatenating the gun manifests, run on the background loader thread """
+        try:
+            guns_data = []
+            for filename in filelist:
+                guns_data.extend(get_table(self.prefix, filename))
+            self._guns_data = guns_data
+        except Exception as e:
+            self._load_error = e
+
+    @property
+    def guns_data(self):
+        """ Concatenated gun manifests, waiting on the background loader if it has not finished yet """
+        if self._guns_data is None:
+            self._loader.join()
+            if self._load_error is not None:
+                raise self._load_error
+        return self._guns_data
+
+    @cached_property
+    def types(self):
+        """ Unique gun types across the manifests, only computed if asked for """
+        import numpy as np
+        return np.unique([entry['type'] for entry in self.guns_data])
+
+    @cached_property
+    def manus(self):
+        """ Unique manufacturers across the manifests, only computed if asked for """
+        import numpy as np
+        return np.unique([entry['manufacturer'] for entry in self.guns_data])
 
     def filter_guns_data(self, guns_data=None, gun_type=None, manufacturer=None, name=None):
         """
@@ -107,11 +131,12 @@ class GunImage:
         
         return guns_data
 
-    def sample_gun_image(self, gun_type=None, manufacturer=None):
+    def sample_gun_url(self, gun_type=None, manufacturer=None):
         """
-        Handles sampling and downloading a relevant gun image from the games for gun card display use
+        Handles sampling a relevant gun image from the games for gun card display use, without downloading it
         :param gun_type: type to filter on
         :param manufacturer: manu/guild
+        :return: URL of the image, or None for custom gun types that have no images
         """
         # Error catch if empty
         if gun_type is None and manufacturer is None:
@@ -123,11 +148,9 @@ class GunImage:
         # Convert gun type
         gun_type = self.type_conversion(gun_type)
 
-        # For custom gun types, add a check to use a placeholder image
+        # Custom gun types have no images to sample
         if gun_type is None:
-            shutil.copy(f"{self.prefix}resources/images/gun_icons/PLACEHOLDER.png",
-                        self.prefix + 'output/guns/temporary_gun_image.png')
-            return
+            return None
 
         # For each given gun type, get its filtered data and concatenate
         temp_data = []
@@ -156,14 +179,24 @@ class GunImage:
                 gun_data.extend(temp)
 
         # Get a sample and its url link
-        url = random.sample(gun_data, 1)[0]['image_link']
+        return random.sample(gun_data, 1)[0]['image_link']
 
-        # Get image and then save locally temporarily
-        response = requests.get(url, stream=True)
-        img = Image.open(response.raw)
-        img.save(self.prefix + 'output/guns/temporary_gun_image.png')
+    @traced("GunImage.sample_gun_image")
+    def sample_gun_image(self, gun_type=None, manufacturer=None):
+        """
+        Handles sampling and downloading a relevant gun image from the games for gun card display use
+        :param gun_type: type to filter on
+        :param manufacturer: manu/guild
+        :return: URL of the image, or None for custom gun types, whose cards use the placeholder image
+        """
+        url = self.sample_gun_url(gun_type, manufacturer)
+
+        # Get image fitted to the card's art box, kept in memory by the asset cache for when the card is made
+        if url is not None:
+            download_art(self.prefix, url, *GUN_ART_BOX, dpi=self.art_dpi)
         return url
 
+    @traced("GunImage.sample_melee_image")
     def sample_melee_image(self, manufacturer=None):
         """
         Handles sampling and downloading a relevant gun image from the games for gun card display use
@@ -184,9 +217,8 @@ class GunImage:
         url = random.sample(melee_data, 1)[0]['image_link']
 
         # Get image and then save locally temporarily
-        response = requests.get(url, stream=True)
-        img = Image.open(response.raw)
-        img.save(self.prefix + 'output/melees/temporary_melee_image.png')
+        with open(self.prefix + 'output/melees/temporary_melee_image.png', 'wb') as f:
+            f.write(load_art(url))
         return url
 
     def manu_conversion(self, guild_name):
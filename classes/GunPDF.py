@@ -3,18 +3,18 @@
 @author Ryan Missel
 
 Class to generate the PDF of the BnB Card Design for a given Gun.
+The PDF and image libraries are imported by the methods that use them, so importing this class stays cheap.
 """
 import os
-import fitz
-import pdfrw
-import requests
-import pikepdf
+import time
+from collections import OrderedDict
 
-from PIL import Image
+from classes.asset_cache import PRINT_DPI, download_art, get_asset, load_sources, preload_assets, resolve_source
+from classes.tracing import span, traced
 
 
 class GunPDF:
-    def __init__(self, base_dir, statusbar, gun_images):
+    def __init__(self, base_dir, statusbar, gun_images, art_dpi=PRINT_DPI, output_profile="small"):
         # Base executable directory
         self.base_dir = base_dir
         self.statusbar = statusbar
@@ -22,6 +22,36 @@ class GunPDF:
         # Image Class
         self.gun_images = gun_images
 
+        # Resolution the splash and icon overlays, and the gun art, are resampled to
+        self.asset_dpi = PRINT_DPI
+        self.art_dpi = art_dpi
+
+        # Output profiles the filled cards are saved with, the one used when none is given, and the number, total
+        # size in bytes, and total milliseconds of the cards saved with each
+        #   fast  - the card as filled, without flattening or the extra pikepdf open and save, for very large runs
+        #   small - objects packed into compressed object streams, every stream compressed, and duplicate images merged
+        #   print - linearized, with each image kept as its own object exactly as inserted
+        # Every profile has the same images, the overlays and art having been resampled to their box at the asset and
+        # art DPI (300 by default) before being inserted
+        self.output_profiles = {
+            "fast": {"pikepdf": False},
+            "small": {"pikepdf": True, "object_streams": True, "merge_images": True, "linearize": False},
+            "print": {"pikepdf": True, "object_streams": False, "merge_images": False, "linearize": True}
+        }
+        self.output_profile = output_profile
+        self.output_stats = {name: {"count": 0, "bytes": 0, "ms": 0.0} for name in self.output_profiles}
+
+        # Whether the overlay files have been read into the asset pool yet
+        self.sources_loaded = False
+
+        # Last warning shown while building a card, cleared by the caller before each card it wants to check
+        self.warning = None
+
+        # Templates of the card designs, and the bases built on them keyed by their visual layers, most recent last
+        self.templates = {"single": "GunTemplate.pdf", "split": "GunTemplateSplitSmall.pdf"}
+        self.card_bases = OrderedDict()
+        self.card_base_cache_size = 64
+
         # KEY Names for PDF
         self.ANNOT_KEY = '/Annots'
         self.ANNOT_FIELD_KEY = '/T'
@@ -60,6 +90,12 @@ class GunPDF:
             "EffectBox": ('/Helvetica-Bold 13.00 Tf 0 g', 1)
         }
 
+        # Inset of the text from the edges of its field, the size auto-sized multi-line fields start from, and the
+        # smallest size text is shrunk to when fitting it in its field, in points
+        self.field_padding = 2
+        self.auto_font_size = 12
+        self.min_font_size = 6
+
         # File paths for the gun color backgrounds
         self.gun_colors_paths = {
             "legendary": "legendary_background.png",
@@ -115,15 +151,53 @@ class GunPDF:
             "shock": "Shock.png"
         }
 
+        # Sizes of the boxes in points each overlay folder is placed in across both designs, used to preload them
+        self.overlay_boxes = {
+            "rarity_images": [(400, 250)],
+            "gun_icons": [(200, 30), (100, 30)],
+            "guild_icons": [(180, 30), (100, 30)],
+            "die_icons": [(40, 50)],
+            "element_icons": [(50, 30)]
+        }
+
+    def load_sources(self):
+        """
+        Handles reading the overlay files into the asset pool, i.e. on a background thread at startup, so the first
+        card does not wait on the disk. Only the files are read, as the encoding uses PyMuPDF on the card's thread.
+        """
+        load_sources(self.base_dir)
+        self.sources_loaded = True
+
+    def preload_assets(self):
+        """
+        Handles encoding every overlay for the boxes it is placed in ahead of time, i.e. before starting worker
+        processes, so that no card has to read or resample one. Runs on the thread that builds the cards.
+        """
+        with span("GunPDF.preload_assets"):
+            preload_assets(self.base_dir, self.overlay_boxes, self.asset_dpi)
+        self.sources_loaded = True
+
+    @traced("GunPDF.fill_pdf")
     def fill_pdf(self, input_pdf_path, output_pdf_path, data_dict, form_check):
         """
         Handles filling in the form fields of a given gun card PDF template with information
-        from the generated gun
-        :param input_pdf_path: path to the template PDF
-        :param output_pdf_path: filename to save the PDF as
+        from the generated gun. Each filled field gets its appearance stream drawn here, so the card shows the same
+        in every viewer and printer without them having to generate one.
+        :param input_pdf_path: path to the template PDF, or the bytes of one
+        :param output_pdf_path: filename to save the PDF as, or None to only return it
         :param data_dict: given dictionary mapping form field names to input
+        :return: bytes of the filled PDF
         """
-        template_pdf = pdfrw.PdfReader(input_pdf_path)
+        import io
+        import pdfrw
+
+        if isinstance(input_pdf_path, bytes):
+            template_pdf = pdfrw.PdfReader(fdata=input_pdf_path)
+        else:
+            template_pdf = pdfrw.PdfReader(input_pdf_path)
+
+        # Font resources and appearance streams are shared between the fields that use the same ones
+        fonts, streams = {}, {}
         for page in template_pdf.pages:
             annotations = page[self.ANNOT_KEY]
             for annotation in annotations:
@@ -160,80 +234,387 @@ class GunPDF:
                                     annotation[self.PARENT_KEY].update(pdfrw.PdfDict(Ff=1))
                                     annotation.update(pdfrw.PdfDict(Ff=1))
 
-                                # Update the AP of this annotation to nothing
-                                annotation[self.PARENT_KEY].update(pdfrw.PdfDict(AP=''))
+                                # Mark multi-line values as such, so viewers keep wrapping them if the field is edited
+                                if '\n' in '{}'.format(data_dict[key]):
+                                    flags = int(annotation[self.PARENT_KEY].Ff or 0) | 4096
+                                    annotation[self.PARENT_KEY].update(pdfrw.PdfDict(Ff=flags))
+
+                                # Draw the appearance of the filled in value
+                                appearance = self.get_appearance(annotation[self.ANNOT_RECT_KEY], display_string,
+                                                                 q_value, '{}'.format(data_dict[key]), fonts, streams)
+                                annotation.update(pdfrw.PdfDict(AP=pdfrw.PdfDict(N=appearance)))
+
+        # Fonts of the appearances are added to the form's resources for the fields' DA strings to refer to, and
+        # viewers are left to use the appearances rather than regenerate them
+        acroform = template_pdf.Root.AcroForm
+        if acroform.DR is None:
+            acroform.DR = pdfrw.PdfDict()
+        if acroform.DR.Font is None:
+            acroform.DR.Font = pdfrw.PdfDict()
+        for font_name, font in fonts.items():
+            acroform.DR.Font[pdfrw.PdfName(font_name)] = font
+        acroform.NeedAppearances = None
+
+        stream = io.BytesIO()
+        pdfrw.PdfWriter().write(stream, template_pdf)
+        return self.write_pdf(output_pdf_path, stream.getvalue())
+
+    def get_appearance(self, rect, display_string, q_value, value, fonts, streams):
+        """
+        Draws the appearance stream of a filled text field, with the font, size, and color of its DA string. Text
+        is shrunk to fit its field, down to the minimum size, and values with newlines are laid out as multi-line
+        text from the top of the field.
+        :param rect: annotation rectangle of the field
+        :param display_string: DA string of the field, i.e. '/Helvetica-Bold 17 Tf 0 g'
+        :param q_value: alignment of the text, 0 for left, 1 for centered, and 2 for right
+        :param value: text of the field
+        :param fonts: dictionary of the font resources made so far, resource name -> font dictionary
+        :param streams: dictionary of the appearances drawn so far, kept to share identical ones
+        :return: Form XObject of the appearance
+        """
+        import pdfrw
+        from classes.font_metrics import encode_text, get_font_name, get_line_height, get_text_width, ASCENT, DESCENT
+        from classes.text_layout import fit_line, fit_text, LINE_SPACING
+
+        x0, y0, x1, y1 = [float(coordinate) for coordinate in rect]
+        width, height = abs(x1 - x0), abs(y1 - y0)
+
+        key = (width, height, display_string, q_value, value)
+        if key in streams:
+            return streams[key]
+
+        # Split the DA string into its font, size, and color, with color components given out of 255 clamped to 1
+        tokens = display_string.split()
+        tf_idx = tokens.index('Tf')
+        font_name, font_size = tokens[tf_idx - 2].lstrip('/'), float(tokens[tf_idx - 1])
+        color_tokens = tokens[tf_idx + 1:]
+        color = ' '.join(f"{min(float(token), 1):g}" for token in color_tokens[:-1]) + f" {color_tokens[-1]}"
+
+        inner_width, inner_height = width - 2 * self.field_padding, height - 2 * self.field_padding
+        if '\n' in value:
+            # Multi-line text starts at its given size, or the auto size, and shrinks until every line fits
+            size, lines = fit_text(value, font_name, font_size if font_size > 0 else self.auto_font_size,
+                                   inner_width, inner_height, self.min_font_size)
+            top = height - self.field_padding - size * ASCENT / 1000
+        else:
+            # Single lines are sized to the field's height when auto-sized, and shrunk to fit its width
+            size = fit_line(value, font_name, font_size, inner_width, inner_height, self.min_font_size)
+            lines = [value]
+            top = (height - get_line_height(size)) / 2 - size * DESCENT / 1000
+
+        # Every line is positioned on its own, as centered and right-aligned lines each start at a different offset
+        commands = []
+        for idx, line in enumerate(lines):
+            line = line.strip()
+            if line == "":
+                continue
+
+            line_width = get_text_width(line, font_name, size)
+            if q_value == 1:
+                x = (width - line_width) / 2
+            elif q_value == 2:
+                x = width - self.field_padding - line_width
+            else:
+                x = self.field_padding
+
+            text = encode_text(line).replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)')
+            commands.append(f"1 0 0 1 {x:.2f} {top - idx * size * LINE_SPACING:.2f} Tm ({text.decode('latin-1')}) Tj")
+
+        # Each font is added once per card as a standard font in WinAnsi
+        if font_name not in fonts:
+            font = pdfrw.PdfDict(Type=pdfrw.PdfName('Font'), Subtype=pdfrw.PdfName('Type1'),
+                                 BaseFont=pdfrw.PdfName(get_font_name(font_name)),
+                                 Encoding=pdfrw.PdfName('WinAnsiEncoding'))
+            font.indirect = True
+            fonts[font_name] = font
+
+        appearance = pdfrw.PdfDict(
+            Type=pdfrw.PdfName('XObject'),
+            Subtype=pdfrw.PdfName('Form'),
+            BBox=pdfrw.PdfArray([0, 0, round(width, 2), round(height, 2)]),
+            Resources=pdfrw.PdfDict(Font=pdfrw.PdfDict({pdfrw.PdfName(font_name): fonts[font_name]}))
+        )
+        appearance.indirect = True
+        appearance.stream = '\n'.join(
+            ["/Tx BMC", "q", f"{self.field_padding / 2:g} {self.field_padding / 2:g} {width - self.field_padding:.2f} "
+             f"{height - self.field_padding:.2f} re W n", "BT", f"/{font_name} {size:.2f} Tf {color}"] +
+            commands + ["ET", "Q", "EMC"]
+        )
+
+        streams[key] = appearance
+        return appearance
+
+    def show_warning(self, message):
+        """ Shows a warning from building a card in the statusbar and keeps it as the last warning raised """
+        self.warning = message
+        self.statusbar.clearMessage()
+        self.statusbar.showMessage(message, 5000)
+
+    def read_pdf(self, pdf):
+        """ Bytes of a PDF given either as a path or as its bytes already """
+        if isinstance(pdf, bytes):
+            return pdf
 
-        # Force form appearance to show and output PDF
-        template_pdf.Root.AcroForm.update(pdfrw.PdfDict(NeedAppearances=pdfrw.PdfObject('true')))  # NEW
-        pdfrw.PdfWriter().write(output_pdf_path, template_pdf)
+        with open(pdf, 'rb') as f:
+            return f.read()
+
+    def write_pdf(self, pdf_path, data):
+        """
+        Saves the bytes of a PDF to the given path, if there is one, and passes them on
+        :param pdf_path: path to save to, or None (or the bytes of the PDF in place of a path) to save nothing
+        :param data: bytes of the PDF
+        :return: the bytes of the PDF
+        """
+        if isinstance(pdf_path, str):
+            with open(pdf_path, 'wb') as f:
+                f.write(data)
+        return data
 
-    def add_image_to_pdf(self, pdf_path, image, position):
+    def add_image_to_pdf(self, pdf, image, position):
         """
         Handles adding an image to a Pdf through the library PyMuPDF. Essentially layers two pages (page and image as a page)
         onto each other before compressing to one page
-        :param pdf_path: filled out template
-        :param image: image path to use
+        :param pdf: filled out template, as a path it is saved back to or as the bytes of it
+        :param image: image path to use, or the encoded image bytes
         :param position: where in the template to place the image
+        :return: bytes of the PDF with the image
         """
-        file_handle = fitz.open(pdf_path)
+        import fitz
 
-        page = file_handle[int(position['page']) - 1]
-        page.insert_image(
-            fitz.Rect(position['x0'], position['y0'],
-            position['x1'], position['y1']),
-            filename=image
-        )
+        # Encoded bytes are inserted as they are, rather than read from a file
+        if isinstance(image, bytes):
+            source, image_name = {'stream': image}, "stream"
+        else:
+            source, image_name = {'filename': image}, os.path.basename(image)
 
-        temp_path = f'{self.base_dir}output/guns/temp.pdf'
+        with span("GunPDF.add_image_to_pdf", image=image_name):
+            file_handle = fitz.open(stream=self.read_pdf(pdf), filetype="pdf")
 
-        # Save output path as same name
-        file_handle.save(temp_path)
-        file_handle.close()
+            page = file_handle[int(position['page']) - 1]
+            page.insert_image(
+                fitz.Rect(position['x0'], position['y0'],
+                position['x1'], position['y1']),
+                **source
+            )
 
-        # Clean up old pdf_path
-        os.remove(pdf_path)
-        os.rename(temp_path, pdf_path)
+            data = file_handle.tobytes()
+            file_handle.close()
+            return self.write_pdf(pdf, data)
 
-    def generate_gun_pdf(self, output_name, gun, rarity_border, form_check, redtext_check):
+    def insert_asset(self, document, image, position):
         """
-        Handles generating a Gun Card PDF filled out with the information from the generated gun
-        :param output_name: name of the output PDF to save
+        Handles placing an overlay image on an opened document, inserting the version of it that was resampled for the
+        size of its box
+        :param document: opened fitz document
+        :param image: image path of the asset
+        :param position: where in the template to place the image
         """
-        # Output of the generated PDF
-        output_path = f'{self.base_dir}output/guns/{output_name}.pdf'
+        import fitz
 
-        # Construct the effect box in the order of RedText, Prefix, Guild
-        effect_str = ""
-        if gun.redtext_info is not None and redtext_check is False:
-            effect_str += f"[{gun.redtext_name}]\n"
+        # The overlay files are read once into the shared pool rather than on every insert
+        if self.sources_loaded is False:
+            self.load_sources()
+
+        with span("GunPDF.get_asset", image=os.path.basename(image)):
+            data = get_asset(self.base_dir, image, position['x1'] - position['x0'], position['y1'] - position['y0'],
+                             self.asset_dpi)
 
-            cur_chars = 0
-            for idx, word in enumerate(gun.redtext_info.split(" ")):
-                cur_chars += len(word)
-                if cur_chars > 100:
-                    effect_str += "\n"
-                    cur_chars = len(word)
+        page = document[int(position['page']) - 1]
+        page.insert_image(fitz.Rect(position['x0'], position['y0'], position['x1'], position['y1']), stream=data)
 
-                effect_str += f" {word}"
+    def get_card_base(self, design, gun, rarity_border, die_type):
+        """
+        Gets the template of a card design with the gun's rarity splash and icons already placed, only building it
+        the first time that combination is seen. Guns in a batch share these layers constantly, so most cards are
+        just this base with their fields filled and their art added.
+        :param design: "single" or "split"
+        :param gun: gun to get the base of
+        :param rarity_border: whether the base has the rarity splash
+        :param die_type: sides of the damage die
+        :return: PDF bytes of the base
+        """
+        elements = tuple(gun.element) if gun.element is not None else None
+        key = (design, gun.rarity if rarity_border else None, gun.type, gun.guild, die_type, elements)
 
-            effect_str += "\n\n"
+        base = self.card_bases.get(key)
+        if base is not None:
+            self.card_bases.move_to_end(key)
+            return base
 
-        if gun.prefix_info is not None:
-            effect_str += f"[{gun.prefix_name}]\n"
+        import fitz
 
-            cur_chars = 0
-            for idx, word in enumerate(gun.prefix_info.split(" ")):
-                cur_chars += len(word)
-                if cur_chars > 100:
-                    effect_str += "\n"
-                    cur_chars = len(word)
+        with span("GunPDF.build_card_base", design=design):
+            document = fitz.open(f"{self.base_dir}resources/{self.templates[design]}")
+            if design == "single":
+                self.add_gun_overlays(document, gun, rarity_border, die_type)
+            else:
+                self.add_split_gun_overlays(document, gun, rarity_border, die_type)
 
-                effect_str += f" {word}"
+            # Compressed, as fitz keeps the inserted images raw until saved
+            base = document.tobytes(deflate=True)
+            document.close()
 
-            effect_str += "\n\n"
+        self.card_bases[key] = base
+        while len(self.card_bases) > self.card_base_cache_size:
+            self.card_bases.popitem(last=False)
+        return base
+
+    def add_gun_overlays(self, document, gun, rarity_border, die_type):
+        """
+        Handles placing the rarity splash and the gun, guild, die, and element icons of a gun on the single card design
+        :param document: opened fitz document of the template
+        :param gun: gun to place the icons of
+        :param rarity_border: whether to add the rarity splash
+        :param die_type: sides of the damage die
+        """
+        # Add gun rarity color splash background
+        if rarity_border:
+            position = {'page': 1, 'x0': 350, 'y0': 140, 'x1': 750, 'y1': 390}
+            self.insert_asset(document, f"{self.base_dir}resources/images/rarity_images/{self.gun_colors_paths.get(gun.rarity)}", position)
+
+        # Apply gun icon to gun card
+        position = {'page': 1, 'x0': 615, 'y0': 45, 'x1': 815, 'y1': 75}
+        self.insert_asset(document, f"{self.base_dir}resources/images/gun_icons/{self.gun_icon_paths.get(gun.type, 'PLACEHOLDER.PNG')}", position)
+
+        # Apply guild icon to gun card
+        position = {'page': 1, 'x0': 20, 'y0': 45, 'x1': 200, 'y1': 75}
+        self.insert_asset(document, f"{self.base_dir}resources/images/guild_icons/{self.guild_icon_paths.get(gun.guild, 'PLACEHOLDER.PNG')}", position)
+
+        # Apply damage die icon to gun card
+        position = {'page': 1, 'x0': 75, 'y0': 280, 'x1': 115, 'y1': 330}
+        self.insert_asset(document, f"{self.base_dir}resources/images/die_icons/{self.die_icon_paths.get(die_type, 'PLACEHOLDER.PNG')}", position)
+
+        # Apply element icon to gun card
+        if gun.element is not None:
+            # If there is only one element icon, then add it in the middle
+            if len(gun.element) == 1:
+                position = {'page': 1, 'x0': 60, 'y0': 440, 'x1': 110, 'y1': 470}
+                self.insert_asset(document, f"{self.base_dir}resources/images/element_icons/{self.element_icon_paths.get(gun.element[0], 'PLACEHOLDER.PNG')}", position)
+
+            # In the event that there are 3 elements, add the third element as a separate icon below
+            elif len(gun.element) >= 2:
+                position = {'page': 1, 'x0': 40, 'y0': 440, 'x1': 90, 'y1': 470}
+                self.insert_asset(document, f"{self.base_dir}resources/images/element_icons/{self.element_icon_paths.get(gun.element[0], 'PLACEHOLDER.PNG')}", position)
+
+                position = {'page': 1, 'x0': 80, 'y0': 440, 'x1': 130, 'y1': 470}
+                self.insert_asset(document, f"{self.base_dir}resources/images/element_icons/{self.element_icon_paths.get(gun.element[1], 'PLACEHOLDER.PNG')}", position)
+
+            # In the event that there are 3 elements, add the third element as a separate icon below
+            if len(gun.element) == 3:
+                position = {'page': 1, 'x0': 60, 'y0': 500, 'x1': 110, 'y1': 530}
+                self.insert_asset(document, f"{self.base_dir}resources/images/element_icons/{self.element_icon_paths.get(gun.element[2], 'PLACEHOLDER.PNG')}", position)
+
+    def add_split_gun_overlays(self, document, gun, rarity_border, die_type):
+        """
+        Handles placing the rarity splash and the gun, guild, die, and element icons of a gun on the 2-page card design
+        :param document: opened fitz document of the template
+        :param gun: gun to place the icons of
+        :param rarity_border: whether to add the rarity splash
+        :param die_type: sides of the damage die
+        """
+        # Add gun rarity color splash background
+        if rarity_border:
+            position = {'page': 2, 'x0': 100, 'y0': 125, 'x1': 500, 'y1': 375}
+            self.insert_asset(document, f"{self.base_dir}resources/images/rarity_images/{self.gun_colors_paths.get(gun.rarity)}", position)
+
+        # Apply gun icon to gun card
+        position = {'page': 1, 'x0': 480, 'y0': 25, 'x1': 580, 'y1': 55}
+        self.insert_asset(document, f"{self.base_dir}resources/images/gun_icons/{self.gun_icon_paths.get(gun.type, 'PLACEHOLDER.PNG')}", position)
+
+        position = {'page': 2, 'x0': 480, 'y0': 25, 'x1': 580, 'y1': 55}
+        self.insert_asset(document, f"{self.base_dir}resources/images/gun_icons/{self.gun_icon_paths.get(gun.type, 'PLACEHOLDER.PNG')}", position)
+
+        # Apply guild icon to gun card
+        position = {'page': 1, 'x0': 25, 'y0': 25, 'x1': 125, 'y1': 55}
+        self.insert_asset(document, f"{self.base_dir}resources/images/guild_icons/{self.guild_icon_paths.get(gun.guild, 'PLACEHOLDER.PNG')}", position)
+
+        position = {'page': 2, 'x0': 25, 'y0': 25, 'x1': 125, 'y1': 55}
+        self.insert_asset(document, f"{self.base_dir}resources/images/guild_icons/{self.guild_icon_paths.get(gun.guild, 'PLACEHOLDER.PNG')}", position)
+
+        # Apply damage die icon to gun card
+        position = {'page': 1, 'x0': 55, 'y0': 270, 'x1': 95, 'y1': 320}
+        self.insert_asset(document, f"{self.base_dir}resources/images/die_icons/{self.die_icon_paths.get(die_type, 'PLACEHOLDER.PNG')}", position)
+
+        # Apply element icon to gun card
+        if gun.element is not None:
+            position = {'page': 1, 'x0': 375, 'y0': 360, 'x1': 425, 'y1': 390}
+            self.insert_asset(document, f"{self.base_dir}resources/images/element_icons/{self.element_icon_paths.get(gun.element[0], 'PLACEHOLDER.PNG')}", position)
+
+            # In the event that there are 3 elements, add the third element as a separate icon below
+            if len(gun.element) >= 2:
+                position = {'page': 1, 'x0': 410, 'y0': 360, 'x1': 460, 'y1': 390}
+                self.insert_asset(document, f"{self.base_dir}resources/images/element_icons/{self.element_icon_paths.get(gun.element[1], 'PLACEHOLDER.PNG')}", position)
+
+            # In the event that there are 3 elements, add the third element as a separate icon below
+            if len(gun.element) == 3:
+                position = {'page': 1, 'x0': 445, 'y0': 360, 'x1': 495, 'y1': 390}
+                self.insert_asset(document, f"{self.base_dir}resources/images/element_icons/{self.element_icon_paths.get(gun.element[2], 'PLACEHOLDER.PNG')}", position)
+
+    def get_effect_text(self, gun, redtext_check):
+        """
+        Builds the text of the effect box in the order of RedText, Prefix, Guild, with each effect a paragraph under
+        its name. Lines are left unbroken, as the box's appearance wraps them by their width in its font.
+        :param gun: gun to describe
+        :param redtext_check: whether to leave the RedText out
+        :return: effect text
+        """
+        paragraphs = []
+        if gun.redtext_info is not None and redtext_check is False:
+            paragraphs.append(f"[{gun.redtext_name}]\n{gun.redtext_info}")
+
+        if gun.prefix_info is not None:
+            paragraphs.append(f"[{gun.prefix_name}]\n{gun.prefix_info}")
 
         if gun.guild_info is not None:
-            effect_str += f"[{gun.guild.title()}]\n{gun.guild_mod}"
+            paragraphs.append(f"[{gun.guild.title()}]\n{gun.guild_mod}")
+        return "\n\n".join(paragraphs)
+
+    def get_gun_art(self, gun, position):
+        """
+        Gets the gun's art fitted to the art box, from its local file or URL, or else a newly sampled image of its
+        type and guild, or else the placeholder for custom gun types and failed downloads
+        :param gun: gun to get the art of
+        :param position: art box on the card
+        :return: encoded image bytes
+        """
+        width, height = position['x1'] - position['x0'], position['y1'] - position['y0']
+
+        # Use the given local file or URL, whichever the source is
+        if gun.gun_art_path not in ["", None]:
+            try:
+                kind, location = resolve_source(gun.gun_art_path)
+                if kind == "file":
+                    with span("GunPDF.get_asset", image=os.path.basename(location)):
+                        return get_asset(self.base_dir, location, width, height, self.art_dpi)
+
+                # Kept in the asset cache if it was already downloaded when sampling the gun
+                with span("GunPDF.download_art", url=location):
+                    return download_art(self.base_dir, location, width, height, self.art_dpi)
+            except Exception:
+                self.show_warning("Invalid URL or filepath when trying to open, defaulting to normal image!")
+
+        # If no URL/File given or invalid paths, then sample a gun
+        try:
+            url = self.gun_images.sample_gun_url(gun.type, gun.guild)
+            if url is not None:
+                with span("GunPDF.download_art", url=url):
+                    return download_art(self.base_dir, url, width, height, self.art_dpi)
+        except Exception:
+            pass
+
+        return get_asset(self.base_dir, f"{self.base_dir}resources/images/gun_icons/PLACEHOLDER.png", width, height,
+                         self.art_dpi)
+
+    @traced("GunPDF.render_gun_pdf")
+    def render_gun_pdf(self, gun, rarity_border, form_check, redtext_check, output_profile=None):
+        """
+        Handles building a Gun Card PDF filled out with the information from the generated gun entirely in memory,
+        reading only the templates and the art. Wrap the result in io.BytesIO for APIs that take a file.
+        :param output_profile: key of output_profiles to save the card with, defaulting to output_profile
+        :return: bytes of the finished PDF
+        """
+        # Construct the effect box in the order of RedText, Prefix, Guild, wrapped to the box when drawn
+        effect_str = self.get_effect_text(gun, redtext_check)
 
         # Construct damage die string
         die_num, die_type = gun.damage.split('d')
@@ -269,118 +650,36 @@ class GunPDF:
             "EffectBox": effect_str
         }
 
-        # Fill the PDF with the given information
-        self.fill_pdf(self.base_dir + 'resources/GunTemplate.pdf', output_path, data_dict, form_check)
-
-        # Add gun rarity color splash background
-        if rarity_border:
-            position = {'page': 1, 'x0': 350, 'y0': 140, 'x1': 750, 'y1': 390}
-            self.add_image_to_pdf(output_path, f"{self.base_dir}resources/images/rarity_images/{self.gun_colors_paths.get(gun.rarity)}", position)
+        # Fill in the card base, the template with this gun's rarity splash and icons already placed
+        pdf = self.fill_pdf(self.get_card_base("single", gun, rarity_border, die_type), None, data_dict, form_check)
 
         # Apply gun art to gun card, either given via file/URL or randomly sampled
         position = {'page': 1, 'x0': 350, 'y0': 140, 'x1': 750, 'y1': 390}
-        art_success = True
-
-        # Try local path first
-        try:
-            self.add_image_to_pdf(output_path, gun.gun_art_path, position)
-        except:
-            art_success = False
-
-        # Then try URL on failure
-        if art_success is False:
-            try:
-                # Get image and then save locally temporarily
-                response = requests.get(gun.gun_art_path, stream=True)
-                img = Image.open(response.raw)
-                img.save(self.base_dir + 'output/guns/temporary_gun_image.png')
-                self.add_image_to_pdf(output_path, self.base_dir + 'output/guns/temporary_gun_image.png', position)
-                art_success = True
-            except:
-                self.statusbar.clearMessage()
-                self.statusbar.showMessage("Invalid URL or filepath when trying to open, defaulting to normal image!", 5000)
-                art_success = False
-
-        # If no URL/File given or invalid paths, then sample a gun
-        if art_success is False:
-            self.add_image_to_pdf(output_path, self.base_dir + 'output/guns/temporary_gun_image.png', position)
+        pdf = self.add_image_to_pdf(pdf, self.get_gun_art(gun, position), position)
 
-        # Apply gun icon to gun card
-        position = {'page': 1, 'x0': 615, 'y0': 45, 'x1': 815, 'y1': 75}
-        self.add_image_to_pdf(output_path, f"{self.base_dir}resources/images/gun_icons/{self.gun_icon_paths.get(gun.type, 'PLACEHOLDER.PNG')}", position)
+        # Save with the output profile, keeping the form fields if the PDF is to stay form-fillable
+        return self.compressPDF(pdf, flatten=not form_check, profile=output_profile)
 
-        # Apply guild icon to gun card
-        position = {'page': 1, 'x0': 20, 'y0': 45, 'x1': 200, 'y1': 75}
-        self.add_image_to_pdf(output_path, f"{self.base_dir}resources/images/guild_icons/{self.guild_icon_paths.get(gun.guild, 'PLACEHOLDER.PNG')}", position)
-
-        # Apply damage die icon to gun card
-        position = {'page': 1, 'x0': 75, 'y0': 280, 'x1': 115, 'y1': 330}
-        self.add_image_to_pdf(output_path, f"{self.base_dir}resources/images/die_icons/{self.die_icon_paths.get(die_type, 'PLACEHOLDER.PNG')}", position)
-
-        # Apply element icon to gun card
-        if gun.element is not None:
-            # If there is only one element icon, then add it in the middle
-            if len(gun.element) == 1:
-                position = {'page': 1, 'x0': 60, 'y0': 440, 'x1': 110, 'y1': 470}
-                self.add_image_to_pdf(output_path, f"{self.base_dir}resources/images/element_icons/{self.element_icon_paths.get(gun.element[0], 'PLACEHOLDER.PNG')}", position)
-
-            # In the event that there are 3 elements, add the third element as a separate icon below
-            elif len(gun.element) >= 2:
-                position = {'page': 1, 'x0': 40, 'y0': 440, 'x1': 90, 'y1': 470}
-                self.add_image_to_pdf(output_path, f"{self.base_dir}resources/images/element_icons/{self.element_icon_paths.get(gun.element[0], 'PLACEHOLDER.PNG')}", position)
-
-                position = {'page': 1, 'x0': 80, 'y0': 440, 'x1': 130, 'y1': 470}
-                self.add_image_to_pdf(output_path, f"{self.base_dir}resources/images/element_icons/{self.element_icon_paths.get(gun.element[1], 'PLACEHOLDER.PNG')}", position)
-
-            # In the event that there are 3 elements, add the third element as a separate icon below
-            if len(gun.element) == 3:
-                position = {'page': 1, 'x0': 60, 'y0': 500, 'x1': 110, 'y1': 530}
-                self.add_image_to_pdf(output_path, f"{self.base_dir}resources/images/element_icons/{self.element_icon_paths.get(gun.element[2], 'PLACEHOLDER.PNG')}", position)
-
-        # Try PDF Compression via pikepdf
-        self.compressPDF(output_path)
-
-    def generate_split_gun_pdf(self, output_name, gun, rarity_border, form_check, redtext_check):
+    @traced("GunPDF.generate_gun_pdf")
+    def generate_gun_pdf(self, output_name, gun, rarity_border, form_check, redtext_check, output_profile=None):
         """
-        Handles generating a Gun Card PDF that has two sides - one related to gun art only and the other related to gun
-        information
+        Handles generating a Gun Card PDF filled out with the information from the generated gun
         :param output_name: name of the output PDF to save
+        :param output_profile: key of output_profiles to save the card with, defaulting to output_profile
         """
-        # Output of the generated PDF
-        output_path = f'{self.base_dir}output/guns/{output_name}.pdf'
+        self.write_pdf(f'{self.base_dir}output/guns/{output_name}.pdf',
+                       self.render_gun_pdf(gun, rarity_border, form_check, redtext_check, output_profile))
 
-        # Construct the effect box in the order of RedText, Prefix, Guild
-        effect_str = ""
-        if gun.redtext_info is not None and redtext_check is False:
-            effect_str += f"[{gun.redtext_name}]\n"
-
-            cur_chars = 0
-            for idx, word in enumerate(gun.redtext_info.split(" ")):
-                cur_chars += len(word) + 1
-                if cur_chars > 28:
-                    effect_str += "\n"
-                    cur_chars = 0
-
-                effect_str += f" {word}"
-
-            effect_str += "\n\n"
-
-        if gun.prefix_info is not None:
-            effect_str += f"[{gun.prefix_name}]\n"
-
-            cur_chars = 0
-            for idx, word in enumerate(gun.prefix_info.split(" ")):
-                cur_chars += len(word) + 1
-                if cur_chars > 28:
-                    effect_str += "\n"
-                    cur_chars = 0
-
-                effect_str += f" {word}"
-
-            effect_str += "\n\n"
-
-        if gun.guild_info is not None:
-            effect_str += f"[{gun.guild.title()}]\n{gun.guild_mod}"
+    @traced("GunPDF.render_split_gun_pdf")
+    def render_split_gun_pdf(self, gun, rarity_border, form_check, redtext_check, output_profile=None):
+        """
+        Handles building a Gun Card PDF that has two sides - one related to gun art only and the other related to gun
+        information - entirely in memory, as render_gun_pdf does
+        :param output_profile: key of output_profiles to save the card with, defaulting to output_profile
+        :return: bytes of the finished PDF
+        """
+        # Construct the effect box in the order of RedText, Prefix, Guild, wrapped to the box when drawn
+        effect_str = self.get_effect_text(gun, redtext_check)
 
         # Define if red text should be shown on front screen
         redtext_name_str = gun.redtext_name if gun.redtext_name is not None else ""
@@ -415,87 +714,106 @@ class GunPDF:
             "EffectBox": effect_str,
         }
 
-        # Fill the PDF with the given information
-        self.fill_pdf(self.base_dir + 'resources/GunTemplateSplitSmall.pdf', output_path, data_dict, form_check)
-
-        # Add gun rarity color splash background
-        if rarity_border:
-            position = {'page': 2, 'x0': 100, 'y0': 125, 'x1': 500, 'y1': 375}
-            self.add_image_to_pdf(output_path, f"{self.base_dir}resources/images/rarity_images/{self.gun_colors_paths.get(gun.rarity)}", position)
+        # Fill in the card base, the template with this gun's rarity splash and icons already placed
+        pdf = self.fill_pdf(self.get_card_base("split", gun, rarity_border, die_type), None, data_dict, form_check)
 
         # Apply gun art to gun card, either given via file/URL or randomly sampled
         position = {'page': 2, 'x0': 100, 'y0': 125, 'x1': 500, 'y1': 375}
-        art_success = True
-
-        # Try local path first
-        try:
-            self.add_image_to_pdf(output_path, gun.gun_art_path, position)
-        except:
-            art_success = False
-
-        # Then try URL on failure
-        if art_success is False:
-            try:
-                # Get image and then save locally temporarily
-                response = requests.get(gun.gun_art_path, stream=True)
-                img = Image.open(response.raw)
-                img.save(self.base_dir + 'output/guns/temporary_gun_image.png')
-                self.add_image_to_pdf(output_path, self.base_dir + 'output/guns/temporary_gun_image.png', position)
-                art_success = True
-            except:
-                self.statusbar.clearMessage()
-                self.statusbar.showMessage("Invalid URL or filepath when trying to open, defaulting to normal image!", 5000)
-                art_success = False
-
-        # If no URL/File given or invalid paths, then sample a gun
-        if art_success is False:
-            self.gun_images.sample_gun_image(gun.type, gun.guild)
-            self.add_image_to_pdf(output_path, self.base_dir + 'output/guns/temporary_gun_image.png', position)
-
-        # Apply gun icon to gun card
-        position = {'page': 1, 'x0': 480, 'y0': 25, 'x1': 580, 'y1': 55}
-        self.add_image_to_pdf(output_path, f"{self.base_dir}resources/images/gun_icons/{self.gun_icon_paths.get(gun.type, 'PLACEHOLDER.PNG')}", position)
-
-        position = {'page': 2, 'x0': 480, 'y0': 25, 'x1': 580, 'y1': 55}
-        self.add_image_to_pdf(output_path, f"{self.base_dir}resources/images/gun_icons/{self.gun_icon_paths.get(gun.type, 'PLACEHOLDER.PNG')}", position)
-
-        # Apply guild icon to gun card
-        position = {'page': 1, 'x0': 25, 'y0': 25, 'x1': 125, 'y1': 55}
-        self.add_image_to_pdf(output_path, f"{self.base_dir}resources/images/guild_icons/{self.guild_icon_paths.get(gun.guild, 'PLACEHOLDER.PNG')}", position)
-
-        position = {'page': 2, 'x0': 25, 'y0': 25, 'x1': 125, 'y1': 55}
-        self.add_image_to_pdf(output_path, f"{self.base_dir}resources/images/guild_icons/{self.guild_icon_paths.get(gun.guild, 'PLACEHOLDER.PNG')}", position)
+        pdf = self.add_image_to_pdf(pdf, self.get_gun_art(gun, position), position)
 
-        # Apply damage die icon to gun card
-        position = {'page': 1, 'x0': 55, 'y0': 270, 'x1': 95, 'y1': 320}
-        self.add_image_to_pdf(output_path, f"{self.base_dir}resources/images/die_icons/{self.die_icon_paths.get(die_type, 'PLACEHOLDER.PNG')}", position)
+        # Save with the output profile, keeping the form fields if the PDF is to stay form-fillable
+        return self.compressPDF(pdf, flatten=not form_check, profile=output_profile)
 
-        # Apply element icon to gun card
-        if gun.element is not None:
-            position = {'page': 1, 'x0': 375, 'y0': 360, 'x1': 425, 'y1': 390}
-            self.add_image_to_pdf(output_path, f"{self.base_dir}resources/images/element_icons/{self.element_icon_paths.get(gun.element[0], 'PLACEHOLDER.PNG')}", position)
+    @traced("GunPDF.generate_split_gun_pdf")
+    def generate_split_gun_pdf(self, output_name, gun, rarity_border, form_check, redtext_check, output_profile=None):
+        """
+        Handles generating a Gun Card PDF that has two sides - one related to gun art only and the other related to gun
+        information
+        :param output_name: name of the output PDF to save
+        :param output_profile: key of output_profiles to save the card with, defaulting to output_profile
+        """
+        self.write_pdf(f'{self.base_dir}output/guns/{output_name}.pdf',
+                       self.render_split_gun_pdf(gun, rarity_border, form_check, redtext_check, output_profile))
+    
+    #PDF compression method using pikepdf, a Python tool based on QPDF
+    @traced("GunPDF.compressPDF")
+    def compressPDF(self, pdf, flatten=True, profile=None):
+        """
+        Handles saving the card PDF with an output profile, recording its size and the time it took
+        :param pdf: PDF to save, as a path it is saved back to or as the bytes of it. If pikepdf fails to save it or
+            the path can not be written to, the card is kept as it was filled and a warning is shown
+        :param flatten: whether to draw the filled form fields into the page, which only copies the appearance
+            streams fill_pdf made rather than generating them. The fast profile never flattens.
+        :param profile: key of output_profiles, defaulting to output_profile
+        :return: bytes of the saved PDF
+        """
+        import io
 
-            # In the event that there are 3 elements, add the third element as a separate icon below
-            if len(gun.element) >= 2:
-                position = {'page': 1, 'x0': 410, 'y0': 360, 'x1': 460, 'y1': 390}
-                self.add_image_to_pdf(output_path, f"{self.base_dir}resources/images/element_icons/{self.element_icon_paths.get(gun.element[1], 'PLACEHOLDER.PNG')}", position)
+        profile = self.output_profile if profile is None else profile
+        options = self.output_profiles[profile]
+        start = time.perf_counter()
+        data = self.read_pdf(pdf)
 
-            # In the event that there are 3 elements, add the third element as a separate icon below
-            if len(gun.element) == 3:
-                position = {'page': 1, 'x0': 445, 'y0': 360, 'x1': 495, 'y1': 390}
-                self.add_image_to_pdf(output_path, f"{self.base_dir}resources/images/element_icons/{self.element_icon_paths.get(gun.element[2], 'PLACEHOLDER.PNG')}", position)
+        if options['pikepdf'] is True:
+            import pikepdf
 
-        # Try PDF Compression via pikepdf
-        self.compressPDF(output_path)
-    
-    #PDF compression method using pikepdf, a Python tool based on QPDF
-    def compressPDF(self, output_path):
-        try:
-            with pikepdf.open(output_path) as pdf:
-                pdf.flatten_annotations('all')
-                pdf.save(f"{output_path[:-4]}.compressed.pdf")
-                os.remove(f"{output_path}")
-                os.rename(f"{output_path[:-4]}.compressed.pdf", f"{output_path[:-4]}.pdf")
-        except Exception:
-            self.statusbar.clearMessage()
-            self.statusbar.showMessage("Failed to compress the PDF!", 5000)
\ No newline at end of file
+            try:
+                with pikepdf.open(io.BytesIO(data)) as document:
+                    if flatten is True:
+                        document.flatten_annotations('all')
+                    if options['merge_images'] is True:
+                        self.merge_duplicate_images(document)
+
+                    stream = io.BytesIO()
+                    document.save(stream,
+                                  object_stream_mode=pikepdf.ObjectStreamMode.generate if options['object_streams']
+                                  else pikepdf.ObjectStreamMode.preserve,
+                                  compress_streams=True,
+                                  linearize=options['linearize'])
+                data = self.write_pdf(pdf, stream.getvalue())
+            except (pikepdf.PdfError, OSError) as e:
+                # The card is left as it was filled, both in the returned bytes and in the file if it was given a path
+                self.show_warning(f"Failed to save the PDF with the {profile} profile: {e}")
+
+        stats = self.output_stats[profile]
+        stats['count'] += 1
+        stats['bytes'] += len(data)
+        stats['ms'] += (time.perf_counter() - start) * 1000
+        return data
+
+    def merge_duplicate_images(self, pdf):
+        """
+        Points every page at a single copy of each distinct image, so byte-identical images inserted more than once
+        are only saved once
+        :param pdf: opened pikepdf PDF
+        """
+        import hashlib
+        import pikepdf
+
+        def image_key(image):
+            digest = hashlib.blake2b(image.read_raw_bytes(), digest_size=16)
+            for name in sorted(key for key in image.keys() if key not in ["/Length", "/SMask"]):
+                digest.update(f"{name}={image[name]}".encode())
+            if "/SMask" in image:
+                digest.update(image_key(image.SMask).encode())
+            return digest.hexdigest()
+
+        images = {}
+        for page in pdf.pages:
+            xobjects = page.obj.get("/Resources", pikepdf.Dictionary()).get("/XObject", pikepdf.Dictionary())
+            for name in list(xobjects.keys()):
+                if xobjects[name].get("/Subtype") != "/Image":
+                    continue
+
+                first = images.setdefault(image_key(xobjects[name]), xobjects[name])
+                if first.objgen != xobjects[name].objgen:
+                    xobjects[name] = first
+
+    def describe_output(self, profile=None):
+        """ Short summary of the cards saved with an output profile, i.e. for the statusbar """
+        profile = self.output_profile if profile is None else profile
+        stats = self.output_stats[profile]
+        if stats['count'] == 0:
+            return f"No cards saved with the {profile} profile yet"
+        return f"{stats['count']} cards saved with the {profile} profile, averaging " \
+               f"{stats['bytes'] / stats['count'] / 1024:.0f} KB and {stats['ms'] / stats['count']:.0f} ms"
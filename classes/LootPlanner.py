@@ -0,0 +1,205 @@
+"""
+@file LootPlanner.py
+@author Ryan Missel
+
+Class that handles planning a bundle of loot that adds up to a gold budget, i.e. "about 2,000g of loot for this
+session", optionally weighted towards a mix of rarities and item kinds.
+
+The cost tables of every item kind are compiled once into a flat list of item slots. A dynamic program over
+(number of items, total cost) then gives the exact probability of every reachable total, which is used to sample
+bundles that land within the tolerance of the budget without any trial and error.
+"""
+from math import gcd
+from functools import reduce
+
+import numpy as np
+
+from classes.Potion import get_potion_rarity
+from classes.resource_registry import get_table
+
+
+class LootPlanner:
+    def __init__(self, base_dir, kinds=("gun", "melee", "shield", "relic", "grenade", "potion")):
+        """
+        Compiles the cost tables of the given item kinds into arrays of item slots
+        :param base_dir: system executable base directory
+        :param kinds: item kinds that can be planned
+        """
+        self.base_dir = base_dir
+        self.rarities = ["common", "uncommon", "rare", "epic", "legendary"]
+
+        # Tier to rarity mapping for tiered items, matching the FoundryVTT exports
+        self.tier_to_rarity = {"1": "common", "2": "uncommon", "3": "rare", "4": "epic", "5": "legendary"}
+
+        # Each slot is one purchasable item choice: its kind, rarity, generator key, and cost
+        self.slots = []
+        for kind in kinds:
+            self.slots.extend(getattr(self, f"compile_{kind}_slots")())
+
+        self.kinds = np.array([slot['kind'] for slot in self.slots])
+        self.slot_rarities = np.array([slot['rarity'] for slot in self.slots])
+        self.costs = np.array([slot['cost'] for slot in self.slots], dtype=int)
+
+        # All costs share a common unit (5g in the source tables), which shrinks the DP by that factor
+        self.unit = reduce(gcd, self.costs.tolist())
+        self.unit_costs = self.costs // self.unit
+
+    def compile_gun_slots(self):
+        costs = get_table(self.base_dir, "resources/guns/gun_cost.json")
+        return [{"kind": "gun", "rarity": rarity, "key": rarity, "cost": costs[rarity]} for rarity in self.rarities]
+
+    def compile_melee_slots(self):
+        costs = get_table(self.base_dir, "resources/guns/gun_cost.json")
+        return [{"kind": "melee", "rarity": rarity, "key": rarity, "cost": costs[rarity]} for rarity in self.rarities]
+
+    def compile_shield_slots(self):
+        costs = get_table(self.base_dir, "resources/misc/shields/shield_cost.json")
+        return [{"kind": "shield", "rarity": self.tier_to_rarity[tier], "key": tier, "cost": cost}
+                for tier, cost in costs.items()]
+
+    def compile_grenade_slots(self):
+        costs = get_table(self.base_dir, "resources/misc/grenades/grenade_cost.json")
+        return [{"kind": "grenade", "rarity": self.tier_to_rarity[tier], "key": tier, "cost": cost}
+                for tier, cost in costs.items()]
+
+    def compile_relic_slots(self):
+        # Only the rarities that the relic table can actually generate get a slot
+        costs = get_table(self.base_dir, "resources/misc/relics/relic_cost.json")
+        relic_rarities = set(relic['rarity'].lower()
+                             for relic in get_table(self.base_dir, "resources/misc/relics/relic.json").values())
+        return [{"kind": "relic", "rarity": rarity, "key": rarity.title(), "cost": costs[rarity]}
+                for rarity in self.rarities if rarity in relic_rarities]
+
+    def compile_potion_slots(self):
+        # Potion rarity is derived from its name by the same helper Potion labels it with
+        slots = []
+        for potion_id, potion in get_table(self.base_dir, "resources/misc/potions/potion.json").items():
+            slots.append({"kind": "potion", "rarity": get_potion_rarity(potion['name']), "key": potion_id,
+                          "cost": potion['cost']})
+        return slots
+
+    def slot_weights(self, rarity_mix=None, kind_mix=None):
+        """
+        Builds the probability of drawing each slot, spreading each rarity's and kind's weight over its slots
+        :param rarity_mix: optional dictionary of rarity to relative weight, i.e. {"rare": 2, "epic": 1}
+        :param kind_mix: optional dictionary of item kind to relative weight, i.e. {"gun": 3, "potion": 1}
+        :return: array of slot probabilities
+        """
+        weights = np.ones(len(self.slots))
+
+        for mix, labels in [(rarity_mix, self.slot_rarities), (kind_mix, self.kinds)]:
+            if mix is None:
+                continue
+
+            for label in np.unique(labels):
+                mask = labels == label
+                weights[mask] *= mix.get(label, 0) / mask.sum()
+
+        if weights.sum() == 0:
+            raise ValueError("Rarity and kind mix leave no items to choose from!")
+        return weights / weights.sum()
+
+    def total_distribution(self, max_items, budget, weights):
+        """
+        Dynamic program over the number of items and their total cost
+        :param max_items: largest bundle size to consider
+        :param budget: largest total, in cost units, to track
+        :param weights: probability of drawing each slot
+        :return: array where [k, v] is the probability that k drawn slots cost exactly v units
+        """
+        table = np.zeros((max_items + 1, budget + 1))
+        table[0, 0] = 1.0
+
+        active = np.nonzero(weights)[0]
+        for k in range(1, max_items + 1):
+            for i in active:
+                cost = self.unit_costs[i]
+                if cost <= budget:
+                    table[k, cost:] += weights[i] * table[k - 1, :budget + 1 - cost]
+        return table
+
+    def plan(self, target, tolerance=0.1, items=None, max_items=12, rarity_mix=None, kind_mix=None, rng=None):
+        """
+        Samples a bundle of item slots whose total cost lands within the tolerance of the gold target
+        :param target: gold target, e.g. 2000
+        :param tolerance: allowed relative deviation from the target, e.g. 0.1 for +-10%
+        :param items: exact number of items in the bundle, otherwise any size from 1 up to max_items
+        :param max_items: largest bundle size when no exact number is given, raised if the target needs more items
+        :param rarity_mix: optional dictionary of rarity to relative weight
+        :param kind_mix: optional dictionary of item kind to relative weight
+        :param rng: optional numpy Generator for reproducible plans
+        :return: list of slot dictionaries (kind, rarity, key, cost)
+        """
+        rng = np.random.default_rng() if rng is None else rng
+        weights = self.slot_weights(rarity_mix, kind_mix)
+
+        lower = int(np.ceil(target * (1 - tolerance) / self.unit))
+        upper = int(np.floor(target * (1 + tolerance) / self.unit))
+        if upper < max(lower, 1):
+            raise ValueError(f"No total within {tolerance:.0%} of {target}g is reachable in {self.unit}g steps!")
+
+        # Large budgets need at least enough items to reach the range with the most expensive allowed slot
+        if items is None:
+            max_items = max(max_items, int(np.ceil(lower / self.unit_costs[weights > 0].max())))
+        else:
+            max_items = items
+        table = self.total_distribution(max_items, upper, weights)
+
+        # Choose a bundle size among those that can land in the range, then a total proportional to its odds
+        sizes = [items] if items is not None else list(range(1, max_items + 1))
+        sizes = [k for k in sizes if table[k, lower:upper + 1].sum() > 0]
+        if len(sizes) == 0:
+            raise ValueError(f"No bundle of up to {max_items} items lands within {tolerance:.0%} of {target}g!")
+
+        size = int(rng.choice(sizes))
+        totals = table[size, lower:upper + 1]
+        total = lower + int(rng.choice(len(totals), p=totals / totals.sum()))
+
+        # Walk back through the table, drawing each item given the remaining total
+        bundle = []
+        for k in range(size, 0, -1):
+            remaining = total - self.unit_costs
+            odds = np.where(remaining >= 0, weights * table[k - 1, np.maximum(remaining, 0)], 0.0)
+            idx = int(rng.choice(len(odds), p=odds / odds.sum()))
+            bundle.append(dict(self.slots[idx]))
+            total -= self.unit_costs[idx]
+
+        return sorted(bundle, key=lambda slot: (slot['kind'], -slot['cost']))
+
+    def generate_bundle(self, bundle, item_images, damage_balance="gun_types"):
+        """
+        Generates the actual items for a planned bundle
+        :param bundle: list of slots from plan()
+        :param item_images: dictionary of item kind to its image sampling class, i.e. {"gun": GunImage(...)}
+        :param damage_balance: gun damage balance JSON to use for guns
+        :return: list of generated item objects
+        """
+        from classes.Gun import Gun
+        from classes.MeleeWeapon import MeleeWeapon
+        from classes.Shield import Shield
+        from classes.Relic import Relic
+        from classes.Grenade import Grenade
+        from classes.Potion import Potion
+
+        generated = []
+        for slot in bundle:
+            kind, key = slot['kind'], slot['key']
+            images = item_images.get(kind)
+
+            if kind == "gun":
+                item = Gun(self.base_dir, images, gun_rarity=key, damage_balance=damage_balance,
+                           element_damage="", selected_elements=[], prefix="None", redtext="None")
+            elif kind == "melee":
+                item = MeleeWeapon(self.base_dir, images, melee_rarity=key,
+                                   element_damage="", selected_elements=[], prefix="Random")
+            elif kind == "shield":
+                item = Shield(self.base_dir, images, tier=key)
+            elif kind == "relic":
+                item = Relic(self.base_dir, images, rarity=key)
+            elif kind == "grenade":
+                item = Grenade(self.base_dir, images, tier=key)
+            else:
+                item = Potion(self.base_dir, images, potion_id=key)
+
+            generated.append(item)
+        return generated
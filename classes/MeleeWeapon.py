@@ -7,15 +7,14 @@ Takes in user-input on melee type, melee guild, and item level - if provided.
 
 Unless a melee type is input, then the melee table is only rolled through Melee Weapons Table 1-6 on Pg. 81.
 """
-import shutil
-import requests
-
-from PIL import Image
 from random import randint, choice
-from classes.json_reader import get_file_data
+from classes.asset_cache import load_art
+from classes.resource_registry import get_table
+from classes.tracing import traced
 
 
 class MeleeWeapon:
+    @traced("MeleeWeapon.__init__")
     def __init__(self, base_dir, melee_images,
                  name=None, item_level=None, melee_guild=None, melee_rarity=None,
                  element_damage=None, rarity_element=False, selected_elements=None,
@@ -33,13 +32,13 @@ class MeleeWeapon:
         self.name = name
         if name in ['random', None]:
             roll_name_len = randint(1, 2)
-            name_table = get_file_data(base_dir + 'resources/guns/lexicon.json')
+            name_table = get_table(base_dir, 'resources/guns/lexicon.json')
             number_names = len(name_table.keys()) - 1
             names = [name_table.get(str(randint(1, number_names))) + ' ' for _ in range(roll_name_len)]
             self.name = ''.join(names)
 
         # Get guild information
-        self.guild_table = get_file_data(base_dir + "resources/misc/melees/guild_table.json")
+        self.guild_table = get_table(base_dir, "resources/misc/melees/guild_table.json")
         if melee_guild in ['random', None]:
             self.guild = choice(list(self.guild_table.keys()))
         else:
@@ -52,7 +51,7 @@ class MeleeWeapon:
         if melee_rarity in ['random', None]:
             roll_row = str(randint(1, 4))
             roll_col = str(randint(1, 6))
-            self.rarity = get_file_data(base_dir + "resources/guns/rarity_table.json").get(str(roll_row)).get(roll_col)
+            self.rarity = get_table(base_dir, "resources/guns/rarity_table.json").get(str(roll_row)).get(roll_col)
         # If a rarity is specified, then roll for including an element
         else:
             self.rarity = melee_rarity
@@ -70,7 +69,7 @@ class MeleeWeapon:
             self.rarity = self.rarity[0]
 
         # Add cost information
-        self.cost = get_file_data(base_dir + "resources/guns/gun_cost.json").get(self.rarity.lower())
+        self.cost = get_table(base_dir, "resources/guns/gun_cost.json").get(self.rarity.lower())
 
         # Get guild information
         self.guild_mod = self.guild_table.get("tiers").get(self.rarity)
@@ -87,8 +86,10 @@ class MeleeWeapon:
             self.element = ["explosive"]
         elif self.guild_element_roll is True and self.rarity_element_roll is True:
             roll_element = str(randint(1, 100))
-            element_table = get_file_data(base_dir + "resources/elements/elemental_table.json")
-            self.element = element_table.get(self.get_element_tier(roll_element, element_table)).get(self.rarity)
+            element_table = get_table(base_dir, "resources/elements/elemental_table.json")
+            element = element_table.get(self.get_element_tier(roll_element, element_table)).get(self.rarity)
+            # Copied as the table is shared and the element list is edited in place below
+            self.element = list(element) if element is not None else None
 
         # Check for passed in element, overwrites any rolled damage die
         if element_damage != "":
@@ -110,7 +111,7 @@ class MeleeWeapon:
         # Get element info if it exists
         if self.element is not None:
             for element in self.element:
-                self.element_info.append(get_file_data(f"{base_dir}resources/elements/elemental_type.json").get(element))
+                self.element_info.append(get_table(base_dir, "resources/elements/elemental_type.json").get(element))
 
         if self.element is None:
             self.element = []
@@ -118,7 +119,7 @@ class MeleeWeapon:
         # Prefix parsing, either Random or Selected
         self.prefix_name = ""
         self.prefix_info = ""
-        prefix_table = get_file_data(base_dir + "resources/misc/melees/prefix.json")
+        prefix_table = get_table(base_dir, "resources/misc/melees/prefix.json")
         if prefix == "Random":
             # For melee weapons, common items cannot have prefixes
             if self.rarity == "common":
@@ -141,20 +142,18 @@ class MeleeWeapon:
         self.redtext_name = redtext_name
         self.redtext_info = redtext_info
 
-        # Set file art path; sample if not given
-        # TODO: not satisfied with the URL implementation here yet
+        # Set file art path, written from the given file or URL; sample if not given or if it cannot be read
         self.melee_art_path = self.base_dir + 'output/melees/temporary_melee_image.png'
+        art = None
         if melee_art not in ["", None]:
             try:
-                try:
-                    # Test URL
-                    response = requests.get(melee_art, stream=True)
-                    img = Image.open(response.raw)
-                    img.save(self.melee_art_path)
-                except:
-                    shutil.copy(melee_art, self.melee_art_path)
-            except:
-                melee_images.sample_melee_image(self.guild)
+                art = load_art(melee_art)
+            except Exception:
+                pass
+
+        if art is not None:
+            with open(self.melee_art_path, 'wb') as f:
+                f.write(art)
         else:
             melee_images.sample_melee_image(self.guild)
 
@@ -163,7 +162,7 @@ class MeleeWeapon:
         roll_level = randint(1, 30)
 
         tier = None
-        for key in get_file_data(base_dir + "resources/guns/gun_types.json").get("pistol").keys():
+        for key in get_table(base_dir, "resources/guns/gun_types.json").get("pistol").keys():
             lower, upper = [int(i) for i in key.split('-')]
             if lower <= roll_level <= upper:
                 tier = key
@@ -178,7 +177,7 @@ class MeleeWeapon:
         :return: True if an element roll
         """
         elements, total = 0, 0
-        for key in get_file_data(base_dir + "resources/guns/rarity_table.json").values():
+        for key in get_table(base_dir, "resources/guns/rarity_table.json").values():
             for val in key.values():
                 # Check for non-element
                 if type(val) == str and val == rarity:
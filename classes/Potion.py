@@ -5,22 +5,33 @@
 Class that handles generating and holding the state of a Potion.
 Takes in user-input on potion ID - if provided.
 """
-import shutil
 from random import randint, choice
 
-import requests
-from PIL import Image
+from classes.asset_cache import load_art
+from classes.resource_registry import get_table
+from classes.tracing import traced
 
-from classes.json_reader import get_file_data
+
+# Rarities a potion's name can contain, most specific first as "uncommon" contains "common"
+POTION_RARITIES = ["legendary", "epic", "rare", "uncommon", "common"]
+
+
+def get_potion_rarity(name):
+    """ Rarity of a potion by its name, where potions without one in their name are common """
+    for rarity in POTION_RARITIES:
+        if rarity in name.lower():
+            return rarity
+    return "common"
 
 
 class Potion:
+    @traced("Potion.__init__")
     def __init__(self, base_dir, potion_images,
                  potion_id=None, potion_art=None):
         """ Handles generating a potion, modified to specifics by user info """
         # Load in potion data
-        potion_data = get_file_data(base_dir + 'resources/misc/potions/potion.json')
-        tina_potion_data = get_file_data(base_dir + 'resources/misc/potions/tina_potion.json')
+        potion_data = get_table(base_dir, 'resources/misc/potions/potion.json')
+        tina_potion_data = get_table(base_dir, 'resources/misc/potions/tina_potion.json')
 
         # Hard coded ranges that tina potions are in and the bonus to the roll
         self.tina_ranges = {
@@ -88,33 +99,20 @@ class Potion:
             self.effect = self.effect.replace("x", self.stats.get(randint(1, 4)))
 
         # Derive rarity of potion based on name (all base are common)
-        self.rarity = "common"
-        if "common" in self.name.lower():
-            self.rarity = "common"
-        elif "uncommon" in self.name.lower():
-            self.rarity = "uncommon"
-        elif "rare" in self.name.lower():
-            self.rarity = "rare"
-        elif "epic" in self.name.lower():
-            self.rarity = "epic"
-        elif "legendary" in self.name.lower():
-            self.rarity = "legendary"
-
-        # Set file art path; sample if not given
-        self.potion_art_path = base_dir + 'output/potions/temporary_potion_image.png'
+        self.rarity = get_potion_rarity(self.name)
+
+        # Set the art, kept in memory as its encoded bytes along with the file or URL it came from; sample if not
+        # given or if it cannot be read
+        self.potion_art_path, self.potion_art = None, None
         if potion_art not in ["", None]:
             try:
-                try:
-                    # Test URL
-                    response = requests.get(potion_art, stream=True)
-                    img = Image.open(response.raw)
-                    img.save(self.potion_art_path)
-                except:
-                    shutil.copy(potion_art, self.potion_art_path)
-            except:
-                potion_images.sample_potion_image()
-        else:
-            potion_images.sample_potion_image()
+                self.potion_art = load_art(potion_art)
+                self.potion_art_path = potion_art
+            except Exception:
+                pass
+
+        if self.potion_art is None:
+            self.potion_art_path, self.potion_art = potion_images.sample_potion_image()
 
     def check_tina_range(self, potion_id):
         """
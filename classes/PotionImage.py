@@ -4,11 +4,11 @@
 
 Handles filtering the scrapped game source dataset for specific properties for a given Potion image
 """
-import json
 import random
-import requests
 
-from PIL import Image
+from classes.asset_cache import load_art
+from classes.resource_registry import get_table
+from classes.tracing import traced
 
 
 class PotionImage:
@@ -24,16 +24,16 @@ class PotionImage:
             "legendary": [255, 180, 0, 255]
         }
 
-        # Concatenating all JSONs into one block
-        with open(basedir + "resources/images/potion_images/bltps_ozkits.json", "r") as f:
-            self.potion_data = json.load(f)
+        # Shared manifest, only sampled from
+        self.potion_data = get_table(basedir, "resources/images/potion_images/bltps_ozkits.json")
 
+    @traced("PotionImage.sample_potion_image")
     def sample_potion_image(self):
-        """ Handles sampling and downloading a relevant potion image from the games """
+        """
+        Handles sampling and downloading a relevant potion image from the games
+        :return: (URL of the image, encoded image bytes)
+        """
         url = random.sample(self.potion_data, 1)[0]['image_link']
 
-        # Get image and then save locally temporarily
-        response = requests.get(url, stream=True)
-        img = Image.open(response.raw)
-        img.save(self.basedir + 'output/potions/temporary_potion_image.png')
-        return url
+        # Kept in memory on the item rather than saved to a shared temporary file
+        return url, load_art(url)
@@ -5,24 +5,23 @@
 Class that handles generating and holding the state of a Relic.
 Takes in user-input on Relic Type, Rarity, and Class - if provided.
 """
-import shutil
-import requests
-
-from PIL import Image
 from random import choice, randint
-from classes.json_reader import get_file_data
+from classes.asset_cache import load_art
+from classes.resource_registry import get_table
+from classes.tracing import traced
 
 
 class Relic:
+    @traced("Relic.__init__")
     def __init__(self, base_dir, relic_images,
                  name='', relic_id="Random", relic_type='', rarity="Random",
                  effect='', class_id="Random", class_effect='', relic_art_path=None):
         """ Handles generating a relic, modified to specifics by user info """
         # Load in relic data
-        relic_data = get_file_data(base_dir + 'resources/misc/relics/relic.json')
-        relic_cost = get_file_data(base_dir + 'resources/misc/relics/relic_cost.json')
-        relic_class = get_file_data(base_dir + 'resources/misc/relics/relic_class.json')
-        relic_names = get_file_data(base_dir + 'resources/misc/relics/relic_lexicon.json')
+        relic_data = get_table(base_dir, 'resources/misc/relics/relic.json')
+        relic_cost = get_table(base_dir, 'resources/misc/relics/relic_cost.json')
+        relic_class = get_table(base_dir, 'resources/misc/relics/relic_class.json')
+        relic_names = get_table(base_dir, 'resources/misc/relics/relic_lexicon.json')
 
         # Denotes whether relic data has been filtered or not, used in relic ID key grabbing
         filtered_flag = False
@@ -56,7 +55,7 @@ class Relic:
             relic_dict = relic_data.get(relic_id)
         # Otherwise, just get the key
         else:
-            relic_data = get_file_data(base_dir + 'resources/misc/relics/relic.json')
+            relic_data = get_table(base_dir, 'resources/misc/relics/relic.json')
             relic_dict = relic_data.get(relic_id)
 
         self.relic_id = relic_id
@@ -83,21 +82,18 @@ class Relic:
         # Cost of relic
         self.cost = relic_cost[self.rarity]
 
-        # Set file art path; sample if not given
-        self.relic_art_path = base_dir + 'output/relics/temporary_relic_image.png'
+        # Set the art, kept in memory as its encoded bytes along with the file or URL it came from; sample if not
+        # given or if it cannot be read
+        self.relic_art_path, self.relic_art = None, None
         if relic_art_path not in ["", None]:
             try:
-                try:
-                    # Test URL
-                    response = requests.get(relic_art_path, stream=True)
-                    img = Image.open(response.raw)
-                    img.save(self.relic_art_path)
-                except:
-                    shutil.copy(relic_art_path, self.relic_art_path)
-            except:
-                relic_images.sample_relic_image()
-        else:
-            relic_images.sample_relic_image()
+                self.relic_art = load_art(relic_art_path)
+                self.relic_art_path = relic_art_path
+            except Exception:
+                pass
+
+        if self.relic_art is None:
+            self.relic_art_path, self.relic_art = relic_images.sample_relic_image()
 
     def get_relic_tier(self, roll, relic_data):
         """
@@ -5,25 +5,24 @@
 Class that handles generating and holding the state of a Shield.
 Takes in user-input on Shield Type, Rarity, etc - if provided.
 """
-import shutil
-import requests
-
-from PIL import Image
 from random import choice, randint
-from classes.json_reader import get_file_data
+from classes.asset_cache import load_art
+from classes.resource_registry import get_table
+from classes.tracing import traced
 
 
 class Shield:
+    @traced("Shield.__init__")
     def __init__(self, base_dir, shield_images,
                  name='', guild="Random", tier="Random",
                  capacity="", recharge="", effect="",
                  shield_art=None):
         """ Handles generating a shield, modified to specifics by user info """
         # Load in shield data
-        shield_data = get_file_data(base_dir + 'resources/misc/shields/shield.json')
-        shield_costs = get_file_data(base_dir + 'resources/misc/shields/shield_cost.json')
-        shield_guild = get_file_data(base_dir + 'resources/misc/shields/shield_guild.json')
-        shield_names = get_file_data(base_dir + 'resources/misc/shields/shield_lexicon.json')
+        shield_data = get_table(base_dir, 'resources/misc/shields/shield.json')
+        shield_costs = get_table(base_dir, 'resources/misc/shields/shield_cost.json')
+        shield_guild = get_table(base_dir, 'resources/misc/shields/shield_guild.json')
+        shield_names = get_table(base_dir, 'resources/misc/shields/shield_lexicon.json')
 
         # Grab a shield name if not given
         self.name = name if name != '' else shield_names.get(choice(list(shield_names.keys())))
@@ -60,18 +59,15 @@ class Shield:
         # Cost
         self.cost = shield_costs.get(self.tier)
 
-        # Set file art path; sample if not given
-        self.shield_art_path = base_dir + 'output/shields/temporary_shield_image.png'
+        # Set the art, kept in memory as its encoded bytes along with the file or URL it came from; sample if not
+        # given or if it cannot be read
+        self.shield_art_path, self.shield_art = None, None
         if shield_art not in ["", None]:
             try:
-                try:
-                    # Test URL
-                    response = requests.get(shield_art, stream=True)
-                    img = Image.open(response.raw)
-                    img.save(self.shield_art_path)
-                except:
-                    shutil.copy(shield_art, self.shield_art_path)
-            except:
-                shield_images.sample_shield_image()
-        else:
-            shield_images.sample_shield_image()
+                self.shield_art = load_art(shield_art)
+                self.shield_art_path = shield_art
+            except Exception:
+                pass
+
+        if self.shield_art is None:
+            self.shield_art_path, self.shield_art = shield_images.sample_shield_image()
@@ -4,11 +4,11 @@
 
 Handles filtering the scrapped game source dataset for specific properties for a given Shield image
 """
-import json
 import random
-import requests
 
-from PIL import Image
+from classes.asset_cache import load_art
+from classes.resource_registry import get_table
+from classes.tracing import traced
 
 
 class ShieldImage:
@@ -16,23 +16,22 @@ class ShieldImage:
         self.basedir = basedir
 
         # List of individual JSONs
-        PREFIX = basedir + "resources/images/shield_images/"
+        PREFIX = "resources/images/shield_images/"
         FILELIST = [PREFIX + "bl2_shields.json", PREFIX + "bl3_shields.json",
                     PREFIX + "bltps_shields.json", PREFIX + "blwl_shields.json"]
 
         # Concatenating all JSONs into one block
         self.shields_data = []
         for filename in FILELIST:
-            with open(filename, "r") as f:
-                data = json.load(f)
-                self.shields_data.extend(data)
+            self.shields_data.extend(get_table(basedir, filename))
 
+    @traced("ShieldImage.sample_shield_image")
     def sample_shield_image(self):
-        """ Handles sampling and downloading a relevant Shield image from the games """
+        """
+        Handles sampling and downloading a relevant Shield image from the games
+        :return: (URL of the image, encoded image bytes)
+        """
         url = random.sample(self.shields_data, 1)[0]['image_link']
 
-        # Get image and then save locally temporarily
-        response = requests.get(url, stream=True)
-        img = Image.open(response.raw)
-        img.save(self.basedir + 'output/shields/temporary_shield_image.png')
-        return url
+        # Kept in memory on the item rather than saved to a shared temporary file
+        return url, load_art(url)
@@ -0,0 +1,490 @@
+"""
+@file asset_cache.py
+@author Ryan Missel
+
+Handles pre-optimizing the images of the Gun Cards (i.e. the rarity splashes, the gun, guild, die, and element icons,
+and the gun art) for the box they are placed in. Each asset is resampled to the exact box size at print DPI and
+encoded with whichever of a lossless PNG, a palette PNG, a JPEG, or the original file takes up the least space once
+inserted into the PDF, where the lossy encodings are only considered when they stay visually identical to the
+resampled image.
+
+The encoded bytes are cached in memory for the process and on disk under output/asset_cache/, so the resampling is
+only ever done once per image and box, and the PDF inserts decode a small image rather than the full-resolution one.
+Downloaded art is decoded as it streams in and kept in the same caches at the size of the art box. The overlays are a
+fixed set, while art comes from any file or URL, so the art kept in memory and the disk cache are both bounded, each
+dropping its least recently used entries.
+
+The overlay files themselves are read once per process into a pool, so once an overlay has been encoded for its
+box, placing it on any later card touches neither the file nor the disk cache.
+
+The art of the Shield, Relic, Grenade, and Potion cards is kept on the items as its encoded bytes as given, with the
+most recent art kept in memory per source, so no item writes its art to disk or shares a file with another.
+
+Art sources (local paths, file:// URIs, and http(s) URLs) are classified up front by resolve_source rather than by
+trying to download a path and falling back on the error, and every read of one is held to the same size limit and
+download timeouts.
+"""
+import io
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+# Resolution the assets are resampled to for their box on the card
+PRINT_DPI = 300
+
+# Folder the encoded assets are kept in between runs, relative to the base directory
+CACHE_DIR = "output/asset_cache/"
+
+# Version of the resampling and encoding, part of the disk cache key so changing either invalidates old entries
+PIPELINE_VERSION = 2
+
+# Largest mean per-channel difference (0-255) from the resampled image accepted for the palette encoding
+MAX_PALETTE_ERROR = 2.0
+
+# Quality of the JPEG encoding, only considered for opaque images
+JPEG_QUALITY = 90
+
+# Largest ratio of the original's pixel count to the resampled one's for the original to still be a candidate
+MAX_SOURCE_OVERSIZE = 2.0
+
+# Size of the art box on both Gun Card designs, in points
+GUN_ART_BOX = (400, 250)
+
+# Seconds to wait on the art server for each response, total seconds a download may take, and the most bytes taken
+# from each read of the download, which returns as soon as any data arrives so the deadline is checked after every read
+DOWNLOAD_TIMEOUT = 30
+DOWNLOAD_DEADLINE = 60
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# Largest art file or download accepted, in bytes
+MAX_ART_SIZE = 32 * 1024 * 1024
+
+# Number of item art images, and of gun art encodings, kept in memory
+ART_CACHE_SIZE = 64
+
+# Total size in bytes the disk cache is trimmed to, dropping the least recently used entries first
+DISK_CACHE_SIZE = 64 * 1024 * 1024
+
+# Folders of the card overlays, loaded whole into the source pool
+OVERLAY_FOLDERS = ["rarity_images", "gun_icons", "guild_icons", "die_icons", "element_icons"]
+
+# Pool of the overlay files' bytes, path -> source bytes, read once per process and inherited by forked workers.
+# Filled behind the lock, as the app reads the files on a background thread while cards are being generated
+_sources = {}
+_sources_lock = threading.Lock()
+
+# Encodings of the pooled overlays, (path, box width px, box height px) -> encoded bytes
+_assets = {}
+
+# Encodings of the art, (path or url, box width px, box height px) -> ((mtime ns, file size) of a file or None for a
+# url, encoded bytes), with a file's replaced when it changes, most recent last
+_art_assets = OrderedDict()
+
+# Item art, url or (path, mtime ns, file size) -> encoded bytes as given, most recent last
+_art = OrderedDict()
+
+
+def get_box_pixels(width, height, dpi=PRINT_DPI):
+    """ Pixel size of a box given in points at the given DPI """
+    return max(1, round(width * dpi / 72)), max(1, round(height * dpi / 72))
+
+
+def resample(image, width, height):
+    """
+    Scales the image down to fit in width x height keeping its aspect ratio, as the PDF insert does, and leaves
+    images already smaller than the box at their size
+    :param image: PIL image
+    :param width: box width in pixels
+    :param height: box height in pixels
+    :return: PIL image in RGBA
+    """
+    from PIL import Image
+
+    # Alpha is premultiplied while resampling, so transparent pixels do not bleed their color into the edges. Box
+    # averaging is used over Lanczos, as its ringing adds unique colors along every edge of the flat colored art
+    # that compress far worse in the PDF
+    image = image.convert("RGBa")
+    ratio = min(width / image.width, height / image.height)
+    if ratio < 1:
+        image = image.resize((max(1, round(image.width * ratio)), max(1, round(image.height * ratio))), Image.BOX)
+    return image.convert("RGBA")
+
+
+def mean_difference(image, other):
+    """ Mean per-channel difference between two RGBA images, measured as composited over black """
+    from PIL import Image, ImageChops, ImageStat
+
+    black = Image.new("RGBA", image.size, (0, 0, 0, 255))
+    difference = ImageChops.difference(Image.alpha_composite(black, image), Image.alpha_composite(black, other))
+    return sum(ImageStat.Stat(difference.convert("RGB")).mean) / 3
+
+
+def get_embedded_size(data):
+    """ Number of bytes the encoded image takes up once inserted into a PDF, as fitz re-encodes most formats """
+    import fitz
+
+    document = fitz.open()
+    document.new_page().insert_image(fitz.Rect(0, 0, 100, 100), stream=data)
+    size = len(document.tobytes(garbage=3, deflate=True))
+    document.close()
+    return size
+
+
+def encode(image, source=None):
+    """
+    Encodes the image with whichever accepted encoding takes up the least space in the PDF
+    :param image: resampled PIL image in RGBA
+    :param source: original encoded bytes, also considered when they are not much larger than the resampled image
+    :return: encoded bytes
+    """
+    from PIL import Image
+
+    has_alpha = image.getchannel("A").getextrema()[0] < 255
+    if not has_alpha:
+        image = image.convert("RGB")
+
+    candidates = []
+
+    def save(output_image, **kwargs):
+        stream = io.BytesIO()
+        output_image.save(stream, **kwargs)
+        candidates.append(stream.getvalue())
+
+    # Lossless, always accepted
+    save(image, format="PNG")
+
+    # Palette, accepted if the quantization is not visible
+    palette = image.quantize(256, method=Image.FASTOCTREE)
+    if mean_difference(image.convert("RGBA"), palette.convert("RGBA")) <= MAX_PALETTE_ERROR:
+        save(palette, format="PNG")
+
+    # JPEG, for opaque photo-like images only as it has no alpha and smears flat colors
+    if not has_alpha and image.getcolors(256) is None:
+        save(image, format="JPEG", quality=JPEG_QUALITY, optimize=True)
+
+    # The original, which can compress better than any resampling of it when it is close to the box size already
+    if source is not None:
+        with Image.open(io.BytesIO(source)) as original:
+            if original.width * original.height <= MAX_SOURCE_OVERSIZE * image.width * image.height:
+                candidates.append(source)
+
+    return min(candidates, key=get_embedded_size)
+
+
+def load_sources(base_dir):
+    """
+    Reads every overlay image into the source pool, if not done already this process. Only reads files, so it is
+    safe to run on a background thread, unlike the encoding which uses PyMuPDF.
+    :param base_dir: system executable base directory
+    """
+    with _sources_lock:
+        for folder in OVERLAY_FOLDERS:
+            folder_path = f"{base_dir}resources/images/{folder}/"
+            for name in sorted(os.listdir(folder_path)):
+                if f"{folder_path}{name}" not in _sources:
+                    with open(f"{folder_path}{name}", 'rb') as f:
+                        _sources[f"{folder_path}{name}"] = f.read()
+
+
+def preload_assets(base_dir, boxes, dpi=PRINT_DPI):
+    """
+    Fills the pool with every overlay and its encoding for each box it is placed in, so no later insert reads a file.
+    Called before starting worker processes, which then inherit the pool, or as their initializer otherwise. The
+    encoding uses PyMuPDF, which is not thread-safe, so this must run on the thread that builds the cards.
+    :param base_dir: system executable base directory
+    :param boxes: dictionary of overlay folder to the (width, height) boxes in points its images are placed in
+    :param dpi: resolution to resample to
+    """
+    load_sources(base_dir)
+    with _sources_lock:
+        paths = list(_sources)
+
+    for folder, folder_boxes in boxes.items():
+        prefix = f"{base_dir}resources/images/{folder}/"
+        for path in [path for path in paths if path.startswith(prefix)]:
+            for width, height in folder_boxes:
+                get_asset(base_dir, path, width, height, dpi)
+
+
+def get_asset(base_dir, path, width, height, dpi=PRINT_DPI):
+    """
+    Gets the image at the given path resampled and encoded for a box of the given size, using the cached encoding
+    when there is one
+    :param base_dir: system executable base directory, under which the disk cache is kept
+    :param path: image file of the asset
+    :param width: box width in points
+    :param height: box height in points
+    :param dpi: resolution to resample to
+    :return: encoded image bytes
+    """
+    box_width, box_height = get_box_pixels(width, height, dpi)
+
+    # Pooled resources are immutable, so are looked up without touching the file. Any other file is encoded again
+    # when its modification time or size changes, replacing its old encoding
+    key = (path, box_width, box_height)
+    source = _sources.get(path)
+    if source is not None:
+        data = _assets.get(key)
+        if data is not None:
+            return data
+    else:
+        stat = os.stat(path)
+        if stat.st_size > MAX_ART_SIZE:
+            raise ValueError(f"Art file is larger than {MAX_ART_SIZE} bytes: {path}")
+
+        entry = _art_assets.get(key)
+        if entry is not None and entry[0] == (stat.st_mtime_ns, stat.st_size):
+            _art_assets.move_to_end(key)
+            return entry[1]
+
+    if source is None:
+        with open(path, 'rb') as f:
+            source = f.read()
+
+    def open_image():
+        from PIL import Image
+        return Image.open(io.BytesIO(source))
+
+    digest = hashlib.blake2b(source, digest_size=16)
+    data = get_encoding(base_dir, digest, box_width, box_height, open_image, source)
+    if path in _sources:
+        _assets[key] = data
+    else:
+        keep_art(key, (stat.st_mtime_ns, stat.st_size), data)
+    return data
+
+
+def keep_art(key, version, data):
+    """ Keeps an art encoding in memory, dropping the least recently used ones past ART_CACHE_SIZE """
+    _art_assets[key] = (version, data)
+    _art_assets.move_to_end(key)
+    while len(_art_assets) > ART_CACHE_SIZE:
+        _art_assets.popitem(last=False)
+
+
+def get_encoding(base_dir, digest, box_width, box_height, open_image, source=None):
+    """
+    Gets the encoding of an image for a box from the disk cache, or resamples and encodes it into the disk cache
+    :param base_dir: system executable base directory, under which the disk cache is kept
+    :param digest: blake2b hash of the image's source bytes, naming the disk entry so edited images are redone
+    :param box_width: box width in pixels
+    :param box_height: box height in pixels
+    :param open_image: function giving the decoded PIL image, only called when the entry is not on disk
+    :param source: original encoded bytes, if they are still at hand
+    :return: encoded image bytes
+    """
+    digest = digest.copy()
+    digest.update(f"{PIPELINE_VERSION}:{box_width}x{box_height}".encode())
+    cache_path = f"{base_dir}{CACHE_DIR}{digest.hexdigest()}"
+
+    if os.path.exists(cache_path):
+        with open(cache_path, 'rb') as f:
+            data = f.read()
+
+        # Marked as used, so it is among the last entries trimmed
+        try:
+            os.utime(cache_path)
+        except OSError:
+            pass
+        return data
+
+    data = encode(resample(open_image(), box_width, box_height), source)
+
+    # Written to a temporary name unique to the process and thread first, so no other reader sees a partial entry. The
+    # disk cache is only an optimization, so an unwritable base directory (i.e. a read-only server install) just goes
+    # without it
+    temp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.makedirs(f"{base_dir}{CACHE_DIR}", exist_ok=True)
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, cache_path)
+        trim_disk_cache(base_dir)
+    except OSError:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return data
+
+
+def trim_disk_cache(base_dir, max_size=None):
+    """
+    Removes the least recently used entries of the disk cache until it is no larger than the given size
+    :param base_dir: system executable base directory, under which the disk cache is kept
+    :param max_size: size in bytes to trim to, defaulting to DISK_CACHE_SIZE
+    """
+    max_size = DISK_CACHE_SIZE if max_size is None else max_size
+
+    entries = []
+    with os.scandir(f"{base_dir}{CACHE_DIR}") as scan:
+        for entry in scan:
+            if entry.is_file() and not entry.name.endswith(".tmp"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_size:
+            break
+        try:
+            os.remove(path)
+            total -= size
+        except FileNotFoundError:
+            pass
+
+
+def download_art(base_dir, url, width, height, dpi=PRINT_DPI):
+    """
+    Downloads the art at the given URL fitted to a box of the given size and encoded, decoding the image as its
+    chunks arrive rather than after the whole file is saved. The result is kept per URL and box among the most
+    recent art, so the same art is not downloaded again (i.e. sampled for the Gun and then placed on its card).
+    :param base_dir: system executable base directory, under which the disk cache is kept
+    :param url: http(s) URL of the image
+    :param width: box width in points
+    :param height: box height in points
+    :param dpi: resolution to resample to
+    :return: encoded image bytes
+    """
+    box_width, box_height = get_box_pixels(width, height, dpi)
+    key = (url, box_width, box_height)
+
+    entry = _art_assets.get(key)
+    if entry is not None:
+        _art_assets.move_to_end(key)
+        return entry[1]
+
+    from PIL import ImageFile
+
+    parser = ImageFile.Parser()
+    digest = hashlib.blake2b(digest_size=16)
+    chunks = []
+    for chunk in iter_download(url):
+        digest.update(chunk)
+        parser.feed(chunk)
+        chunks.append(chunk)
+    image = parser.close()
+
+    data = get_encoding(base_dir, digest, box_width, box_height, lambda: image, b"".join(chunks))
+    keep_art(key, None, data)
+    return data
+
+
+def resolve_source(source):
+    """
+    Classifies an art source by its form alone, without opening or downloading it
+    :param source: local path, file:// URI, or http(s) URL of an image
+    :return: ("file", local path) or ("url", URL)
+    :raises: ValueError for empty sources and unsupported schemes, FileNotFoundError for missing local files
+    """
+    from urllib.parse import urlparse
+    from urllib.request import url2pathname
+
+    source = "" if source is None else str(source).strip()
+    if source == "":
+        raise ValueError("No art source given")
+
+    parsed = urlparse(source)
+    scheme = parsed.scheme.lower()
+    if scheme in ["http", "https"]:
+        return "url", source
+
+    # Paths have no scheme, other than the drive letter of Windows paths
+    if scheme == "file":
+        path = url2pathname(parsed.path)
+    elif len(scheme) <= 1:
+        path = source
+    else:
+        raise ValueError(f"Unsupported art source: {source}")
+
+    if not os.path.isfile(path):
+        raise FileNotFoundError(f"No art file at: {path}")
+    return "file", path
+
+
+def iter_download(url):
+    """
+    Streams the file at a URL in chunks, holding it to the download timeouts and the art size limit. Each chunk is a
+    single read of whatever has arrived, rather than a full chunk, so a server sending the art a few bytes at a time
+    still hits the deadline
+    :param url: http(s) URL
+    :return: generator of the chunks' bytes
+    :raises: a requests exception on failed requests, a urllib3 exception on failed reads, TimeoutError past the
+        deadline, ValueError past the size limit
+    """
+    import requests
+
+    deadline = time.monotonic() + DOWNLOAD_DEADLINE
+    with requests.get(url, stream=True, timeout=DOWNLOAD_TIMEOUT) as response:
+        response.raise_for_status()
+        if int(response.headers.get("Content-Length") or 0) > MAX_ART_SIZE:
+            raise ValueError(f"Art is larger than {MAX_ART_SIZE} bytes: {url}")
+
+        size = 0
+        while True:
+            chunk = response.raw.read1(DOWNLOAD_CHUNK_SIZE, decode_content=True)
+            if len(chunk) == 0:
+                break
+
+            size += len(chunk)
+            if size > MAX_ART_SIZE:
+                raise ValueError(f"Art is larger than {MAX_ART_SIZE} bytes: {url}")
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Art took longer than {DOWNLOAD_DEADLINE}s to download: {url}")
+            yield chunk
+
+
+def load_art(source):
+    """
+    Gets the encoded bytes of the item art at a local path, file:// URI, or URL, as given rather than resampled, since
+    the cards scale it themselves. The most recent art is kept per source, so art given or sampled again is neither
+    read nor downloaded again.
+    :param source: image file, file:// URI, or http(s) URL of the image
+    :return: encoded image bytes
+    :raises: ValueError or OSError if the source cannot be used or is not an image, or a requests exception
+    """
+    from PIL import Image
+
+    kind, location = resolve_source(source)
+    if kind == "file":
+        stat = os.stat(location)
+        if stat.st_size > MAX_ART_SIZE:
+            raise ValueError(f"Art file is larger than {MAX_ART_SIZE} bytes: {location}")
+        key = (location, stat.st_mtime_ns, stat.st_size)
+    else:
+        key = location
+
+    data = _art.get(key)
+    if data is not None:
+        _art.move_to_end(key)
+        return data
+
+    if kind == "file":
+        with open(location, 'rb') as f:
+            data = f.read()
+    else:
+        data = b"".join(iter_download(location))
+
+    # Checked without decoding the pixels, so files and responses that are not images are refused cheaply
+    with Image.open(io.BytesIO(data)) as image:
+        image.verify()
+
+    _art[key] = data
+    while len(_art) > ART_CACHE_SIZE:
+        _art.popitem(last=False)
+    return data
+
+
+def clear_asset_cache(base_dir=None):
+    """
+    Drops every asset cached in memory and the source pool, and the disk cache too if a base directory is given
+    :param base_dir: system executable base directory of the disk cache to remove
+    """
+    _assets.clear()
+    _art_assets.clear()
+    _sources.clear()
+    _art.clear()
+    if base_dir is not None and os.path.isdir(f"{base_dir}{CACHE_DIR}"):
+        for name in os.listdir(f"{base_dir}{CACHE_DIR}"):
+            os.remove(f"{base_dir}{CACHE_DIR}{name}")
@@ -0,0 +1,343 @@
+"""
+@file dice_engine.py
+@author Ryan Missel
+
+Handles parsing the dice strings used across the item tables (e.g. "2d8", "(+1d6)", "+2d6", "Health Potion (3d8+10)")
+and computing the exact distribution of their outcomes for expected-damage and percentile displays.
+
+Distributions are built by convolving the single-die PMFs with NumPy, switching to an FFT convolution for large
+pools, and are cached by their normalized expression so repeated lookups over large batches are cheap.
+"""
+import re
+from functools import lru_cache
+
+import numpy as np
+
+
+# Convolutions where both sides have more outcomes than this are done via the FFT instead of directly
+FFT_THRESHOLD = 256
+
+# Largest number of distinct outcomes a single distribution may have, guards against absurd custom dice
+MAX_OUTCOMES = 1_000_000
+
+# Matches the first full dice expression within a string, i.e. "2d8+5" out of "Regens 2d8+5 Health." A die needs a
+# count or a sign before it and word boundaries around it, so prose such as "Gained 5 HP" or "Add 21 Damage" is not
+# read as dice
+EXPRESSION_PATTERN = re.compile(r"(?:[+-]\s*\d*|\b\d+)d\d+\b(?:\s*[+-]\s*(?:\d*d\d+|\d+)\b)*", re.IGNORECASE)
+
+# Matches the individual signed terms of an expression, either dice ("-2d6") or flat modifiers ("+10")
+TERM_PATTERN = re.compile(r"([+-]?)\s*(?:(\d*)\s*d\s*(\d+)|(\d+))", re.IGNORECASE)
+
+
+def merge_dice(dice):
+    """
+    Combines dice terms of the same size and sign, keeping added and subtracted dice of a size as separate pools so
+    they stay independent rolls rather than cancelling out, i.e. "2d6-1d6" is not "1d6"
+    :param dice: iterable of (count, sides) pairs, with a negative count for subtracted dice
+    :return: tuple of (count, sides) pairs, largest dice first and added before subtracted
+    """
+    pools = {}
+    for count, sides in dice:
+        if count != 0:
+            key = (sides, count > 0)
+            pools[key] = pools.get(key, 0) + count
+    return tuple((count, sides) for (sides, _), count in sorted(pools.items(), reverse=True))
+
+
+class DiceExpression:
+    def __init__(self, dice, modifier):
+        """
+        Holds a parsed dice expression as its dice terms and flat modifier
+        :param dice: tuple of (count, sides) pairs, with a negative count for subtracted dice
+        :param modifier: flat integer modifier added to the roll
+        """
+        self.dice = dice
+        self.modifier = modifier
+
+    @property
+    def key(self):
+        """ Normalized string form of the expression, used as the cache key for its distribution """
+        terms = []
+        for count, sides in self.dice:
+            terms.append(f"{'-' if count < 0 else '+'}{abs(count)}d{sides}")
+
+        if self.modifier != 0 or len(terms) == 0:
+            terms.append(f"{'-' if self.modifier < 0 else '+'}{abs(self.modifier)}")
+
+        key = ''.join(terms)
+        return key[1:] if key.startswith('+') else key
+
+    def scaled(self, factor):
+        """
+        Gets the expression for rolling this one the given number of times and summing, i.e. 3 x "2d8+1" = "6d8+3"
+        :param factor: non-negative integer number of repeats
+        :return: DiceExpression
+        """
+        return DiceExpression(tuple((count * factor, sides) for count, sides in self.dice if factor != 0),
+                              self.modifier * factor)
+
+    def __add__(self, other):
+        """ Gets the expression for rolling both expressions and summing them, i.e. "2d8" + "1d6+2" = "2d8+1d6+2" """
+        return DiceExpression(merge_dice(self.dice + other.dice), self.modifier + other.modifier)
+
+    def __str__(self):
+        return self.key
+
+
+class DiceDistribution:
+    def __init__(self, offset, pmf):
+        """
+        Exact distribution of a dice expression, stored as a PMF over the integers [offset, offset + len(pmf))
+        :param offset: smallest possible outcome
+        :param pmf: probability of each outcome, starting at the offset
+        """
+        self.offset = offset
+        self.pmf = pmf
+        self.pmf.setflags(write=False)
+
+        self.values = np.arange(offset, offset + len(pmf))
+        self.values.setflags(write=False)
+
+        self.cdf = np.cumsum(pmf)
+        self.cdf.setflags(write=False)
+
+    @property
+    def minimum(self):
+        return int(self.offset)
+
+    @property
+    def maximum(self):
+        return int(self.offset + len(self.pmf) - 1)
+
+    @property
+    def mean(self):
+        return float(np.dot(self.values, self.pmf))
+
+    @property
+    def variance(self):
+        return float(np.dot((self.values - self.mean) ** 2, self.pmf))
+
+    @property
+    def std(self):
+        return float(np.sqrt(self.variance))
+
+    def percentile(self, q):
+        """
+        Gets the smallest outcome whose cumulative probability reaches the given percentile(s)
+        :param q: percentile or array of percentiles in [0, 100]
+        :return: outcome(s) at the percentile
+        """
+        idx = np.searchsorted(self.cdf, np.asarray(q, dtype=float) / 100.0 - 1e-12, side='left')
+        idx = np.minimum(idx, len(self.pmf) - 1)
+        if np.ndim(idx) == 0:
+            return int(self.values[idx])
+        return self.values[idx]
+
+    def probability_at_least(self, value):
+        """ Probability that a roll meets or beats the given value """
+        idx = int(value) - self.offset
+        if idx <= 0:
+            return 1.0
+        if idx >= len(self.pmf):
+            return 0.0
+        return float(1.0 - self.cdf[idx - 1])
+
+    def sample(self, size=None, rng=None):
+        """ Draws rolls from the exact distribution, useful for simulating many items at once """
+        rng = np.random.default_rng() if rng is None else rng
+        return rng.choice(self.values, size=size, p=self.pmf)
+
+
+def convolve(a, b):
+    """
+    Convolves two PMFs, using the FFT when both are large enough for it to win over direct convolution
+    :param a: first PMF
+    :param b: second PMF
+    :return: PMF of the sum
+    """
+    if min(len(a), len(b)) <= FFT_THRESHOLD:
+        return np.convolve(a, b)
+
+    size = len(a) + len(b) - 1
+    result = np.fft.irfft(np.fft.rfft(a, size) * np.fft.rfft(b, size), size)
+
+    # Clear out the floating point noise the FFT leaves around zero-probability outcomes
+    result[result < 1e-15] = 0.0
+    return result / result.sum()
+
+
+@lru_cache(maxsize=256)
+def _dice_pool(count, sides):
+    """ PMF of the sum of count dice with the given sides, built by repeated squaring of the single die PMF """
+    result = np.ones(1)
+    base = np.full(sides, 1.0 / sides)
+    while count > 0:
+        if count & 1:
+            result = convolve(result, base)
+        count >>= 1
+        if count > 0:
+            base = convolve(base, base)
+
+    result.setflags(write=False)
+    return result
+
+
+def _parse_terms(expression_string):
+    """
+    Splits an expression string into its combined dice terms and flat modifier
+    :param expression_string: expression such as "3d8+10" or "-1d4+2d4"
+    :return: DiceExpression
+    """
+    dice = []
+    modifier = 0
+    for sign, count, sides, value in TERM_PATTERN.findall(expression_string):
+        direction = -1 if sign == '-' else 1
+
+        if sides != '':
+            count = int(count) if count != '' else 1
+            sides = int(sides)
+            if count == 0 or sides == 0:
+                continue
+            dice.append((direction * count, sides))
+        else:
+            modifier += direction * int(value)
+
+    return DiceExpression(merge_dice(dice), modifier)
+
+
+@lru_cache(maxsize=4096)
+def parse_dice(text):
+    """
+    Parses the first dice expression found in a string into its dice terms and modifier.
+    Handles the formats used in the tables, e.g. "2d8", "(+1d6)", "+2d6", "Health Potion (3d8+10)", "Regens 2d8+5."
+    :param text: string containing a dice expression
+    :return: DiceExpression, or None if the string has no dice in it
+    """
+    if text is None:
+        return None
+
+    match = EXPRESSION_PATTERN.search(str(text))
+    if match is None:
+        return None
+    return _parse_terms(match.group(0))
+
+
+@lru_cache(maxsize=1024)
+def _distribution_for_key(key):
+    """ Builds the exact distribution of a normalized expression key; cached so each unique expression is built once """
+    expression = _parse_terms(key)
+    if sum(abs(count) * (sides - 1) for count, sides in expression.dice) + 1 > MAX_OUTCOMES:
+        raise ValueError(f"Dice expression {key} has too many outcomes to build its distribution!")
+
+    offset = expression.modifier
+    pmf = np.ones(1)
+    for count, sides in expression.dice:
+        pool = _dice_pool(abs(count), sides)
+        if count > 0:
+            offset += count
+        else:
+            # Subtracted dice are the mirrored pool, starting at -count * sides
+            pool = pool[::-1]
+            offset -= abs(count) * sides
+        pmf = convolve(pmf, pool)
+
+    return DiceDistribution(offset, np.array(pmf))
+
+
+def get_distribution(text):
+    """
+    Gets the exact outcome distribution of the dice expression found in a string
+    :param text: string containing a dice expression, e.g. "2d8" or "Health Potion (3d8+10)"
+    :return: DiceDistribution, or None if no dice expression was found
+    """
+    expression = parse_dice(text)
+    if expression is None:
+        return None
+    return _distribution_for_key(expression.key)
+
+
+def get_expression_distribution(expression):
+    """
+    Gets the exact outcome distribution of an already parsed (or built) DiceExpression
+    :param expression: DiceExpression
+    :return: DiceDistribution
+    """
+    return _distribution_for_key(expression.key)
+
+
+@lru_cache(maxsize=4096)
+def expected_value(text):
+    """
+    Closed-form expected value of the dice expression in a string, without building its distribution
+    :param text: string containing a dice expression
+    :return: expected value, or 0.0 if no dice expression was found
+    """
+    expression = parse_dice(text)
+    if expression is None:
+        return 0.0
+    return float(expression.modifier + sum(count * (sides + 1) / 2 for count, sides in expression.dice))
+
+
+def expected_values(texts):
+    """
+    Vectorized expected values over a batch of dice strings, e.g. the damage column of a million generated guns.
+    Only the unique strings are parsed, so the cost scales with the table size rather than the batch size.
+    :param texts: iterable of dice strings
+    :return: numpy array of expected values
+    """
+    unique, inverse = np.unique(np.asarray(list(texts), dtype=str), return_inverse=True)
+    means = np.array([expected_value(text) for text in unique], dtype=float)
+    return means[inverse]
+
+
+def combine(*texts):
+    """
+    Gets the distribution of the sum of several dice strings, e.g. a gun's base damage plus its element bonus
+    :param texts: dice strings, entries without dice are ignored
+    :return: DiceDistribution, or None if none of the strings contain dice
+    """
+    expressions = [parse_dice(text) for text in texts]
+    expressions = [expression for expression in expressions if expression is not None]
+    if len(expressions) == 0:
+        return None
+
+    key = '+'.join(expression.key for expression in expressions)
+    return _distribution_for_key(_parse_terms(key).key)
+
+
+def mixture(distributions, weights):
+    """
+    Gets the distribution of picking one of several distributions at random, e.g. damage over the accuracy bands
+    :param distributions: list of DiceDistributions
+    :param weights: probability of each distribution being picked, summing to one
+    :return: DiceDistribution
+    """
+    offset = min(distribution.minimum for distribution in distributions)
+    size = max(distribution.maximum for distribution in distributions) - offset + 1
+
+    pmf = np.zeros(size)
+    for distribution, weight in zip(distributions, weights):
+        start = distribution.minimum - offset
+        pmf[start:start + len(distribution.pmf)] += weight * distribution.pmf
+
+    return DiceDistribution(offset, pmf)
+
+
+def describe_dice(*texts, low=10, high=90):
+    """
+    Builds a short display string of the expected value and percentile range of the given dice strings
+    :param texts: dice strings to sum, e.g. "2d8" and "(+1d6)"
+    :param low: lower percentile to show
+    :param high: upper percentile to show
+    :return: string such as "Avg 12.5 (8-17)", or "" if no dice were found
+    """
+    try:
+        distribution = combine(*texts)
+    except ValueError:
+        return f"Avg {sum(expected_value(text) for text in texts):.1f}"
+
+    if distribution is None:
+        return ""
+
+    lower, upper = distribution.percentile([low, high])
+    return f"Avg {distribution.mean:.1f} ({lower}-{upper})"
@@ -0,0 +1,83 @@
+"""
+@file font_metrics.py
+@author Ryan Missel
+
+Handles the metrics of the standard Helvetica fonts the card form fields are written in, used to measure text for
+laying it out (see text_layout.py) and to draw the fields' appearance streams without relying on a PDF viewer.
+
+The glyph widths are read from MuPDF's built-in copies of the fonts, which share the metrics of the standard PDF
+fonts, once per font per process and kept for every later measurement. Text is measured in its WinAnsi encoding, the
+encoding the fields' fonts are written with.
+"""
+
+
+# Standard PDF fonts of the card fields, by their PostScript name, to MuPDF's built-in copy of each
+FONT_NAMES = {
+    "Helvetica": "helv",
+    "Helvetica-Bold": "hebo",
+    "Helvetica-Oblique": "heit",
+    "Helvetica-BoldOblique": "hebi"
+}
+
+# Font used for any name not in FONT_NAMES, i.e. the template's /Helv alias
+DEFAULT_FONT = "Helvetica"
+
+# Ascender and descender of the Helvetica family, in thousandths of the font size
+ASCENT = 718
+DESCENT = -207
+
+# Glyph widths of each font, font name -> list of the 256 WinAnsi codes' widths in thousandths of the font size
+_widths = {}
+
+
+def get_font_name(font_name):
+    """ Standard font name the given font resource name is drawn with """
+    font_name = font_name.lstrip("/")
+    return font_name if font_name in FONT_NAMES else DEFAULT_FONT
+
+
+def encode_text(text):
+    """ Encodes text in WinAnsi (cp1252), replacing characters the standard fonts have no glyph for with '?' """
+    return str(text).encode("cp1252", errors="replace")
+
+
+def get_widths(font_name):
+    """
+    Gets the glyph widths of a font, reading them from its built-in copy the first time
+    :param font_name: PostScript name of the font, or a resource name for it
+    :return: list of the widths of the 256 WinAnsi codes in thousandths of the font size
+    """
+    font_name = get_font_name(font_name)
+
+    widths = _widths.get(font_name)
+    if widths is not None:
+        return widths
+
+    import fitz
+
+    font = fitz.Font(FONT_NAMES[font_name])
+    widths = []
+    for code in range(256):
+        character = bytes([code]).decode("cp1252", errors="replace")
+        widths.append(round(font.glyph_advance(ord(character)) * 1000) if code >= 32 else 0)
+
+    _widths[font_name] = widths
+    return widths
+
+
+def get_text_width(text, font_name, font_size):
+    """
+    Width of a line of text in points
+    :param text: line to measure
+    :param font_name: PostScript name of the font, or a resource name for it
+    :param font_size: font size in points
+    :return: width in points
+    """
+    widths = get_widths(font_name)
+    return sum(widths[code] for code in encode_text(text)) * font_size / 1000
+
+
+def get_line_height(font_size):
+    """ Height of a single line of text from its descender to its ascender, in points """
+    return (ASCENT - DESCENT) * font_size / 1000
+
@@ -0,0 +1,160 @@
+"""
+@file print_sheet.py
+@author Ryan Missel
+
+Handles imposing many generated card PDFs N-up onto print sheets (i.e. 9 cards per Letter or A4 page) with cut marks,
+written out as a single PDF.
+
+Every card has its form fields drawn into its page and is placed as a Form XObject of that page. The sheet is saved
+with MuPDF's garbage collection at its highest level, which merges identical streams, so the rarity splashes, icons,
+and template shared by many cards are stored once in the sheet rather than once per card and a large print job is a
+fraction of the single PDFs' size.
+"""
+from classes.tracing import traced
+
+
+# Paper sizes in points, portrait
+PAPER_SIZES = {
+    "letter": (612, 792),
+    "a4": (595, 842)
+}
+
+# Page margin kept clear for the cut marks, and the length of each mark, in points
+MARGIN = 18
+CUT_MARK_LENGTH = 12
+
+
+def get_sheet_layout(card_width, card_height, paper="letter", columns=3, rows=3):
+    """
+    Works out the orientation of the paper and where the cards go, with the cards scaled to the largest size where
+    the grid of them fits inside the margins
+    :param card_width: width of a card page in points
+    :param card_height: height of a card page in points
+    :param paper: key of PAPER_SIZES
+    :param columns: number of cards across the sheet
+    :param rows: number of cards down the sheet
+    :return: (sheet width, sheet height, list of card cells as (x0, y0, x1, y1) in row-major order)
+    """
+    if paper not in PAPER_SIZES:
+        raise ValueError(f"Unknown paper size {paper}, expected one of {list(PAPER_SIZES.keys())}!")
+
+    # Use whichever orientation fits the cards largest
+    best = None
+    for width, height in [PAPER_SIZES[paper], PAPER_SIZES[paper][::-1]]:
+        scale = min((width - 2 * MARGIN) / (columns * card_width), (height - 2 * MARGIN) / (rows * card_height))
+        if best is None or scale > best[0]:
+            best = (scale, width, height)
+    scale, width, height = best
+
+    # Cards are butted against each other in a grid centered on the sheet, so each cut is shared by two cards
+    cell_width, cell_height = card_width * scale, card_height * scale
+    left = (width - columns * cell_width) / 2
+    top = (height - rows * cell_height) / 2
+
+    cells = []
+    for row in range(rows):
+        for column in range(columns):
+            x0, y0 = left + column * cell_width, top + row * cell_height
+            cells.append((x0, y0, x0 + cell_width, y0 + cell_height))
+    return width, height, cells
+
+
+def draw_cut_marks(page, cells, columns, rows):
+    """
+    Draws cut marks in the margin around the grid, lined up with every cut between and around the cards
+    :param page: sheet page to draw on
+    :param cells: card cells from get_sheet_layout
+    :param columns: number of cards across the sheet
+    :param rows: number of cards down the sheet
+    """
+    import fitz
+
+    left, top = cells[0][0], cells[0][1]
+    right, bottom = cells[-1][2], cells[-1][3]
+    xs = [cells[column][0] for column in range(columns)] + [right]
+    ys = [cells[row * columns][1] for row in range(rows)] + [bottom]
+
+    shape = page.new_shape()
+    for x in xs:
+        shape.draw_line(fitz.Point(x, top - 2 - CUT_MARK_LENGTH), fitz.Point(x, top - 2))
+        shape.draw_line(fitz.Point(x, bottom + 2), fitz.Point(x, bottom + 2 + CUT_MARK_LENGTH))
+    for y in ys:
+        shape.draw_line(fitz.Point(left - 2 - CUT_MARK_LENGTH, y), fitz.Point(left - 2, y))
+        shape.draw_line(fitz.Point(right + 2, y), fitz.Point(right + 2 + CUT_MARK_LENGTH, y))
+    shape.finish(color=(0, 0, 0), width=0.5)
+    shape.commit()
+
+
+def bake_card(card):
+    """
+    Draws the filled form fields of a card into its pages, as the fields are annotations that a placed page leaves
+    behind. Cards that leave their appearances to the viewer (i.e. filled before fill_pdf drew them) have them
+    generated first.
+    :param card: opened card PDF
+    """
+    if card.xref_get_key(card.pdf_catalog(), "AcroForm/NeedAppearances")[1] == "true":
+        for page in card:
+            for widget in page.widgets():
+                # Some template fields give white as 255 rather than 1
+                widget.text_color = [min(component, 1) for component in widget.text_color]
+                widget.update()
+    card.bake()
+
+
+@traced("print_sheet.impose_cards")
+def impose_cards(card_pdfs, output_path, paper="letter", columns=3, rows=3, cut_marks=True):
+    """
+    Imposes the given card PDFs N-up onto print sheets saved as a single PDF.
+
+    Multi-page cards (i.e. the 2-page design) get a sheet per page of theirs, with the columns of every back sheet
+    mirrored so the backs line up with their fronts when printed double-sided and flipped on the long edge.
+    :param card_pdfs: card PDFs to place, in order, each given as its path or as its bytes
+    :param output_path: filename to save the sheets as
+    :param paper: key of PAPER_SIZES
+    :param columns: number of cards across each sheet
+    :param rows: number of cards down each sheet
+    :param cut_marks: whether to draw cut marks around the cards
+    :return: number of sheet pages saved
+    """
+    import fitz
+
+    if len(card_pdfs) == 0:
+        raise ValueError("No card PDFs given to impose!")
+
+    cards = [fitz.open(stream=pdf, filetype="pdf") if isinstance(pdf, bytes) else fitz.open(pdf) for pdf in card_pdfs]
+    try:
+        for card in cards:
+            bake_card(card)
+
+        # The grid is sized from the first card, with any differently sized card fit into its cell
+        card_rect = cards[0][0].rect
+        width, height, cells = get_sheet_layout(card_rect.width, card_rect.height, paper, columns, rows)
+        num_sides = max(len(card) for card in cards)
+
+        sheet = fitz.open()
+        per_sheet = columns * rows
+        for start in range(0, len(cards), per_sheet):
+            for side in range(num_sides):
+                page = sheet.new_page(width=width, height=height)
+
+                for idx, card in enumerate(cards[start:start + per_sheet]):
+                    if side >= len(card):
+                        continue
+
+                    row, column = divmod(idx, columns)
+                    if side % 2 == 1:
+                        column = columns - 1 - column
+                    page.show_pdf_page(fitz.Rect(cells[row * columns + column]), card, side)
+
+                if cut_marks:
+                    draw_cut_marks(page, cells, columns, rows)
+
+        # Garbage collection level 4 merges the duplicated image streams copied in from each card
+        num_pages = len(sheet)
+        sheet.save(output_path, garbage=4, deflate=True)
+        sheet.close()
+    finally:
+        for card in cards:
+            card.close()
+
+    return num_pages
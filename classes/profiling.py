@@ -0,0 +1,145 @@
+"""
+@file profiling.py
+@author Ryan Missel
+
+Opt-in profiling mode for single generations and batch runs, so that a regression in i.e. Gun.__init__ or GunPDF can be
+diagnosed without attaching external tools.
+
+Each profiled run is wrapped in cProfile and tracemalloc, and saves three files under output/profiles/:
+    - <name>_<timestamp>.pstats, loadable with pstats or snakeviz
+    - <name>_<timestamp>.snapshot, a tracemalloc snapshot loadable with tracemalloc.Snapshot.load
+    - <name>_<timestamp>.txt, the top-N hot functions and allocation sites, which is also printed
+"""
+import os
+import io
+import time
+import pstats
+import cProfile
+import tracemalloc
+from functools import wraps
+
+
+# Whether functions wrapped with profiled() are profiled, and where their results go
+_enabled = False
+_settings = {"output_dir": "output/profiles/", "top": 20}
+
+# Guards against nesting, as only one profiler can be active at a time
+_active = False
+
+
+def enable(output_dir="output/profiles/", top=20):
+    """
+    Turns on profiling for every function wrapped with profiled()
+    :param output_dir: folder the profile files are saved to
+    :param top: number of hot functions and allocation sites to report
+    """
+    global _enabled
+    _settings.update(output_dir=output_dir, top=top)
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    return _enabled
+
+
+class ProfileRun:
+    def __init__(self, name, output_dir="output/profiles/", top=20, verbose=True):
+        """
+        Context manager that profiles the enclosed block with cProfile and tracemalloc
+        :param name: name of the run, used as the file prefix
+        :param output_dir: folder the profile files are saved to
+        :param top: number of hot functions and allocation sites to report
+        :param verbose: whether to print the report when the run finishes
+        """
+        self.name = name
+        self.output_dir = output_dir
+        self.top = top
+        self.verbose = verbose
+
+        self.paths = {}
+        self.report = ""
+
+    def __enter__(self):
+        global _active
+        _active = True
+
+        # Only stop tracemalloc afterwards if it was not already tracing
+        self.started_tracemalloc = not tracemalloc.is_tracing()
+        if self.started_tracemalloc:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+
+        self.profiler = cProfile.Profile()
+        self.start = time.perf_counter()
+        self.profiler.enable()
+        return self
+
+    def __exit__(self, *exc):
+        global _active
+        self.profiler.disable()
+        self.elapsed = time.perf_counter() - self.start
+
+        self.peak = tracemalloc.get_traced_memory()[1]
+        snapshot = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>")
+        ])
+        if self.started_tracemalloc:
+            tracemalloc.stop()
+        _active = False
+
+        self.save(snapshot)
+        if self.verbose:
+            print(self.report)
+        return False
+
+    def save(self, snapshot):
+        """ Saves the pstats, allocation snapshot, and text report of the run """
+        os.makedirs(self.output_dir, exist_ok=True)
+        stamp = f"{time.strftime('%Y%m%d-%H%M%S')}-{int(time.time() * 1000) % 1000:03d}"
+        prefix = os.path.join(self.output_dir, f"{self.name}_{stamp}")
+        self.paths = {"pstats": f"{prefix}.pstats", "snapshot": f"{prefix}.snapshot", "report": f"{prefix}.txt"}
+
+        self.profiler.dump_stats(self.paths['pstats'])
+        snapshot.dump(self.paths['snapshot'])
+
+        # Hot functions by cumulative time
+        stream = io.StringIO()
+        stats = pstats.Stats(self.profiler, stream=stream)
+        stats.strip_dirs().sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.top)
+
+        # Allocation sites still holding memory at the end of the run
+        lines = [f"Profile of '{self.name}' ({self.elapsed:.3f}s, {self.peak / 1024 ** 2:.1f} MiB peak traced)", "",
+                 f"Top {self.top} functions by cumulative time:", stream.getvalue().strip(), "",
+                 f"Top {self.top} allocation sites:"]
+        for stat in snapshot.statistics('lineno')[:self.top]:
+            frame = stat.traceback[0]
+            lines.append(f"{stat.size / 1024:10.1f} KiB {stat.count:8d} blocks  {frame.filename}:{frame.lineno}")
+
+        self.report = '\n'.join(lines) + '\n'
+        with open(self.paths['report'], 'w') as f:
+            f.write(self.report)
+
+
+def profiled(name=None):
+    """
+    Decorator profiling every call of the wrapped function while profiling is enabled
+    :param name: name of the run, defaulting to the function name
+    """
+    def decorator(func):
+        run_name = name or func.__name__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled or _active:
+                return func(*args, **kwargs)
+
+            with ProfileRun(run_name, _settings['output_dir'], _settings['top']):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
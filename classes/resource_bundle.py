@@ -0,0 +1,158 @@
+"""
+@file resource_bundle.py
+@author Ryan Missel
+
+Handles compiling the JSON tables under resources/ into a single versioned binary bundle for the frozen builds, so
+the app reads one file at startup instead of parsing dozens of small JSON files.
+
+The bundle is a short header (magic bytes and format version) followed by a pickle of every table keyed by its path
+relative to the base directory, i.e. "resources/guns/gun_cost.json", along with the size, modification time, and hash
+of each JSON source it was compiled from. Every string in the tables is interned before pickling, so repeated keys and
+values like rarities, guilds, and element names are stored and loaded only once.
+
+The JSON sources ship beside the bundle and stay editable, so a table whose source has since been changed is dropped
+from the loaded bundle and read from its JSON file instead.
+
+The bundle is only produced by the build step (python -m tools.build_resource_bundle), so in development it does not
+exist and the registry reads the JSON sources directly.
+"""
+import os
+import sys
+import pickle
+import hashlib
+
+from classes.json_reader import get_file_data
+
+
+# Bumped whenever the layout of the bundle changes, so stale bundles are ignored rather than misread
+BUNDLE_VERSION = 2
+BUNDLE_MAGIC = b"BNBRES"
+
+# Where the build step writes the bundle, relative to the base directory
+BUNDLE_PATH = "resources/resources.bundle"
+
+# Folders and files compiled into the bundle; the user-editable CONFIG.json files are left out
+BUNDLE_SOURCES = [
+    "resources/guns", "resources/elements", "resources/misc", "resources/chests",
+    "resources/images/gun_images", "resources/images/shield_images", "resources/images/relic_images",
+    "resources/images/grenade_images", "resources/images/potion_images",
+    "resources/badass_rank.json", "resources/enemy_drop.json"
+]
+
+
+def intern_strings(value):
+    """ Recursively interns every string key and value of a parsed JSON table """
+    if isinstance(value, str):
+        return sys.intern(value)
+    if isinstance(value, dict):
+        return {sys.intern(key): intern_strings(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [intern_strings(item) for item in value]
+    return value
+
+
+def find_sources(base_dir):
+    """
+    Lists the JSON tables to compile into the bundle
+    :param base_dir: system executable base directory
+    :return: sorted list of paths relative to the base directory
+    """
+    # Empty placeholder tables, i.e. the chests, are left out and keep being read from their JSON files
+    paths = []
+    for source in BUNDLE_SOURCES:
+        if source.endswith(".json"):
+            paths.append(source)
+            continue
+
+        for root, _, files in os.walk(base_dir + source):
+            relative_root = os.path.relpath(root, base_dir or ".").replace(os.sep, "/")
+            paths.extend(f"{relative_root}/{filename}" for filename in files if filename.endswith(".json"))
+    return sorted(path for path in paths if os.path.getsize(base_dir + path) > 0)
+
+
+def hash_source(path):
+    """ Hash of the contents of a JSON source, to tell an edited file from one that was only copied or touched """
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def get_source_stamp(path):
+    """
+    Gets what a table's JSON source is checked against when loading the bundle
+    :param path: JSON file
+    :return: tuple of its size in bytes, modification time in nanoseconds, and content hash
+    """
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns, hash_source(path)
+
+
+def is_source_changed(path, stamp):
+    """
+    Checks whether a table's JSON source differs from the one its bundled table was compiled from. The size and
+    modification time are checked first, and the contents only hashed when just the modification time differs
+    :param path: JSON file
+    :param stamp: stamp of the source recorded in the bundle
+    :return: True if the file was edited, False if it is unchanged or does not exist, i.e. in a bundle-only build
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return False
+
+    size, mtime_ns, digest = stamp
+    if stat.st_size != size:
+        return True
+    return stat.st_mtime_ns != mtime_ns and hash_source(path) != digest
+
+
+def build_bundle(base_dir, bundle_path=None):
+    """
+    Compiles the JSON tables into the binary bundle
+    :param base_dir: system executable base directory
+    :param bundle_path: file to write, defaulting to BUNDLE_PATH under the base directory
+    :return: dictionary of the compiled tables
+    """
+    if bundle_path is None:
+        bundle_path = base_dir + BUNDLE_PATH
+
+    paths = find_sources(base_dir)
+    tables = {path: intern_strings(get_file_data(base_dir + path)) for path in paths}
+    stamps = {path: get_source_stamp(base_dir + path) for path in paths}
+
+    if os.path.dirname(bundle_path) != "":
+        os.makedirs(os.path.dirname(bundle_path), exist_ok=True)
+    with open(bundle_path, 'wb') as f:
+        f.write(BUNDLE_MAGIC + bytes([BUNDLE_VERSION]))
+        pickle.dump({"stamps": stamps, "tables": tables}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    return tables
+
+
+def load_bundle(bundle_path, base_dir=None):
+    """
+    Loads the compiled tables from the bundle in a single read
+    :param bundle_path: bundle file to read
+    :param base_dir: system executable base directory the JSON sources are under, if given then tables whose source
+                     was edited since the bundle was built are left out, so they are read from the JSON instead
+    :return: dictionary of path to table, or None if there is no bundle or it is from another version
+    """
+    try:
+        with open(bundle_path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+
+    header = BUNDLE_MAGIC + bytes([BUNDLE_VERSION])
+    if not data.startswith(header):
+        return None
+
+    try:
+        bundle = pickle.loads(memoryview(data)[len(header):])
+    except (pickle.UnpicklingError, EOFError, ValueError):
+        return None
+
+    tables = bundle["tables"]
+    if base_dir is not None:
+        for path, stamp in bundle["stamps"].items():
+            if is_source_changed(base_dir + path, stamp):
+                del tables[path]
+    return tables
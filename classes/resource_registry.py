@@ -0,0 +1,59 @@
+"""
+@file resource_registry.py
+@author Ryan Missel
+
+Shared registry of the parsed JSON tables under resources/, so each table is only read from disk once per process
+no matter how many generators, tabs, or analyzers ask for it.
+
+The returned tables are shared between every caller and must be treated as read-only. Use get_table_copy when
+the caller needs to modify what it gets back (e.g. the element lists a Gun edits in place).
+
+When the build step has compiled resources/resources.bundle (see resource_bundle.py), every table is served from that
+bundle, read once per process. Tables not in the bundle, whose JSON file was edited after the bundle was built, or
+every table when there is no bundle as in development, are parsed from their JSON files.
+"""
+import copy
+from functools import lru_cache
+
+from classes.json_reader import get_file_data
+from classes.resource_bundle import BUNDLE_PATH, load_bundle
+
+
+@lru_cache(maxsize=None)
+def get_bundle(base_dir):
+    """
+    Gets the compiled resource bundle, loading it on first use
+    :param base_dir: system executable base directory
+    :return: dictionary of path to table without the edited ones, or None if no usable bundle was built
+    """
+    return load_bundle(base_dir + BUNDLE_PATH, base_dir)
+
+
+@lru_cache(maxsize=None)
+def get_table(base_dir, path):
+    """
+    Gets the parsed JSON table at the given resource path, loading it on first use
+    :param base_dir: system executable base directory
+    :param path: path of the table relative to the base directory, e.g. "resources/guns/gun_cost.json"
+    :return: shared dictionary of the table, not to be modified
+    """
+    bundle = get_bundle(base_dir)
+    if bundle is not None and path in bundle:
+        return bundle[path]
+    return get_file_data(base_dir + path)
+
+
+def get_table_copy(base_dir, path):
+    """
+    Gets a private copy of the parsed JSON table at the given resource path, safe for the caller to modify
+    :param base_dir: system executable base directory
+    :param path: path of the table relative to the base directory
+    :return: deep copy of the table
+    """
+    return copy.deepcopy(get_table(base_dir, path))
+
+
+def clear_registry():
+    """ Drops every cached table and the bundle, i.e. after the JSON files have been edited on disk """
+    get_table.cache_clear()
+    get_bundle.cache_clear()
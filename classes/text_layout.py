@@ -0,0 +1,107 @@
+"""
+@file text_layout.py
+@author Ryan Missel
+
+Handles laying out the effect text of the cards, breaking it into lines by the measured widths of its words in the
+standard Helvetica fonts and sizing it to fit its box, shared by the Gun Card fields and the effect boxes of the tabs.
+
+Layouts are memoized, each paragraph by its text, font, size, and width, and each fitted box by its text and box, as
+the same RedText, prefix, and guild paragraphs come up on card after card. A paragraph is then only measured once
+per size it is drawn at, however many cards it is on.
+"""
+from functools import lru_cache
+
+from classes.font_metrics import encode_text, get_line_height, get_text_width, get_widths
+
+
+# Distance between the baselines of multi-line text, as a multiple of the font size
+LINE_SPACING = 1.15
+
+# Step the font size is shrunk by when fitting text to a box, in points
+SIZE_STEP = 0.5
+
+
+@lru_cache(maxsize=4096)
+def wrap_paragraph(paragraph, font_name, font_size, width):
+    """
+    Breaks a paragraph into lines between words wherever a line would be wider than the width. Words wider than the
+    width on their own are left on a line of their own.
+    :param paragraph: text without newlines
+    :param font_name: PostScript name of the font, or a resource name for it
+    :param font_size: font size in points
+    :param width: width available in points
+    :return: tuple of lines
+    """
+    widths = get_widths(font_name)
+    space = widths[32] * font_size / 1000
+
+    lines, line, line_width = [], "", 0
+    for word in paragraph.split():
+        word_width = sum(widths[code] for code in encode_text(word)) * font_size / 1000
+        if line != "" and line_width + space + word_width > width:
+            lines.append(line)
+            line, line_width = word, word_width
+        elif line != "":
+            line, line_width = f"{line} {word}", line_width + space + word_width
+        else:
+            line, line_width = word, word_width
+    return tuple(lines + [line])
+
+
+def wrap_text(text, font_name, font_size, width):
+    """
+    Breaks text into lines at its newlines, keeping blank lines, and then within each paragraph to fit the width
+    :param text: text to break
+    :param font_name: PostScript name of the font, or a resource name for it
+    :param font_size: font size in points
+    :param width: width available in points
+    :return: tuple of lines
+    """
+    return tuple(line for paragraph in str(text).split("\n")
+                 for line in wrap_paragraph(paragraph, font_name, font_size, width))
+
+
+def get_text_height(num_lines, font_size):
+    """ Height of the given number of lines from the top line's ascender to the bottom line's descender """
+    return (num_lines - 1) * font_size * LINE_SPACING + get_line_height(font_size)
+
+
+@lru_cache(maxsize=4096)
+def fit_text(text, font_name, font_size, width, height, min_size):
+    """
+    Lays out multi-line text in a box, shrinking it from the given size until every line fits in the box
+    :param text: text to lay out, with blank lines at either end dropped
+    :param font_name: PostScript name of the font, or a resource name for it
+    :param font_size: largest font size in points
+    :param width: box width in points
+    :param height: box height in points
+    :param min_size: smallest font size in points, at which text that still does not fit is left to overflow
+    :return: (font size, tuple of lines)
+    """
+    text = str(text).strip("\n")
+    size = font_size
+    lines = wrap_text(text, font_name, size, width)
+    while size > min_size and get_text_height(len(lines), size) > height:
+        size = max(size - SIZE_STEP, min_size)
+        lines = wrap_text(text, font_name, size, width)
+    return size, lines
+
+
+@lru_cache(maxsize=4096)
+def fit_line(text, font_name, font_size, width, height, min_size):
+    """
+    Sizes a single line of text to a box, filling the box's height when no size is given, and shrinking it to fit
+    the box's width
+    :param text: line of text
+    :param font_name: PostScript name of the font, or a resource name for it
+    :param font_size: largest font size in points, 0 to size the line to the box's height
+    :param width: box width in points
+    :param height: box height in points
+    :param min_size: smallest font size in points
+    :return: font size
+    """
+    size = font_size if font_size > 0 else height / get_line_height(1)
+    text_width = get_text_width(str(text).strip(), font_name, 1)
+    if text_width > 0:
+        size = max(min(size, width / text_width), min_size)
+    return size
@@ -0,0 +1,175 @@
+"""
+@file tracing.py
+@author Ryan Missel
+
+Lightweight span instrumentation for finding which stage of a generation is slow, i.e. the art download, the pdfrw
+form fill, the image inserts, or the pikepdf flatten of a Gun Card.
+
+Spans are recorded into an in-memory ring buffer only while tracing is enabled. When disabled, span() hands back a
+shared no-op context and traced() functions skip straight to the wrapped call, so the instrumentation can stay in the
+hot paths. Recorded spans can be exported as a Chrome trace (chrome://tracing or https://ui.perfetto.dev) or
+summarized into a single line for the statusbar.
+"""
+import os
+import json
+import time
+import threading
+from collections import deque
+from functools import wraps
+
+
+# Whether spans are currently being recorded
+_enabled = False
+
+# Ring buffer of finished spans as (name, start ns, duration ns, thread id, args) tuples
+_spans = deque(maxlen=10000)
+
+
+class _NullSpan:
+    """ Shared context returned while tracing is disabled """
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    """ Context that records its duration into the ring buffer on exit """
+    __slots__ = ("name", "args", "start")
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        _spans.append((self.name, self.start, time.perf_counter_ns() - self.start, threading.get_ident(), self.args))
+        return False
+
+
+def enable(capacity=10000):
+    """
+    Starts recording spans into a fresh ring buffer
+    :param capacity: number of most recent spans to keep
+    """
+    global _enabled, _spans
+    _spans = deque(maxlen=capacity)
+    _enabled = True
+
+
+def disable():
+    """ Stops recording spans, keeping the ones already recorded """
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    return _enabled
+
+
+def clear():
+    """ Drops every recorded span """
+    _spans.clear()
+
+
+def span(name, **args):
+    """
+    Context manager timing the enclosed block, i.e. with span("GunPDF.fill_pdf"): ...
+    :param name: stage name shown in the trace
+    :param args: optional details attached to the span, i.e. the image inserted
+    """
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(name, args)
+
+
+def traced(name=None):
+    """
+    Decorator timing every call of the wrapped function as a span
+    :param name: stage name, defaulting to the function's qualified name
+    """
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+
+            with _Span(span_name, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def mark():
+    """ Timestamp to pass to get_spans or format_summary to only look at spans recorded after this point """
+    return time.perf_counter_ns()
+
+
+def get_spans(since=None):
+    """
+    Recorded spans as dictionaries, oldest first
+    :param since: optional mark() timestamp, only spans starting after it are returned
+    """
+    return [{"name": name, "start_ns": start, "duration_ns": duration, "thread": thread, "args": args}
+            for name, start, duration, thread, args in list(_spans) if since is None or start >= since]
+
+
+def summarize(since=None):
+    """
+    Totals the recorded spans by name
+    :param since: optional mark() timestamp
+    :return: dictionary of name to call count and total milliseconds, slowest first
+    """
+    totals = {}
+    for entry in get_spans(since):
+        count, total = totals.get(entry['name'], (0, 0.0))
+        totals[entry['name']] = (count + 1, total + entry['duration_ns'] / 1e6)
+
+    ordered = sorted(totals.items(), key=lambda item: -item[1][1])
+    return {name: {"count": count, "total_ms": total} for name, (count, total) in ordered}
+
+
+def format_summary(since=None, top=4):
+    """
+    Short one-line summary of the slowest stages for the statusbar, i.e.
+        "Trace: GunPDF.add_image_to_pdf 9x 412ms | GunPDF.fill_pdf 35ms | ..."
+    :param since: optional mark() timestamp
+    :param top: number of stages to show
+    """
+    parts = []
+    for name, stats in list(summarize(since).items())[:top]:
+        count = f"{stats['count']}x " if stats['count'] > 1 else ""
+        parts.append(f"{name} {count}{stats['total_ms']:.0f}ms")
+    return "Trace: " + " | ".join(parts) if parts else ""
+
+
+def export_chrome_trace(path, since=None):
+    """
+    Saves the recorded spans in the Chrome trace event format
+    :param path: JSON file to write
+    :param since: optional mark() timestamp
+    """
+    pid = os.getpid()
+    events = [{
+        "name": entry['name'],
+        "ph": "X",
+        "ts": entry['start_ns'] / 1000,
+        "dur": entry['duration_ns'] / 1000,
+        "pid": pid,
+        "tid": entry['thread'],
+        "args": {key: str(value) for key, value in entry['args'].items()}
+    } for entry in get_spans(since)]
+
+    if os.path.dirname(path) != "":
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
@@ -7,17 +7,13 @@ Handles the UI interaction and display for the PyQT frontend
 """
 import sys
 import json
+import importlib
 
-from app.GunTab import GunTab
-from app.MeleeTab import MeleeTab
-from app.ShieldTab import ShieldTab
-from app.RelicTab import RelicTab
-from app.PotionTab import PotionTab
-from app.GrenadeTab import GrenadeTab
 from api.foundryVTT.FoundryTranslator import FoundryTranslator
+from classes import tracing, profiling
 
 from PyQt5.QtGui import QIcon
-from PyQt5.QtWidgets import (QApplication, QMainWindow, QTabWidget, QStatusBar)
+from PyQt5.QtWidgets import (QApplication, QMainWindow, QTabWidget, QStatusBar, QWidget, QVBoxLayout)
 
 
 class Window(QMainWindow):
@@ -40,42 +36,62 @@ class Window(QMainWindow):
         # Load in the config file
         self.config = json.load(open(f"{self.basedir}resources/CONFIG.json", 'r'))
 
-        # FoundryVTT Translator
-        self.foundry_translator = FoundryTranslator(self.basedir, self.statusbar)
-
-        # Gun Tab
-        self.gun_tab = GunTab(basedir, self.statusbar, self.config, self.foundry_translator)
-        self.tabMenu.addTab(self.gun_tab.get_tab(), "Gun")
-        self.tabMenu.setTabText(0, "Guns")
-
-        # Melee Tab
-        self.gun_tab = MeleeTab(basedir, self.statusbar, self.foundry_translator)
-        self.tabMenu.addTab(self.gun_tab.get_tab(), "Melee Weapon")
-        self.tabMenu.setTabText(1, "Melee Weapons")
+        # Record per-stage timing spans if enabled, summarized in the statusbar after each generation
+        if self.config.get('diagnostics', {}).get('trace_spans', False):
+            tracing.enable()
 
-        # Shield Tab
-        self.shield_tab = ShieldTab(basedir, self.statusbar, self.config, self.foundry_translator)
-        self.tabMenu.addTab(self.shield_tab.get_tab(), "Shield")
-        self.tabMenu.setTabText(2, "Shields")
+        # Profile every generation with cProfile and tracemalloc if enabled, saved under output/profiles/
+        if self.config.get('diagnostics', {}).get('profile_generation', False):
+            profiling.enable(f"{self.basedir}output/profiles/")
 
-        # Relic Tab
-        self.relic_tab = RelicTab(basedir, self.statusbar, self.config, self.foundry_translator)
-        self.tabMenu.addTab(self.relic_tab.get_tab(), "Relic")
-        self.tabMenu.setTabText(3, "Relics")
-
-        # Grenade Tab
-        self.grenade_tab = GrenadeTab(basedir, self.statusbar, self.config, self.foundry_translator)
-        self.tabMenu.addTab(self.grenade_tab.get_tab(), "Grenade")
-        self.tabMenu.setTabText(4, "Grenades")
+        # FoundryVTT Translator
+        self.foundry_translator = FoundryTranslator(self.basedir, self.statusbar)
 
-        # Potion Tab
-        self.potion_tab = PotionTab(basedir, self.statusbar, self.config, self.foundry_translator)
-        self.tabMenu.addTab(self.potion_tab.get_tab(), "Potion")
-        self.tabMenu.setTabText(5, "Potions")
+        # Tabs are only built on their first activation, each as (attribute, title, module and class name, arguments)
+        # Their modules are also only imported then, as each pulls in its own generator and image libraries
+        self.tab_factories = [
+            ("gun_tab", "Guns", "GunTab", (basedir, self.statusbar, self.config, self.foundry_translator)),
+            ("melee_tab", "Melee Weapons", "MeleeTab", (basedir, self.statusbar, self.foundry_translator)),
+            ("shield_tab", "Shields", "ShieldTab", (basedir, self.statusbar, self.config, self.foundry_translator)),
+            ("relic_tab", "Relics", "RelicTab", (basedir, self.statusbar, self.config, self.foundry_translator)),
+            ("grenade_tab", "Grenades", "GrenadeTab", (basedir, self.statusbar, self.config, self.foundry_translator)),
+            ("potion_tab", "Potions", "PotionTab", (basedir, self.statusbar, self.config, self.foundry_translator))
+        ]
+
+        # Empty placeholder pages that each tab is placed into once built
+        self.tab_placeholders = []
+        for attribute, title, _, _ in self.tab_factories:
+            setattr(self, attribute, None)
+
+            placeholder = QWidget()
+            placeholder_layout = QVBoxLayout()
+            placeholder_layout.setContentsMargins(0, 0, 0, 0)
+            placeholder.setLayout(placeholder_layout)
+
+            self.tab_placeholders.append(placeholder)
+            self.tabMenu.addTab(placeholder, title)
+
+        # Build the first tab now, as it is shown on startup, and the others when they are first opened
+        self.tabMenu.currentChanged.connect(self.load_tab)
+        self.load_tab(0)
 
         # Setting layout to be the central widget of main window
         self.setCentralWidget(self.tabMenu)
 
+    def load_tab(self, index):
+        """
+        Builds the tab at the given index on its first activation
+        :param index: index of the tab in the tab menu
+        """
+        attribute, _, class_name, args = self.tab_factories[index]
+        if getattr(self, attribute) is not None:
+            return
+
+        tab_class = getattr(importlib.import_module(f"app.{class_name}"), class_name)
+        tab = tab_class(*args)
+        setattr(self, attribute, tab)
+        self.tab_placeholders[index].layout().addWidget(tab.get_tab())
+
 
 if __name__ == '__main__':
     # Specify whether this is local development or application compilation
@@ -0,0 +1,265 @@
+"""
+@file test_asset_cache.py
+@author Ryan Missel
+
+Handles testing the resampling, encoding, and memory and disk caching of the Gun Card overlay images
+"""
+import io
+import os
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer, SimpleHTTPRequestHandler
+
+from PIL import Image
+
+from classes import asset_cache
+
+
+SPLASH = "resources/images/rarity_images/epic_background.png"
+
+
+def test_assets_are_resampled_to_their_box(tmp_path):
+    """ The splash is fit to its box at print DPI, and icons already smaller than their box keep their size """
+    asset_cache.clear_asset_cache()
+    base_dir = f"{tmp_path}/"
+
+    with Image.open(io.BytesIO(asset_cache.get_asset(base_dir, SPLASH, 400, 250))) as splash:
+        assert splash.width == 1667 and splash.height <= 1042
+        assert splash.format == "PNG"
+
+    with Image.open(io.BytesIO(asset_cache.get_asset(base_dir, "resources/images/gun_icons/Pistol.png", 200, 30))) as icon:
+        assert icon.size == (73, 27)
+
+
+def test_encodings_are_cached_in_memory_and_on_disk(tmp_path, monkeypatch):
+    """ An asset is only encoded once, then served from memory, and from disk in a fresh process """
+    asset_cache.clear_asset_cache()
+    base_dir = f"{tmp_path}/"
+    data = asset_cache.get_asset(base_dir, SPLASH, 400, 250)
+    assert asset_cache.get_asset(base_dir, SPLASH, 400, 250) is data
+
+    def fail(image):
+        raise AssertionError("Asset was encoded again!")
+
+    monkeypatch.setattr(asset_cache, "encode", fail)
+    asset_cache.clear_asset_cache()
+    assert asset_cache.get_asset(base_dir, SPLASH, 400, 250) == data
+
+    asset_cache.clear_asset_cache(base_dir)
+    monkeypatch.undo()
+    assert asset_cache.get_asset(base_dir, SPLASH, 200, 125) != data
+
+
+def test_opaque_photos_use_jpeg():
+    """ Opaque images with many colors are encoded as JPEG, while transparent ones stay PNG """
+    photo = Image.effect_mandelbrot((256, 256), (-2, -1.5, 1, 1.5), 100)
+    photo = Image.merge("RGB", [photo, photo.rotate(90), photo.rotate(180)]).convert("RGBA")
+    assert asset_cache.encode(photo)[:2] == b"\xff\xd8"
+
+    photo.putalpha(128)
+    assert asset_cache.encode(photo)[:4] == b"\x89PNG"
+
+
+def test_downloaded_art_is_fitted_and_kept(tmp_path):
+    """ Downloaded art is fitted to the art box at the given DPI, and the same URL is only downloaded once """
+    asset_cache.clear_asset_cache()
+    requests_seen = []
+
+    class Handler(SimpleHTTPRequestHandler):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, directory="resources/images/rarity_images", **kwargs)
+
+        def log_message(self, *args):
+            requests_seen.append(self.path)
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        url = f"http://127.0.0.1:{server.server_port}/rare_background.png"
+        data = asset_cache.download_art(f"{tmp_path}/", url, *asset_cache.GUN_ART_BOX, dpi=150)
+        assert asset_cache.download_art(f"{tmp_path}/", url, *asset_cache.GUN_ART_BOX, dpi=150) is data
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert requests_seen == ["/rare_background.png"]
+    with Image.open(io.BytesIO(data)) as art:
+        assert art.width == 833 and art.height <= 521
+
+
+def test_preloaded_overlays_never_touch_the_filesystem(tmp_path, monkeypatch):
+    """ Once preloaded, every overlay is served from the pool without opening or statting a file """
+    asset_cache.clear_asset_cache()
+    (tmp_path / "resources").symlink_to(os.path.abspath("resources"))
+    base_dir = f"{tmp_path}/"
+
+    boxes = {"gun_icons": [(200, 30)], "die_icons": [(40, 50)]}
+    asset_cache.preload_assets(base_dir, boxes)
+    assert f"{base_dir}resources/images/rarity_images/epic_background.png" in asset_cache._sources
+
+    def fail(*args, **kwargs):
+        raise AssertionError("Filesystem was touched!")
+
+    monkeypatch.setattr("builtins.open", fail)
+    monkeypatch.setattr(asset_cache.os, "stat", fail)
+    assert asset_cache.get_asset(base_dir, f"{base_dir}resources/images/gun_icons/SMG.png", 200, 30)[:4] == b"\x89PNG"
+    assert asset_cache.get_asset(base_dir, f"{base_dir}resources/images/die_icons/1d20.png", 40, 50)[:4] == b"\x89PNG"
+
+
+def test_item_art_is_kept_in_memory(tmp_path):
+    """ Items hold their art's bytes without writing a temporary file, and downloads are kept per URL """
+    from classes.Grenade import Grenade
+    from classes.Shield import Shield
+
+    asset_cache.clear_asset_cache()
+    before = {folder: sorted(os.listdir(f"output/{folder}")) for folder in ["shields", "grenades"]}
+    shield = Shield("", None, shield_art="resources/images/gun_icons/Pistol.png")
+    grenade = Grenade("", None, grenade_art="resources/images/gun_icons/Shotgun.png")
+    assert {folder: sorted(os.listdir(f"output/{folder}")) for folder in ["shields", "grenades"]} == before
+
+    with open("resources/images/gun_icons/Pistol.png", 'rb') as f:
+        assert shield.shield_art == f.read() and shield.shield_art_path.endswith("Pistol.png")
+    assert grenade.grenade_art != shield.shield_art
+
+    (tmp_path / "not_an_image.png").write_text("not an image")
+    try:
+        asset_cache.load_art(str(tmp_path / "not_an_image.png"))
+        assert False, "Non-image art was accepted"
+    except OSError:
+        pass
+
+    requests_seen = []
+
+    class Handler(SimpleHTTPRequestHandler):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, directory="resources/images/gun_icons", **kwargs)
+
+        def log_message(self, *args):
+            requests_seen.append(self.path)
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        url = f"http://127.0.0.1:{server.server_port}/SMG.png"
+        assert asset_cache.load_art(url) is asset_cache.load_art(url)
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert requests_seen == ["/SMG.png"]
+
+
+def test_art_sources_are_resolved_up_front(tmp_path, monkeypatch):
+    """ Sources are classified by their form, held to the size limit, and only read once while unchanged """
+    asset_cache.clear_asset_cache()
+    path = os.path.abspath("resources/images/gun_icons/Pistol.png")
+    uri = f"file://{path}"
+
+    assert asset_cache.resolve_source(path) == ("file", path)
+    assert asset_cache.resolve_source(uri) == ("file", path)
+    assert asset_cache.resolve_source("https://example.com/art.png") == ("url", "https://example.com/art.png")
+    for source, error in [("", ValueError), ("ftp://example.com/art.png", ValueError),
+                          (str(tmp_path / "missing.png"), FileNotFoundError)]:
+        try:
+            asset_cache.resolve_source(source)
+            assert False, f"{source} was resolved"
+        except error:
+            pass
+
+    data = asset_cache.load_art(uri)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("Art was read again!")
+
+    monkeypatch.setattr("builtins.open", fail)
+    assert asset_cache.load_art(path) is data
+    monkeypatch.undo()
+
+    monkeypatch.setattr(asset_cache, "MAX_ART_SIZE", 100)
+    asset_cache.clear_asset_cache()
+    try:
+        asset_cache.load_art(path)
+        assert False, "Art over the size limit was accepted"
+    except ValueError:
+        pass
+
+
+def test_slow_downloads_hit_the_deadline(monkeypatch):
+    """ A server sending the art a byte at a time is cut off at the deadline rather than when a full chunk arrives """
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Length", "400")
+            self.end_headers()
+            try:
+                for _ in range(400):
+                    self.wfile.write(b"x")
+                    time.sleep(0.02)
+            except OSError:
+                pass
+
+        def log_message(self, *args):
+            pass
+
+    monkeypatch.setattr(asset_cache, "DOWNLOAD_DEADLINE", 0.3)
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    start = time.monotonic()
+    try:
+        b"".join(asset_cache.iter_download(f"http://127.0.0.1:{server.server_port}/art.png"))
+        assert False, "Slow download outlived the deadline"
+    except TimeoutError:
+        assert time.monotonic() - start < 2
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_changed_files_replace_their_encoding(tmp_path):
+    """ A local file rewritten with new art is encoded again in place of its old encoding rather than beside it """
+    asset_cache.clear_asset_cache()
+    base_dir = f"{tmp_path}/"
+    path = str(tmp_path / "art.png")
+
+    encodings = []
+    for art, mtime in [("Pistol.png", 1_000_000_000), ("Shotgun.png", 2_000_000_000)]:
+        with open(f"resources/images/gun_icons/{art}", 'rb') as src, open(path, 'wb') as dst:
+            dst.write(src.read())
+        os.utime(path, ns=(mtime, mtime))
+        encodings.append(asset_cache.get_asset(base_dir, path, 200, 30))
+
+    assert encodings[0] != encodings[1] and len(asset_cache._art_assets) == 1
+    assert asset_cache.get_asset(base_dir, path, 200, 30) is encodings[1]
+
+
+def test_art_caches_are_bounded(tmp_path, monkeypatch):
+    """ Only the most recent art encodings are kept in memory, and the disk cache is trimmed to its size """
+    asset_cache.clear_asset_cache()
+    monkeypatch.setattr(asset_cache, "ART_CACHE_SIZE", 2)
+    base_dir = f"{tmp_path}/"
+
+    icons = ["Pistol.png", "Shotgun.png", "SMG.png"]
+    for icon in icons:
+        asset_cache.get_asset(base_dir, f"resources/images/gun_icons/{icon}", 200, 30)
+    assert [key[0] for key in asset_cache._art_assets] == [f"resources/images/gun_icons/{icon}" for icon in icons[1:]]
+
+    cache_dir = f"{base_dir}{asset_cache.CACHE_DIR}"
+    oldest = min(os.listdir(cache_dir), key=lambda name: os.stat(f"{cache_dir}{name}").st_mtime_ns)
+    os.utime(f"{cache_dir}{oldest}", ns=(0, 0))
+    total = sum(os.path.getsize(f"{cache_dir}{name}") for name in os.listdir(cache_dir))
+    asset_cache.trim_disk_cache(base_dir, total - 1)
+    assert len(os.listdir(cache_dir)) == 2 and oldest not in os.listdir(cache_dir)
+
+
+def test_sources_load_beside_the_encoding(tmp_path):
+    """ The overlay files can be read on a background thread while the main thread encodes them """
+    asset_cache.clear_asset_cache()
+    (tmp_path / "resources").symlink_to(os.path.abspath("resources"))
+    base_dir = f"{tmp_path}/"
+
+    loader = threading.Thread(target=asset_cache.load_sources, args=(base_dir,))
+    loader.start()
+    asset_cache.preload_assets(base_dir, {"die_icons": [(40, 50)]})
+    loader.join()
+
+    die_icons = [path for path in asset_cache._sources if "/die_icons/" in path]
+    assert len(die_icons) > 0 and all((path, 167, 208) in asset_cache._assets for path in die_icons)
@@ -0,0 +1,25 @@
+"""
+@file test_benchmark.py
+@author Ryan Missel
+
+Handles testing that the benchmark suite runs headlessly and flags regressions against a baseline
+"""
+from tools.benchmark import run_benchmarks, compare
+
+
+def test_fast_cases_run_headless():
+    """ The item construction and export cases run offline with a null statusbar """
+    results = run_benchmarks("", repeat=2, warmup=0, match="construct")
+    assert set(results['results']) == {f"construct.{kind}" for kind in
+                                       ["gun", "melee", "shield", "relic", "grenade", "potion"]}
+    assert all(stats['median_ms'] > 0 for stats in results['results'].values())
+
+
+def test_compare_flags_regressions():
+    """ Only slowdowns past both the relative threshold and the absolute floor are flagged """
+    baseline = {"results": {"slow": {"median_ms": 10.0}, "jitter": {"median_ms": 0.1}, "same": {"median_ms": 5.0}}}
+    current = {"results": {"slow": {"median_ms": 15.0}, "jitter": {"median_ms": 0.3}, "same": {"median_ms": 5.1},
+                           "new": {"median_ms": 1.0}}}
+
+    flagged = {row[0]: row[-1] for row in compare(current, baseline, threshold=0.2)}
+    assert flagged == {"slow": True, "jitter": False, "same": False}
@@ -0,0 +1,47 @@
+"""
+@file test_card_renderer.py
+@author Ryan Missel
+
+Handles testing the headless PIL card renderer and its process pool batch output
+"""
+import os
+
+from PIL import Image
+
+from classes.CardRenderer import CardRenderer, CARD_WIDTH, card_rows, make_job, render_batch
+from tools.benchmark import Fixtures
+
+
+def test_every_kind_renders_at_the_chosen_dpi():
+    """ Each item kind lays out its card fields, and the card scales with the DPI """
+    fixtures = Fixtures("")
+    try:
+        items = [fixtures.make_melee(), fixtures.make_shield(), fixtures.make_relic(),
+                 fixtures.make_grenade(), fixtures.make_potion()]
+        jobs = [make_job(item) for item in items]
+    finally:
+        fixtures.cleanup()
+
+    assert [rows[0][0] for _, rows, _ in jobs] == ["Name: "] * 5
+    assert card_rows(items[1])[-1] == ("Effect: ", items[1].effect, True)
+    assert all(art is not None for _, _, art in jobs)
+
+    screen, printed = CardRenderer(96), CardRenderer(192)
+    for _, rows, art in jobs:
+        card = screen.render(rows, art)
+        assert card.width == CARD_WIDTH
+        assert abs(printed.render(rows, art).height - 2 * card.height) <= 2 * len(rows)
+
+
+def test_batch_renders_pngs_across_processes(tmp_path):
+    """ A batch is split into chunks across the pool, and every card is saved in job order with its DPI """
+    fixtures = Fixtures("")
+    try:
+        jobs = [make_job(fixtures.make_shield(), name=f"shield_{idx}") for idx in range(5)]
+    finally:
+        fixtures.cleanup()
+
+    paths = render_batch(jobs, str(tmp_path), dpi=150, workers=2, chunk_size=2)
+    assert [os.path.basename(path) for path in paths] == [f"shield_{idx}.png" for idx in range(5)]
+    with Image.open(paths[0]) as card:
+        assert round(card.info['dpi'][0]) == 150
@@ -0,0 +1,73 @@
+"""
+@file test_dice_engine.py
+@author Ryan Missel
+
+Handles testing the dice parser and exact distributions against the dice strings found in the item tables
+"""
+import numpy as np
+
+from classes.dice_engine import parse_dice, get_distribution, expected_value, expected_values, combine, describe_dice
+
+
+def test_parse_table_formats():
+    """ Each of the dice string formats used throughout the tables parses to the same normalized key """
+    assert parse_dice("2d8").key == "2d8"
+    assert parse_dice("(+1d6)").key == "1d6"
+    assert parse_dice("+2d6").key == "2d6"
+    assert parse_dice("Health Potion (3d8+10)").key == "3d8+10"
+    assert parse_dice("Regens 2d8+5 Health.").key == "2d8+5"
+    assert parse_dice("Protection from x Element for 2 turns.") is None
+
+
+def test_prose_numbers_are_not_dice():
+    """ Numbers after words ending in d within the redtext and potion prose are not read as dice """
+    assert parse_dice("Add 21 Damage if you roll 13+ on your Accuracy Roll. (1/day)") is None
+    assert parse_dice("Add 10 gold per Loot Pile when rolling for Enemy Drops.") is None
+    assert parse_dice("Gained 5 HP") is None
+    assert parse_dice("Take 1d6 Health Damage to deal +3d6 Shock Damage.").key == "1d6"
+    assert parse_dice("Gain 1d8+3 Health and Shields.").key == "1d8+3"
+
+
+def test_subtracted_dice_stay_separate():
+    """ Added and subtracted dice of the same size are independent rolls rather than cancelling out """
+    distribution = get_distribution("2d6-1d6")
+    assert parse_dice("2d6-1d6").key == "2d6-1d6"
+    assert distribution.minimum == -4 and distribution.maximum == 11
+    assert np.isclose(distribution.mean, 3.5)
+
+    distribution = get_distribution("1d4 - 1d4")
+    assert distribution.minimum == -3 and distribution.maximum == 3
+    assert np.isclose(distribution.mean, 0.0)
+    assert np.isclose(combine("1d4", "-1d4").pmf[3], 0.25)
+
+
+def test_distribution_matches_enumeration():
+    """ The convolved PMF matches brute force enumeration of every roll """
+    distribution = get_distribution("2d6+1")
+    rolls = np.add.outer(np.arange(1, 7), np.arange(1, 7)).ravel() + 1
+    values, counts = np.unique(rolls, return_counts=True)
+
+    assert distribution.minimum == 3 and distribution.maximum == 13
+    assert np.allclose(distribution.pmf, counts / counts.sum())
+    assert np.isclose(distribution.mean, rolls.mean())
+
+
+def test_large_pool_uses_fft_and_stays_normalized():
+    """ Large pools go through the FFT path but still sum to one and keep the closed-form mean """
+    distribution = get_distribution("300d6")
+    assert np.isclose(distribution.pmf.sum(), 1.0)
+    assert np.isclose(distribution.mean, expected_value("300d6"))
+    assert (distribution.pmf >= 0).all()
+
+
+def test_distributions_are_cached():
+    """ The same expression in different formats shares one cached distribution """
+    assert get_distribution("1d6") is get_distribution("(+1d6)")
+
+
+def test_combine_and_describe():
+    """ Summing a gun's base damage with its element bonus """
+    assert np.isclose(combine("2d8", "(+1d6)").mean, 12.5)
+    assert describe_dice("2d8", "(+1d6)") == "Avg 12.5 (8-17)"
+    assert describe_dice("") == ""
+    assert np.allclose(expected_values(["2d8", "1d6", "2d8"]), [9.0, 3.5, 9.0])
@@ -0,0 +1,39 @@
+"""
+@file test_economy_simulator.py
+@author Ryan Missel
+
+Handles testing the campaign economy Monte Carlo against the drop table odds and its seeded reproducibility
+"""
+import numpy as np
+
+from classes.EconomySimulator import EconomySimulator, DROP_KINDS
+
+
+def test_outcomes_are_valued_from_the_cost_tables():
+    """ Each rank's drop outcomes form a distribution, with named potions valued by their matching dice """
+    simulator = EconomySimulator("")
+    for probs, values, kinds in simulator.outcomes.values():
+        assert np.isclose(probs.sum(), 1.0)
+        assert (values >= 0).all()
+
+    assert simulator.named_potion_cost("Health Potion (3d8+10)") == 100
+    assert simulator.named_potion_cost("Shield Potion (1d8)") == 15
+    assert simulator.value_drop("30g", "1") == [(1.0, 30.0, "gold")]
+
+
+def test_runs_are_reproducible_and_match_drop_odds():
+    """ The same seed gives the same campaigns on any number of workers, with drops matching the table odds """
+    simulator = EconomySimulator("")
+    serial = simulator.run(campaigns=400, sessions=10, seed=7, workers=1)
+    parallel = simulator.run(campaigns=400, sessions=10, seed=7, workers=2)
+    for key in serial:
+        assert np.array_equal(serial[key], parallel[key])
+
+    # 8 enemies at a 50% drop rate, 4 of the 24 table cells are Random Gun
+    counts = serial['counts'].mean(axis=(0, 1))
+    assert np.isclose(counts.sum(), 4.0, atol=0.2)
+    assert np.isclose(counts[DROP_KINDS.index("gun")], 4.0 * 4 / 24, atol=0.1)
+
+    summary = simulator.summarize(serial)
+    assert summary['wealth'].shape == (5, 10)
+    assert (np.diff(summary['wealth'], axis=1) >= 0).all()
@@ -0,0 +1,44 @@
+"""
+@file test_font_metrics.py
+@author Ryan Missel
+
+Handles testing the Helvetica metrics and the appearance streams the gun card fields are drawn with
+"""
+import os
+
+import fitz
+
+from classes.font_metrics import get_text_width, get_widths
+from tools.benchmark import Fixtures, seed_everything
+
+
+def test_widths_match_the_standard_fonts():
+    """ Widths are those of the standard fonts, with unknown resource names measured as Helvetica """
+    assert get_widths("Helvetica-Bold")[ord("a")] == 556 and get_widths("Helvetica")[ord("W")] == 944
+    assert get_text_width("Hello", "/Helv", 10) == get_text_width("Hello", "Helvetica", 10) == 22.78
+    assert get_widths("Helvetica-Bold") is get_widths("/Helvetica-Bold")
+
+
+def test_cards_carry_their_own_appearances():
+    """ Filled fields have drawn appearances, so the card needs no NeedAppearances and flattens to the same text """
+    fixtures = Fixtures("")
+    path = "output/guns/test_appearance.pdf"
+    try:
+        seed_everything(3)
+        gun = fixtures.make_gun()
+        fixtures.gun_pdf.generate_gun_pdf("test_appearance", gun, True, True, False)
+
+        card = fitz.open(path)
+        assert card.xref_get_key(card.pdf_catalog(), "AcroForm/NeedAppearances")[0] == "null"
+        widgets = {widget.field_name: widget for widget in card[0].widgets()}
+        assert card.xref_get_key(widgets["Name"].xref, "AP/N")[0] == "xref"
+        card.close()
+
+        fixtures.gun_pdf.compressPDF(path)
+        card = fitz.open(path)
+        assert len(list(card[0].widgets())) == 0 and gun.name.strip() in card[0].get_text()
+        card.close()
+    finally:
+        fixtures.cleanup()
+        if os.path.exists(path):
+            os.remove(path)
@@ -0,0 +1,38 @@
+"""
+@file test_gun_analyzer.py
+@author Ryan Missel
+
+Handles testing that the vectorized damage per turn grid agrees with the exact per-gun analysis
+"""
+import numpy as np
+
+from classes.Gun import Gun
+from classes.GunAnalyzer import GunAnalyzer
+
+
+def test_grid_matches_single_gun():
+    """ For a guild without element rolls, the grid cell is exactly the mean of the gun's distribution """
+    analyzer = GunAnalyzer("")
+    grid = analyzer.expected_grid()
+
+    for gun_type, guild in [("1", "alas!"), ("3", "blackpowder")]:
+        gun = Gun("", None, item_level="13-18", gun_type=gun_type, gun_guild=guild, gun_rarity="epic",
+                  damage_balance="gun_types", element_damage="", selected_elements=[],
+                  prefix="None", redtext="None", gun_art="placeholder.png")
+
+        result = analyzer.analyze_gun(gun)
+        cell = grid[0, analyzer.types.index(gun.type), analyzer.levels.index("13-18"),
+                    analyzer.guilds.index(guild), analyzer.rarities.index("epic")]
+
+        assert np.isclose(result["expected"], cell)
+        assert np.isclose(result["distribution"].pmf.sum(), 1.0)
+
+
+def test_invalid_combinations_are_masked():
+    """ Guilds that cannot roll a gun type on the gun table are NaN in the grid """
+    analyzer = GunAnalyzer("")
+    grid = analyzer.expected_grid()
+
+    t, g = analyzer.types.index("pistol"), analyzer.guilds.index("torgue")
+    assert np.isnan(grid[:, t, :, g, :]).all()
+    assert not np.isnan(grid[:, t, :, analyzer.guilds.index("dahlia"), :]).any()
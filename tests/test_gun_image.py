@@ -0,0 +1,41 @@
+"""
+@file test_gun_image.py
+@author Ryan Missel
+
+Handles testing that the gun manifests load in the background without changing what GunImage serves
+"""
+import json
+
+from classes.GunImage import GunImage
+
+
+def test_manifests_load_in_background():
+    """ The loaded manifests match reading them directly, and the unique types are only computed when asked for """
+    gun_images = GunImage("")
+    assert "types" not in gun_images.__dict__
+
+    expected = []
+    for name in ["bl1", "bl2", "bl3", "bltps", "blwl"]:
+        with open(f"resources/images/gun_images/{name}_guns.json", "r") as f:
+            expected.extend(json.load(f))
+
+    assert gun_images.guns_data == expected
+    assert "Pistol" in gun_images.types
+    assert len(gun_images.filter_guns_data(gun_images.guns_data, "Pistol", "Jakobs")) > 0
+
+
+def test_sampled_art_is_only_kept_in_memory(monkeypatch):
+    """ Sampling fetches the art into the asset cache and gives back its URL, writing no temporary image """
+    import os
+
+    from classes import GunImage as gun_image_module
+
+    downloads = []
+    monkeypatch.setattr(gun_image_module, "download_art", lambda base_dir, url, *args, **kwargs: downloads.append(url))
+
+    gun_images = GunImage("")
+    before = sorted(os.listdir("output/guns"))
+    url = gun_images.sample_gun_image("pistol", "malefactor")
+    assert downloads == [url] and url.startswith("http")
+    assert gun_images.sample_gun_image("custom_type", "malefactor") is None and len(downloads) == 1
+    assert sorted(os.listdir("output/guns")) == before
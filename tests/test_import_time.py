@@ -0,0 +1,56 @@
+"""
+@file test_import_time.py
+@author Ryan Missel
+
+Handles benchmarking the cold import of the generator classes with python -X importtime, failing if it goes over
+budget or pulls in the PDF, image, network, or UI libraries that are only needed once a card is exported
+"""
+import os
+import sys
+import subprocess
+
+
+# Generator and export modules imported by scripts, the CLI tools, and the PyInstaller build
+GENERATOR_MODULES = [
+    "classes.Gun", "classes.MeleeWeapon", "classes.Shield", "classes.Relic", "classes.Grenade", "classes.Potion",
+    "classes.GunPDF", "classes.GunImage", "classes.ShieldImage", "classes.RelicImage", "classes.GrenadeImage",
+    "classes.PotionImage", "api.foundryVTT.FoundryTranslator"
+]
+
+# Libraries that must be deferred to the code paths that use them
+HEAVY_MODULES = ["fitz", "pdfrw", "pikepdf", "requests", "numpy", "PIL", "PyQt5"]
+
+# Cumulative cold import budget of the generator modules, in microseconds
+IMPORT_BUDGET_US = 100_000
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_times(statement):
+    """
+    Runs the statement in a fresh interpreter with -X importtime
+    :return: list of (module name, cumulative microseconds, is top level) for every import
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", statement],
+                            cwd=ROOT_DIR, capture_output=True, text=True, check=True)
+
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+
+        _, cumulative, name = line.split("|")
+        entries.append((name.strip(), int(cumulative), not name[1:].startswith(" ")))
+    return entries
+
+
+def test_generator_import_time_is_within_budget():
+    """ Cold import of every generator stays under budget without loading any of the heavy libraries """
+    startup = {name for name, _, _ in import_times("pass")}
+    entries = import_times("import " + ", ".join(GENERATOR_MODULES))
+
+    imported = {name for name, _, _ in entries}
+    assert [module for module in HEAVY_MODULES if module in imported] == []
+
+    total = sum(cumulative for name, cumulative, top_level in entries if top_level and name not in startup)
+    assert total < IMPORT_BUDGET_US, f"Generator import took {total / 1000:.1f}ms"
@@ -0,0 +1,41 @@
+"""
+@file test_item_card.py
+@author Ryan Missel
+
+Handles testing that the item cards are built once and only updated in place on regeneration
+"""
+import os
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtWidgets import QApplication, QGridLayout, QWidget
+
+from app.ItemCard import ItemCard
+
+app = QApplication.instance() or QApplication([])
+
+
+def test_card_rows_are_reused():
+    """ Showing new items keeps the same widgets, and effect boxes resize to their number of lines """
+    card = ItemCard(QGridLayout(), effect_width=245)
+    card.add_image("art")
+    card.add_spacer()
+    card.add_stat("name", "Name: ")
+    card.add_effect("effect", "Effect: ")
+    widgets = card.widget.findChildren(QWidget)
+    assert card.widget.isHidden()
+
+    for name, effect in [("Old God", "Short effect."), ("Madtrap", "A much longer effect " * 6)]:
+        card.set_image("art", "resources/images/gun_icons/Pistol.png")
+        card.set_text("name", name)
+        card.set_effect("effect", effect)
+        card.show()
+
+        assert card.widgets["name"].text() == name
+        assert card.widgets["effect"].height() == (card.widgets["effect"].toPlainText().count("\n") + 2) * 15
+
+    assert not card.widget.isHidden() and card.widget.findChildren(QWidget) == widgets
+    assert card.widgets["effect"].height() > 30
+
+    card.set_effect("effect", "", lines=4)
+    assert card.widgets["effect"].toPlainText() == "" and card.widgets["effect"].height() == 60
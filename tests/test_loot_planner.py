@@ -0,0 +1,49 @@
+"""
+@file test_loot_planner.py
+@author Ryan Missel
+
+Handles testing that planned loot bundles land on their gold target and respect the requested mixes
+"""
+import time
+
+import numpy as np
+
+from classes.LootPlanner import LootPlanner
+
+
+def test_plans_land_within_tolerance():
+    """ Every sampled bundle totals within the tolerance of the target, including large budgets """
+    planner = LootPlanner("")
+    rng = np.random.default_rng(0)
+
+    for target in [100, 2000, 100000]:
+        start = time.perf_counter()
+        bundle = planner.plan(target, tolerance=0.1, rng=rng)
+        assert time.perf_counter() - start < 1.0
+
+        total = sum(slot['cost'] for slot in bundle)
+        assert 0.9 * target <= total <= 1.1 * target
+
+
+def test_mixes_and_item_count_are_respected():
+    """ Rarity and kind mixes with zero weight never show up, and an exact item count is honoured """
+    planner = LootPlanner("")
+    rng = np.random.default_rng(1)
+
+    bundle = planner.plan(1000, items=4, rarity_mix={"rare": 1, "epic": 1}, kind_mix={"gun": 1, "shield": 1}, rng=rng)
+    assert len(bundle) == 4
+    assert all(slot['rarity'] in ("rare", "epic") for slot in bundle)
+    assert all(slot['kind'] in ("gun", "shield") for slot in bundle)
+
+
+def test_potion_rarity_matches_the_generator():
+    """ The planner prices potions at the rarity Potion labels them with, with uncommon not taken for common """
+    from classes.Potion import Potion, get_potion_rarity
+
+    # Tina potions are relabeled by their roll on the Tina table, so only the potions kept as bought are compared
+    planner = LootPlanner("", kinds=("potion",))
+    for slot in planner.slots:
+        potion = Potion("", None, potion_id=slot['key'], potion_art="resources/images/gun_icons/Pistol.png")
+        if slot['key'] not in potion.tina_ranges:
+            assert slot['rarity'] == potion.rarity
+    assert get_potion_rarity("Shield Potion (Uncommon)") == "uncommon" and get_potion_rarity("Check Potion") == "common"
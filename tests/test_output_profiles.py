@@ -0,0 +1,91 @@
+"""
+@file test_output_profiles.py
+@author Ryan Missel
+
+Handles testing the output profiles the Gun Cards are saved with, and the size and time recorded for each
+"""
+import os
+
+import fitz
+import pikepdf
+
+from tools.benchmark import Fixtures, seed_everything
+
+
+def test_profiles_save_and_record_their_cards():
+    """ Fast leaves the filled card untouched, small and print save it through pikepdf, and each records its cards """
+    fixtures = Fixtures("")
+    paths = []
+    try:
+        seed_everything(4)
+        gun = fixtures.make_gun()
+        for profile in ["fast", "small", "print"]:
+            fixtures.gun_pdf.generate_gun_pdf(f"test_profile_{profile}", gun, True, False, False, output_profile=profile)
+            paths.append(f"output/guns/test_profile_{profile}.pdf")
+
+        # Only the fast card still has its form fields, as it is never flattened
+        widgets = []
+        for path in paths:
+            card = fitz.open(path)
+            widgets.append(len(list(card[0].widgets())))
+            card.close()
+        assert widgets[0] > 0 and widgets[1:] == [0, 0]
+
+        with pikepdf.open(paths[2]) as pdf:
+            assert pdf.is_linearized
+        assert os.path.getsize(paths[1]) < os.path.getsize(paths[0])
+
+        stats = fixtures.gun_pdf.output_stats
+        assert all(stats[profile]['count'] == 1 for profile in ["fast", "small", "print"])
+        assert stats['small']['bytes'] == os.path.getsize(paths[1]) and stats['small']['ms'] > 0
+        assert "1 cards saved with the small profile" in fixtures.gun_pdf.describe_output("small")
+    finally:
+        fixtures.cleanup()
+        for path in paths:
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def test_duplicate_images_are_merged(tmp_path):
+    """ Byte-identical images saved as separate objects on each page are saved once by the small profile """
+    path = str(tmp_path / "duplicates.pdf")
+    pdf = pikepdf.new()
+    for _ in range(3):
+        pdf.add_blank_page(page_size=(100, 100))
+        image = pikepdf.Stream(pdf, bytes(range(12)), Type=pikepdf.Name.XObject, Subtype=pikepdf.Name.Image,
+                               Width=2, Height=2, ColorSpace=pikepdf.Name.DeviceRGB, BitsPerComponent=8)
+        pdf.pages[-1].add_resource(image, pikepdf.Name.XObject, pikepdf.Name.Im0)
+    pdf.save(path)
+
+    def count_images():
+        with pikepdf.open(path) as saved:
+            return len({page.Resources.XObject.Im0.objgen for page in saved.pages})
+
+    fixtures = Fixtures("")
+    try:
+        before = count_images()
+        fixtures.gun_pdf.compressPDF(path, profile="small")
+        assert before == 3 and count_images() == 1
+    finally:
+        fixtures.cleanup()
+
+
+def test_failed_saves_keep_the_filled_card(tmp_path, monkeypatch):
+    """ A card that can not be written back is returned as it was filled, with a warning naming the profile """
+    path = str(tmp_path / "card.pdf")
+    pdf = pikepdf.new()
+    pdf.add_blank_page(page_size=(100, 100))
+    pdf.save(path)
+    with open(path, "rb") as f:
+        data = f.read()
+
+    def fail_write(pdf_path, pdf_data):
+        raise PermissionError(f"Can not write {pdf_path}")
+
+    fixtures = Fixtures("")
+    try:
+        monkeypatch.setattr(fixtures.gun_pdf, "write_pdf", fail_write)
+        assert fixtures.gun_pdf.compressPDF(path, profile="small") == data
+        assert "small profile" in fixtures.gun_pdf.warning
+    finally:
+        fixtures.cleanup()
@@ -0,0 +1,52 @@
+"""
+@file test_pdf_preview.py
+@author Ryan Missel
+
+Handles testing the fitz rasterized PDF preview and its LRU cache of rendered pages, using an offscreen Qt platform
+"""
+import os
+import shutil
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtWidgets import QApplication
+
+from app.PdfPreview import PdfPreview
+
+app = QApplication.instance() or QApplication([])
+
+
+def shown_pixmaps(preview):
+    return [preview.pages_layout.itemAt(idx).widget().pixmap() for idx in range(preview.pages_layout.count())]
+
+
+def test_pages_are_rendered_and_cached(tmp_path):
+    """ Every page is rendered once, re-showing the card reuses it, and an overwritten PDF is rendered again """
+    path = str(tmp_path / "card.pdf")
+    shutil.copy("output/guns/EXAMPLE.pdf", path)
+
+    preview = PdfPreview(max_width=600)
+    preview.show_pdf(path, "card")
+    first = [pixmap.cacheKey() for pixmap in shown_pixmaps(preview)]
+    assert len(first) == 2 and sorted(preview.cache) == [("card", 0), ("card", 1)]
+    assert all(pixmap.width() <= 600 for pixmap in shown_pixmaps(preview))
+
+    preview.show_pdf(path, "card")
+    assert [pixmap.cacheKey() for pixmap in shown_pixmaps(preview)] == first
+
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    preview.show_pdf(path, "card")
+    assert [pixmap.cacheKey() for pixmap in shown_pixmaps(preview)] != first
+
+
+def test_cache_evicts_least_recently_shown(tmp_path):
+    """ Only the most recently shown pages are kept, and a missing PDF shows a message instead """
+    preview = PdfPreview(cache_size=3)
+    for name in ["first", "second"]:
+        shutil.copy("output/guns/EXAMPLE.pdf", str(tmp_path / f"{name}.pdf"))
+        preview.show_pdf(str(tmp_path / f"{name}.pdf"), name)
+    assert list(preview.cache) == [("first", 1), ("second", 0), ("second", 1)]
+
+    preview.show_pdf(str(tmp_path / "missing.pdf"), "missing")
+    assert "No PDF found" in preview.pages_layout.itemAt(0).widget().text()
@@ -0,0 +1,41 @@
+"""
+@file test_pixmap_cache.py
+@author Ryan Missel
+
+Handles testing the shared LRU of decoded, pre-scaled item art
+"""
+import os
+import shutil
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtWidgets import QApplication
+
+from app import pixmap_cache
+
+app = QApplication.instance() or QApplication([])
+
+
+def test_same_content_is_decoded_once(tmp_path):
+    """ The same art is only decoded once per size, even when rewritten to the temporary art path """
+    pixmap_cache.clear_cache()
+    temporary = str(tmp_path / "temporary_shield_image.png")
+
+    for art in ["Pistol.png", "Shotgun.png", "Pistol.png"]:
+        shutil.copy(f"resources/images/gun_icons/{art}", temporary)
+        pixmap = pixmap_cache.get_scaled_pixmap(temporary, 300, 300)
+        assert max(pixmap.width(), pixmap.height()) == 300
+
+    pixmap_cache.get_scaled_pixmap(temporary, 100, 100)
+    assert pixmap_cache.get_cache_stats() == {"hits": 1, "misses": 3, "size": 3}
+    assert pixmap_cache.get_scaled_pixmap(str(tmp_path / "missing.png"), 300, 300).isNull()
+
+
+def test_cache_is_bounded(tmp_path, monkeypatch):
+    """ Only the most recently used pixmaps are kept """
+    pixmap_cache.clear_cache()
+    monkeypatch.setattr(pixmap_cache, "CACHE_SIZE", 2)
+
+    for size in [50, 100, 150]:
+        pixmap_cache.get_scaled_pixmap("resources/images/gun_icons/Pistol.png", size, size)
+    assert [key[1] for key in pixmap_cache._pixmaps] == [100, 150]
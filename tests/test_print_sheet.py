@@ -0,0 +1,73 @@
+"""
+@file test_print_sheet.py
+@author Ryan Missel
+
+Handles testing the N-up imposition of card PDFs onto print sheets
+"""
+import os
+
+import fitz
+
+from classes.print_sheet import get_sheet_layout, impose_cards, MARGIN
+
+
+def make_card(path, art, pages=1):
+    """ Builds a stand-in card PDF the size of the Gun Card template with the same art on every page """
+    card = fitz.open()
+    for _ in range(pages):
+        page = card.new_page(width=846, height=561)
+        page.insert_image(fitz.Rect(350, 140, 750, 390), filename=art)
+    card.save(path)
+    card.close()
+    return path
+
+
+def test_layout_fits_inside_the_margins():
+    """ The landscape cards fill the sheet best on landscape paper, with the grid centered inside the margins """
+    width, height, cells = get_sheet_layout(846, 561, "letter", 3, 3)
+    assert (width, height) == (792, 612) and len(cells) == 9
+    assert cells[0][0] >= MARGIN and cells[0][1] >= MARGIN
+    assert cells[-1][2] <= width - MARGIN and cells[-1][3] <= height - MARGIN
+    assert abs((cells[0][2] - cells[0][0]) / (cells[0][3] - cells[0][1]) - 846 / 561) < 1e-6
+
+
+def test_shared_images_are_stored_once(tmp_path):
+    """ Ten cards with the same art go onto two sheets, which store that art once """
+    cards = [make_card(str(tmp_path / f"card_{idx}.pdf"), "resources/images/rarity_images/epic_background.png")
+             for idx in range(10)]
+    output = str(tmp_path / "sheet.pdf")
+
+    assert impose_cards(cards, output) == 2
+    sheet = fitz.open(output)
+    images = {image[0] for page in sheet for image in page.get_images(full=True)}
+    assert len(images) == 1
+    assert os.path.getsize(output) < sum(os.path.getsize(card) for card in cards) / 5
+    sheet.close()
+
+
+def test_backs_are_mirrored(tmp_path):
+    """ 2-page cards get a front and back sheet, with the back of the first card in the last column """
+    cards = [make_card(str(tmp_path / f"card_{idx}.pdf"), "resources/images/gun_icons/Pistol.png", pages=2)
+             for idx in range(2)]
+    output = str(tmp_path / "sheet.pdf")
+
+    assert impose_cards(cards, output, cut_marks=False) == 2
+    _, _, cells = get_sheet_layout(846, 561)
+    sheet = fitz.open(output)
+    front = sorted(info['bbox'][0] for info in sheet[0].get_image_info())
+    back = sorted(info['bbox'][0] for info in sheet[1].get_image_info())
+    assert front[0] < cells[1][0] and back[-1] > cells[2][0]
+    sheet.close()
+
+
+def test_cards_given_as_bytes(tmp_path):
+    """ Cards rendered in memory are imposed the same as cards saved to files """
+    path = make_card(str(tmp_path / "card.pdf"), "resources/images/gun_icons/Pistol.png")
+    with open(path, "rb") as f:
+        data = f.read()
+    output = str(tmp_path / "sheet.pdf")
+
+    assert impose_cards([data, path, data], output) == 1
+    sheet = fitz.open(output)
+    assert len(sheet[0].get_image_info()) == 3
+    sheet.close()
@@ -0,0 +1,40 @@
+"""
+@file test_profiling.py
+@author Ryan Missel
+
+Handles testing that profiled runs save their pstats, allocation snapshot, and report, and only when enabled
+"""
+import pstats
+import tracemalloc
+
+from classes import profiling
+
+
+def build_table(size):
+    return [list(range(10)) for _ in range(size)]
+
+
+def test_profile_run_saves_all_outputs(tmp_path):
+    """ A profiled run writes loadable pstats and snapshot files, and reports the hot function """
+    with profiling.ProfileRun("table", str(tmp_path), top=5, verbose=False) as run:
+        build_table(5000)
+
+    assert pstats.Stats(run.paths['pstats']).total_calls > 0
+    assert tracemalloc.Snapshot.load(run.paths['snapshot']) is not None
+    assert "build_table" in run.report
+    assert not tracemalloc.is_tracing()
+
+
+def test_profiled_decorator_is_opt_in(tmp_path):
+    """ Wrapped functions are only profiled while profiling is enabled """
+    wrapped = profiling.profiled("table")(build_table)
+
+    assert len(wrapped(10)) == 10
+    assert list(tmp_path.iterdir()) == []
+
+    profiling.enable(str(tmp_path), top=5)
+    try:
+        wrapped(10)
+    finally:
+        profiling.disable()
+    assert sorted(path.suffix for path in tmp_path.iterdir()) == [".pstats", ".snapshot", ".txt"]
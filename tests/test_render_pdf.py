@@ -0,0 +1,34 @@
+"""
+@file test_render_pdf.py
+@author Ryan Missel
+
+Handles testing building the Gun Cards in memory, without writing anything under output/guns
+"""
+import os
+
+import fitz
+
+from tools.benchmark import Fixtures, seed_everything
+
+
+def test_cards_render_to_bytes_without_files():
+    """ Both designs come back as finished PDF bytes, including with art that falls back, and leave no files """
+    fixtures = Fixtures("")
+    try:
+        seed_everything(5)
+        gun = fixtures.make_gun()
+        before = sorted(os.listdir("output/guns"))
+
+        single = fixtures.gun_pdf.render_gun_pdf(gun, True, False, False)
+        split = fixtures.gun_pdf.render_split_gun_pdf(gun, True, False, False, output_profile="fast")
+        gun.gun_art_path = "missing_art.png"
+        fallback = fixtures.gun_pdf.render_gun_pdf(gun, True, False, False)
+        assert sorted(os.listdir("output/guns")) == before
+
+        for data, pages in [(single, 1), (split, 2), (fallback, 1)]:
+            assert data.startswith(b"%PDF")
+            card = fitz.open(stream=data, filetype="pdf")
+            assert len(card) == pages and len(card[pages - 1].get_images()) > 0
+            card.close()
+    finally:
+        fixtures.cleanup()
@@ -0,0 +1,78 @@
+"""
+@file test_resource_bundle.py
+@author Ryan Missel
+
+Handles testing that the compiled resource bundle round-trips every table and is what the registry serves once built
+"""
+import json
+
+from classes import resource_bundle
+from classes.resource_registry import get_table, clear_registry
+
+
+def test_bundle_matches_json_sources(tmp_path):
+    """ Every compiled table loads back equal to its JSON source, with repeated strings shared """
+    bundle_path = str(tmp_path / "resources.bundle")
+    resource_bundle.build_bundle("", bundle_path)
+    tables = resource_bundle.load_bundle(bundle_path)
+
+    assert "resources/guns/gun_cost.json" in tables
+    assert "resources/images/gun_images/bl3_guns.json" in tables
+    assert "resources/CONFIG.json" not in tables
+    for path, table in tables.items():
+        with open(path, "r") as f:
+            assert table == json.load(f), path
+
+    guilds = tables["resources/guns/guild_table.json"]
+    assert list(guilds)[1] is tables["resources/guns/gun_table.json"]["1"]["guild"]["1"]
+
+
+def test_stale_bundle_is_ignored(tmp_path):
+    """ A bundle from another version, or a missing one, falls back to the JSON sources """
+    bundle_path = tmp_path / "resources.bundle"
+    resource_bundle.build_bundle("", str(bundle_path))
+
+    data = bundle_path.read_bytes()
+    header = len(resource_bundle.BUNDLE_MAGIC)
+    bundle_path.write_bytes(data[:header] + bytes([data[header] + 1]) + data[header + 1:])
+
+    assert resource_bundle.load_bundle(str(bundle_path)) is None
+    assert resource_bundle.load_bundle(str(tmp_path / "missing.bundle")) is None
+
+
+def test_registry_serves_tables_from_bundle(tmp_path):
+    """ Once built, tables come from the bundle even without the JSON files next to it """
+    base_dir = str(tmp_path) + "/"
+    resource_bundle.build_bundle("", base_dir + resource_bundle.BUNDLE_PATH)
+
+    clear_registry()
+    try:
+        with open("resources/guns/gun_cost.json", "r") as f:
+            assert get_table(base_dir, "resources/guns/gun_cost.json") == json.load(f)
+    finally:
+        clear_registry()
+
+
+def test_edited_sources_fall_back_to_json(tmp_path):
+    """ A table whose JSON file was edited after the build is read from the JSON, while copied files keep the bundle """
+    base_dir = str(tmp_path) + "/"
+    resource_bundle.build_bundle("", base_dir + resource_bundle.BUNDLE_PATH)
+
+    (tmp_path / "resources/guns").mkdir(parents=True, exist_ok=True)
+    with open("resources/guns/gun_cost.json", "r") as f:
+        gun_cost = json.load(f)
+    (tmp_path / "resources/guns/gun_cost.json").write_text(json.dumps(gun_cost))
+    with open("resources/guns/guild_table.json", "rb") as f:
+        (tmp_path / "resources/guns/guild_table.json").write_bytes(f.read())
+
+    tables = resource_bundle.load_bundle(base_dir + resource_bundle.BUNDLE_PATH, base_dir)
+    assert "resources/guns/gun_cost.json" not in tables
+    assert "resources/guns/guild_table.json" in tables
+
+    clear_registry()
+    try:
+        gun_cost["edited"] = True
+        (tmp_path / "resources/guns/gun_cost.json").write_text(json.dumps(gun_cost))
+        assert get_table(base_dir, "resources/guns/gun_cost.json")["edited"] is True
+    finally:
+        clear_registry()
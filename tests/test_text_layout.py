@@ -0,0 +1,48 @@
+"""
+@file test_text_layout.py
+@author Ryan Missel
+
+Handles testing the metric-aware, memoized layout of the card effect text
+"""
+from app.tab_utils import split_effect_text
+from classes.font_metrics import get_text_width
+from classes.text_layout import fit_line, fit_text, get_text_height, wrap_paragraph, wrap_text
+
+
+def test_wrapping_keeps_newlines_and_fits_the_width():
+    """ Paragraphs and blank lines are kept, and every line of more than one word fits the width """
+    lines = wrap_text("[Name]\nAdds +1 Crit to Melee Attacks against every enemy\n\n[Guild]", "Helvetica-Bold", 13, 150)
+    assert lines[0] == "[Name]" and lines[-2:] == ("", "[Guild]")
+    assert all(get_text_width(line, "Helvetica-Bold", 13) <= 150 for line in lines)
+    assert " ".join(lines[1:-2]) == "Adds +1 Crit to Melee Attacks against every enemy"
+
+    # Narrow glyphs fit more characters on a line than wide ones
+    assert len(wrap_text("il " * 40, "Helvetica", 12, 200)) < len(wrap_text("WM " * 40, "Helvetica", 12, 200))
+
+
+def test_repeated_paragraphs_are_laid_out_once():
+    """ A paragraph shared by many effect texts is only wrapped once per font, size, and width """
+    wrap_paragraph.cache_clear()
+    paragraph = "Enemies killed by this gun grant the wielder 1 Badass Token."
+    for guild in ["Malefactor", "Torgue", "Stoker"]:
+        wrap_text(f"[Zesty]\n{paragraph}\n\n[{guild}]\n+20% Element Roll.", "Helvetica-Bold", 13, 240)
+    info = wrap_paragraph.cache_info()
+    assert info.hits >= 6 and info.misses == 7
+
+
+def test_text_is_sized_to_its_box():
+    """ Text shrinks until it fits the box's height, and single lines fit the box's width or fill its height """
+    text = "[Zesty]\n" + "Enemies killed by this gun grant the wielder 1 Badass Token. " * 6
+    size, lines = fit_text(text, "Helvetica-Bold", 13, 240, 120, 6)
+    assert 6 <= size < 13 and get_text_height(len(lines), size) <= 120
+    assert fit_text("[Zesty]\nShort.", "Helvetica-Bold", 13, 240, 120, 6)[0] == 13
+
+    assert fit_line("Zesty Convergence", "Helvetica-BoldOblique", 0, 400, 30, 6) == 30 / 0.925
+    assert get_text_width("A Very Long Gun Name Indeed", "Helvetica-BoldOblique",
+                          fit_line("A Very Long Gun Name Indeed", "Helvetica-BoldOblique", 0, 200, 50, 6)) <= 200 + 1e-6
+
+
+def test_tab_effects_wrap_to_their_box():
+    """ The tabs' effect boxes break their text by width rather than a character count """
+    text = split_effect_text("Deal an additional 1d6 Incendiary damage to every enemy within 2 squares.", 200, 12)
+    assert "\n" in text and all(get_text_width(line, "Helvetica", 12) <= 200 for line in text.split("\n"))
@@ -0,0 +1,60 @@
+"""
+@file test_tracing.py
+@author Ryan Missel
+
+Handles testing the span ring buffer, its Chrome trace export, and the traced Gun Card pipeline
+"""
+import json
+
+from classes import tracing
+from tools.benchmark import Fixtures
+
+
+def test_disabled_tracing_records_nothing():
+    """ While disabled, spans are the shared no-op and traced functions are passed straight through """
+    tracing.disable()
+    tracing.clear()
+
+    with tracing.span("stage") as recorded:
+        pass
+    assert recorded is tracing._NULL_SPAN
+    assert tracing.traced("double")(lambda x: 2 * x)(4) == 8
+    assert tracing.get_spans() == []
+
+
+def test_ring_buffer_and_chrome_export(tmp_path):
+    """ Only the most recent spans are kept, and the export is valid Chrome trace JSON """
+    tracing.enable(capacity=3)
+    for idx in range(5):
+        with tracing.span("stage", idx=idx):
+            pass
+    tracing.disable()
+
+    assert [span['args']['idx'] for span in tracing.get_spans()] == [2, 3, 4]
+    assert tracing.summarize()['stage']['count'] == 3
+
+    tracing.export_chrome_trace(str(tmp_path / "trace.json"))
+    events = json.load(open(tmp_path / "trace.json"))['traceEvents']
+    assert len(events) == 3 and all(event['ph'] == "X" for event in events)
+
+
+def test_gun_card_stages_are_traced():
+    """ Generating cards records the constructor, card base, form fill, art insert, and the compression """
+    tracing.enable()
+    fixtures = Fixtures("")
+    try:
+        start = tracing.mark()
+        gun = fixtures.make_gun()
+        for _ in range(2):
+            fixtures.gun_pdf.generate_gun_pdf("benchmark_trace", gun, True, False, False)
+    finally:
+        tracing.disable()
+        fixtures.cleanup()
+
+    summary = tracing.summarize(start)
+    assert summary['Gun.__init__']['count'] == 1
+    assert summary['GunPDF.build_card_base']['count'] == 1
+    assert summary['GunPDF.fill_pdf']['count'] == 2
+    assert summary['GunPDF.add_image_to_pdf']['count'] == 2
+    assert summary['GunPDF.compressPDF']['count'] == 2
+    assert tracing.format_summary(start).startswith("Trace: GunPDF.generate_gun_pdf")
@@ -0,0 +1,90 @@
+"""
+@file balance_report.py
+@author Ryan Missel
+
+Handles writing a comparison report of the expected damage per turn across the three damage balance sheets
+(Source Book, McCoby's, RobMWJ's), using the vectorized GunAnalyzer over every type, level, guild, and rarity.
+
+Run from the repository root with: python -m tools.balance_report
+"""
+import os
+import csv
+import time
+
+import numpy as np
+
+from classes.GunAnalyzer import GunAnalyzer
+
+
+# Display names of each damage balance JSON, matching the GunTab selection
+BALANCE_NAMES = {
+    "gun_types": "Source Book",
+    "gun_types_mccoby": "McCoby's",
+    "gun_types_robmwj": "RobMWJ's"
+}
+
+# Folder the report and full grid are saved to
+OUTPUT_DIR = "output/analysis/"
+
+
+def write_markdown(analyzer, grid, path):
+    """
+    Writes the per type x level summary, averaged over the guilds and rarities that can roll that type
+    :param analyzer: compiled GunAnalyzer
+    :param grid: expected damage grid of shape (balance, type, level, guild, rarity)
+    :param path: file to write the report to
+    """
+    summary = np.nanmean(grid, axis=(3, 4))
+    names = [BALANCE_NAMES.get(balance, balance) for balance in analyzer.balances]
+
+    lines = ["# Expected Damage per Turn by Balance Sheet", "",
+             "Averaged over every guild and rarity that can roll each gun type. "
+             "Ratios are relative to the first balance sheet.", ""]
+
+    header = ["Type", "Level"] + names + [f"{name} / {names[0]}" for name in names[1:]]
+    lines.append("| " + " | ".join(header) + " |")
+    lines.append("|" + "---|" * len(header))
+
+    for t, gun_type in enumerate(analyzer.types):
+        for l, level in enumerate(analyzer.levels):
+            values = summary[:, t, l]
+            row = [gun_type.replace('_', ' ').title(), level]
+            row += [f"{value:.1f}" for value in values]
+            row += [f"{value / values[0]:.2f}" for value in values[1:]]
+            lines.append("| " + " | ".join(row) + " |")
+
+    lines += ["", "## Overall", ""]
+    for b, name in enumerate(names):
+        lines.append(f"- {name}: {np.nanmean(grid[b]):.1f} average, "
+                     f"{np.nanmin(grid[b]):.1f} - {np.nanmax(grid[b]):.1f} range")
+
+    with open(path, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+
+
+def write_csv(analyzer, grid, path):
+    """ Writes every valid cell of the full expected damage grid as one CSV row """
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(["balance", "type", "level", "guild", "rarity", "expected_damage"])
+        for b, t, l, g, r in zip(*np.nonzero(~np.isnan(grid))):
+            writer.writerow([analyzer.balances[b], analyzer.types[t], analyzer.levels[l],
+                             analyzer.guilds[g], analyzer.rarities[r], f"{grid[b, t, l, g, r]:.3f}"])
+
+
+def main():
+    start = time.perf_counter()
+
+    analyzer = GunAnalyzer("", balances=tuple(BALANCE_NAMES.keys()))
+    grid = analyzer.expected_grid()
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    write_markdown(analyzer, grid, OUTPUT_DIR + "balance_report.md")
+    write_csv(analyzer, grid, OUTPUT_DIR + "balance_grid.csv")
+
+    print(f"Wrote {OUTPUT_DIR}balance_report.md and {OUTPUT_DIR}balance_grid.csv "
+          f"in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
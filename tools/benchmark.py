@@ -0,0 +1,314 @@
+"""
+@file benchmark.py
+@author Ryan Missel
+
+Handles timing every item generation and export hot path headlessly, from item construction through the Gun Card
+PDF stages to the FoundryVTT JSON exports. Every case is run with seeded RNG on fixed local art, so runs on the
+same machine are comparable and nothing is downloaded.
+
+Results are saved as JSON, and a previous results file can be given as the baseline to flag regressions.
+
+Run from the repository root with:
+    python -m tools.benchmark --output output/benchmarks/baseline.json
+    python -m tools.benchmark --compare output/benchmarks/baseline.json
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import statistics
+
+import numpy as np
+
+from classes.Gun import Gun
+from classes.GunPDF import GunPDF
+from classes.MeleeWeapon import MeleeWeapon
+from classes.Shield import Shield
+from classes.Relic import Relic
+from classes.Grenade import Grenade
+from classes.Potion import Potion
+from api.foundryVTT.FoundryTranslator import FoundryTranslator
+
+
+# Local art every fixture uses in place of a sampled or downloaded image
+FIXTURE_ART = "resources/images/gun_icons/Pistol.png"
+
+# Default folder the benchmark results are saved to
+OUTPUT_DIR = "output/benchmarks/"
+
+
+class NullStatusBar:
+    """ Stand-in for the PyQT statusbar, so the generators can run without a window """
+    def clearMessage(self):
+        pass
+
+    def showMessage(self, message, timeout=0):
+        pass
+
+
+def seed_everything(seed):
+    """ Seeds both the random module used by the item classes and the NumPy global generator """
+    random.seed(seed)
+    np.random.seed(seed)
+
+
+class Fixtures:
+    def __init__(self, base_dir):
+        """
+        Builds the fixed inputs shared by the benchmark cases
+        :param base_dir: system executable base directory
+        """
+        self.base_dir = base_dir
+        self.art = base_dir + FIXTURE_ART
+        self.statusbar = NullStatusBar()
+        self.gun_pdf = GunPDF(base_dir, self.statusbar, None)
+        self.translator = FoundryTranslator(base_dir, self.statusbar)
+
+        # FoundryVTT export folders, remembering which ones did not exist so they can be removed again
+        self.created_dirs = []
+        for folder in ["guns", "shields", "relics", "grenades", "potions"]:
+            path = f"{base_dir}api/foundryVTT/output/{folder}"
+            if not os.path.isdir(path):
+                os.makedirs(path)
+                self.created_dirs.append(path)
+
+        # Items generated once for the PDF and export cases
+        seed_everything(0)
+        self.gun = self.make_gun()
+        self.shield = self.make_shield()
+        self.relic = self.make_relic()
+        self.grenade = self.make_grenade()
+        self.potion = self.make_potion()
+
+        # Data dictionary of a full gun card, for timing the form fill on its own
+        self.data_dict = {
+            'Name': self.gun.name, "Guild": self.gun.guild.title(), "Rarity": self.gun.rarity.title(),
+            'Range': str(self.gun.range), 'Damage': str(self.gun.damage), "ElementBonus": self.gun.element_bonus,
+            "Hit_Low": "1", "Hit_Medium": "2", "Hit_High": "3", "Crit_Low": "0", "Crit_Medium": "1", "Crit_High": "1",
+            "RedTextName": self.gun.redtext_name or "", "EffectBox": self.gun.prefix_info or ""
+        }
+
+    def make_gun(self):
+        # Three elements, a prefix, and red text so that every icon and effect section of the card is exercised
+        return Gun(self.base_dir, None, item_level="19-24", gun_type="1", gun_guild="malefactor",
+                   gun_rarity="legendary", damage_balance="gun_types", element_damage="1d6",
+                   selected_elements=["cryo", "shock", "incendiary"], prefix="Random",
+                   redtext="Random (All Rarities)", gun_art=self.art)
+
+    def make_melee(self):
+        return MeleeWeapon(self.base_dir, None, item_level="19-24", melee_guild="random", melee_rarity="epic",
+                           element_damage="", selected_elements=[], prefix="Random", melee_art=self.art)
+
+    def make_shield(self):
+        return Shield(self.base_dir, None, shield_art=self.art)
+
+    def make_relic(self):
+        return Relic(self.base_dir, None, relic_art_path=self.art)
+
+    def make_grenade(self):
+        return Grenade(self.base_dir, None, grenade_art=self.art)
+
+    def make_potion(self):
+        return Potion(self.base_dir, None, potion_id="Random", potion_art=self.art)
+
+    def cleanup(self):
+        """ Removes the cards, exports, and temporary art images that the runs left behind """
+        for name in os.listdir(f"{self.base_dir}output/guns/"):
+            if name.startswith("benchmark_"):
+                os.remove(f"{self.base_dir}output/guns/{name}")
+
+        for folder in ["guns", "shields", "relics", "grenades", "potions"]:
+            path = f"{self.base_dir}api/foundryVTT/output/{folder}"
+            for name in os.listdir(path):
+                if name.startswith("benchmark_"):
+                    os.remove(f"{path}/{name}")
+
+        if os.path.exists(f"{self.base_dir}output/melees/temporary_melee_image.png"):
+            os.remove(f"{self.base_dir}output/melees/temporary_melee_image.png")
+
+        for path in self.created_dirs:
+            shutil.rmtree(path, ignore_errors=True)
+        if len(self.created_dirs) > 0 and len(os.listdir(f"{self.base_dir}api/foundryVTT/output")) == 0:
+            os.rmdir(f"{self.base_dir}api/foundryVTT/output")
+
+    def pdf_copy(self, name):
+        """ Fresh filled card to insert images into, so each run works on the same input """
+        path = f"{self.base_dir}output/guns/{name}.pdf"
+        shutil.copy(f"{self.base_dir}output/guns/benchmark_filled.pdf", path)
+        return path
+
+
+def build_cases(fixtures):
+    """
+    Builds the named benchmark cases as (setup, run) pairs, where setup's result is passed to run untimed
+    :param fixtures: shared Fixtures
+    :return: dictionary of case name to (setup, run)
+    """
+    base_dir = fixtures.base_dir
+    position = {'page': 1, 'x0': 350, 'y0': 140, 'x1': 750, 'y1': 390}
+    fixtures.gun_pdf.fill_pdf(base_dir + 'resources/GunTemplate.pdf', f"{base_dir}output/guns/benchmark_filled.pdf",
+                              fixtures.data_dict, False)
+
+    def no_setup():
+        return None
+
+    return {
+        "construct.gun": (no_setup, lambda _: fixtures.make_gun()),
+        "construct.melee": (no_setup, lambda _: fixtures.make_melee()),
+        "construct.shield": (no_setup, lambda _: fixtures.make_shield()),
+        "construct.relic": (no_setup, lambda _: fixtures.make_relic()),
+        "construct.grenade": (no_setup, lambda _: fixtures.make_grenade()),
+        "construct.potion": (no_setup, lambda _: fixtures.make_potion()),
+
+        "gun_pdf.fill_pdf": (no_setup, lambda _: fixtures.gun_pdf.fill_pdf(
+            base_dir + 'resources/GunTemplate.pdf', f"{base_dir}output/guns/benchmark_fill.pdf",
+            fixtures.data_dict, False)),
+        "gun_pdf.add_image_to_pdf": (lambda: fixtures.pdf_copy("benchmark_image"),
+                                     lambda path: fixtures.gun_pdf.add_image_to_pdf(path, fixtures.art, position)),
+        "gun_pdf.compressPDF": (lambda: fixtures.pdf_copy("benchmark_compress"),
+                                lambda path: fixtures.gun_pdf.compressPDF(path)),
+        "gun_pdf.compressPDF.print": (lambda: fixtures.pdf_copy("benchmark_compress"),
+                                      lambda path: fixtures.gun_pdf.compressPDF(path, profile="print")),
+        "gun_pdf.generate_gun_pdf": (no_setup, lambda _: fixtures.gun_pdf.generate_gun_pdf(
+            "benchmark_card", fixtures.gun, True, False, False)),
+        "gun_pdf.generate_split_gun_pdf": (no_setup, lambda _: fixtures.gun_pdf.generate_split_gun_pdf(
+            "benchmark_split_card", fixtures.gun, True, False, False)),
+        "gun_pdf.render_gun_pdf": (no_setup, lambda _: fixtures.gun_pdf.render_gun_pdf(
+            fixtures.gun, True, False, False)),
+
+        "foundry.export_gun": (no_setup, lambda _: fixtures.translator.export_gun(
+            fixtures.gun, "benchmark_gun", False)),
+        "foundry.export_shield": (no_setup, lambda _: fixtures.translator.export_shield(
+            fixtures.shield, "benchmark_shield")),
+        "foundry.export_relic": (no_setup, lambda _: fixtures.translator.export_relic(
+            fixtures.relic, "benchmark_relic")),
+        "foundry.export_grenade": (no_setup, lambda _: fixtures.translator.export_grenade(
+            fixtures.grenade, "benchmark_grenade")),
+        "foundry.export_potion": (no_setup, lambda _: fixtures.translator.export_potion(
+            fixtures.potion, "benchmark_potion")),
+    }
+
+
+def time_case(setup, run, repeat, warmup, seed):
+    """
+    Times a single case, reseeding before every run so each one does the same work
+    :return: dictionary of the timing statistics in milliseconds
+    """
+    times = []
+    for idx in range(warmup + repeat):
+        seed_everything(seed)
+        state = setup()
+
+        start = time.perf_counter()
+        run(state)
+        elapsed = (time.perf_counter() - start) * 1000
+
+        if idx >= warmup:
+            times.append(elapsed)
+
+    return {
+        "repeat": repeat,
+        "min_ms": min(times),
+        "median_ms": statistics.median(times),
+        "mean_ms": statistics.mean(times),
+        "stdev_ms": statistics.stdev(times) if len(times) > 1 else 0.0
+    }
+
+
+def run_benchmarks(base_dir="", repeat=10, warmup=1, seed=0, match=None):
+    """
+    Runs every benchmark case whose name contains the match string
+    :param base_dir: system executable base directory
+    :param repeat: number of timed runs per case
+    :param warmup: number of untimed runs per case before timing
+    :param seed: seed applied before every run
+    :param match: optional substring filter on the case names
+    :return: results dictionary with the environment metadata and per-case statistics
+    """
+    fixtures = Fixtures(base_dir)
+    cases = build_cases(fixtures)
+
+    results = {}
+    for name, (setup, run) in cases.items():
+        if match is not None and match not in name:
+            continue
+        results[name] = time_case(setup, run, repeat, warmup, seed)
+
+    fixtures.cleanup()
+
+    return {
+        "meta": {
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "repeat": repeat,
+            "seed": seed
+        },
+        "results": results
+    }
+
+
+def compare(current, baseline, threshold=0.2, min_delta_ms=0.5):
+    """
+    Compares the median time of every case shared with the baseline
+    :param current: results dictionary of this run
+    :param baseline: results dictionary loaded from the stored baseline
+    :param threshold: allowed relative slowdown before a case is flagged, e.g. 0.2 for 20%
+    :param min_delta_ms: smallest absolute slowdown that is flagged, so sub-millisecond jitter is ignored
+    :return: list of (name, baseline ms, current ms, ratio, regressed) rows
+    """
+    rows = []
+    for name, stats in current['results'].items():
+        if name not in baseline['results']:
+            continue
+
+        before, after = baseline['results'][name]['median_ms'], stats['median_ms']
+        ratio = after / before if before > 0 else float('inf')
+        rows.append((name, before, after, ratio, ratio > 1 + threshold and after - before > min_delta_ms))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the item generation and export hot paths.")
+    parser.add_argument("--repeat", type=int, default=10, help="timed runs per case")
+    parser.add_argument("--warmup", type=int, default=1, help="untimed runs per case before timing")
+    parser.add_argument("--seed", type=int, default=0, help="seed applied before every run")
+    parser.add_argument("--match", type=str, default=None, help="only run cases whose name contains this")
+    parser.add_argument("--output", type=str, default=OUTPUT_DIR + "latest.json", help="JSON file to save results")
+    parser.add_argument("--compare", type=str, default=None, help="baseline JSON to flag regressions against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="relative slowdown that counts as a regression")
+    parser.add_argument("--min-delta", type=float, default=0.5, help="smallest slowdown in ms that counts")
+    args = parser.parse_args()
+
+    current = run_benchmarks("", args.repeat, args.warmup, args.seed, args.match)
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(current, f, indent=2)
+
+    print(f"{'Case':34s} {'median ms':>10s} {'min ms':>10s}")
+    for name, stats in current['results'].items():
+        print(f"{name:34s} {stats['median_ms']:10.2f} {stats['min_ms']:10.2f}")
+    print(f"Saved results to {args.output}")
+
+    if args.compare is None:
+        return
+
+    with open(args.compare, 'r') as f:
+        baseline = json.load(f)
+
+    rows = compare(current, baseline, args.threshold, args.min_delta)
+    print(f"\nCompared against {args.compare} (threshold {args.threshold:.0%})")
+    for name, before, after, ratio, regressed in rows:
+        print(f"{name:34s} {before:10.2f} -> {after:10.2f} ({ratio:5.2f}x){'  REGRESSION' if regressed else ''}")
+
+    if any(row[-1] for row in rows):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
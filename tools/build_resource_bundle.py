@@ -0,0 +1,30 @@
+"""
+@file build_resource_bundle.py
+@author Ryan Missel
+
+Handles the build step that compiles the JSON tables under resources/ into resources/resources.bundle, which the
+resource registry then loads in a single read instead of parsing each JSON file. Run before PyInstaller packages
+the app; without it, the app reads the JSON sources as in development.
+
+Run from the repository root with:
+    python -m tools.build_resource_bundle
+    python -m tools.build_resource_bundle --output dist/resources.bundle
+"""
+import os
+import argparse
+
+from classes.resource_bundle import BUNDLE_PATH, BUNDLE_VERSION, build_bundle
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile the JSON resource tables into a binary bundle.")
+    parser.add_argument("--output", type=str, default=BUNDLE_PATH, help="bundle file to write")
+    args = parser.parse_args()
+
+    tables = build_bundle("", args.output)
+    print(f"Compiled {len(tables)} tables into {args.output} "
+          f"(version {BUNDLE_VERSION}, {os.path.getsize(args.output) / 1024:.1f} KiB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""
+@file impose_cards.py
+@author Ryan Missel
+
+Handles imposing already generated card PDFs N-up onto print sheets with cut marks, saved as a single PDF with the
+images the cards share stored once.
+
+Run from the repository root with:
+    python -m tools.impose_cards output/guns/*.pdf --output output/guns/PrintSheet.pdf --paper a4
+"""
+import os
+import argparse
+
+from classes.print_sheet import PAPER_SIZES, impose_cards
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Impose card PDFs onto N-up print sheets.")
+    parser.add_argument("cards", type=str, nargs="+", help="card PDFs to place, in order")
+    parser.add_argument("--output", type=str, default="output/guns/PrintSheet.pdf", help="filename of the sheets")
+    parser.add_argument("--paper", type=str, default="letter", choices=list(PAPER_SIZES.keys()))
+    parser.add_argument("--columns", type=int, default=3, help="number of cards across each sheet")
+    parser.add_argument("--rows", type=int, default=3, help="number of cards down each sheet")
+    parser.add_argument("--no-cut-marks", action="store_true", help="leave out the cut marks")
+    args = parser.parse_args()
+
+    # Skip a previous print sheet matched by the same glob
+    cards = [path for path in args.cards if os.path.abspath(path) != os.path.abspath(args.output)]
+
+    num_pages = impose_cards(cards, args.output, paper=args.paper, columns=args.columns, rows=args.rows,
+                             cut_marks=not args.no_cut_marks)
+    input_size = sum(os.path.getsize(path) for path in cards)
+    print(f"Imposed {len(cards)} cards onto {num_pages} pages in {args.output} "
+          f"({os.path.getsize(args.output) / 1024:.0f} KB from {input_size / 1024:.0f} KB of single cards)")
+
+
+if __name__ == "__main__":
+    main()
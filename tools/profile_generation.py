@@ -0,0 +1,59 @@
+"""
+@file profile_generation.py
+@author Ryan Missel
+
+Handles profiling a batch of generations headlessly with cProfile and tracemalloc, using the same seeded, offline
+fixtures as the benchmark suite. The pstats, allocation snapshot, and report are saved under output/profiles/.
+
+Run from the repository root with:
+    python -m tools.profile_generation --kind gun --count 50
+    python -m tools.profile_generation --kind gun_card --count 5 --top 30
+"""
+import argparse
+
+from classes.profiling import ProfileRun
+from tools.benchmark import Fixtures, seed_everything
+
+
+def build_runs(fixtures):
+    """ Single generation callables for each kind that can be profiled """
+    return {
+        "gun": fixtures.make_gun,
+        "melee": fixtures.make_melee,
+        "shield": fixtures.make_shield,
+        "relic": fixtures.make_relic,
+        "grenade": fixtures.make_grenade,
+        "potion": fixtures.make_potion,
+        "gun_card": lambda: fixtures.gun_pdf.generate_gun_pdf(
+            "benchmark_profile", fixtures.make_gun(), True, False, False),
+        "split_gun_card": lambda: fixtures.gun_pdf.generate_split_gun_pdf(
+            "benchmark_profile", fixtures.make_gun(), True, False, False),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile a batch of item generations.")
+    parser.add_argument("--kind", type=str, default="gun_card",
+                        choices=["gun", "melee", "shield", "relic", "grenade", "potion", "gun_card", "split_gun_card"])
+    parser.add_argument("--count", type=int, default=10, help="number of generations in the batch")
+    parser.add_argument("--top", type=int, default=20, help="number of hot functions and allocation sites to report")
+    parser.add_argument("--seed", type=int, default=0, help="seed for reproducible batches")
+    parser.add_argument("--output-dir", type=str, default="output/profiles/", help="folder to save the profiles to")
+    args = parser.parse_args()
+
+    fixtures = Fixtures("")
+    run = build_runs(fixtures)[args.kind]
+
+    seed_everything(args.seed)
+    try:
+        with ProfileRun(f"{args.kind}_x{args.count}", args.output_dir, args.top) as profile:
+            for _ in range(args.count):
+                run()
+    finally:
+        fixtures.cleanup()
+
+    print(f"Saved {', '.join(profile.paths.values())}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+@file render_cards.py
+@author Ryan Missel
+
+Handles generating and rendering a batch of Melee, Shield, Relic, Grenade, or Potion cards to PNGs headlessly, with
+the cards rendered in parallel across a process pool at the chosen DPI.
+
+Without --art, every item samples its art from the games as in the app, which needs a network connection.
+
+Run from the repository root with:
+    python -m tools.render_cards --kind shield --count 1000 --dpi 300 --art resources/images/gun_icons/Pistol.png
+"""
+import time
+import random
+import argparse
+
+from classes.CardRenderer import make_job, render_batch
+
+
+def build_factories(base_dir, art):
+    """ Item generators for each kind of card, sampling the game art when no art is given """
+    from classes.Shield import Shield
+    from classes.Relic import Relic
+    from classes.Grenade import Grenade
+    from classes.Potion import Potion
+    from classes.MeleeWeapon import MeleeWeapon
+
+    def images(module, name, *args):
+        # The image samplers are only needed, and their manifests only loaded, when there is no art given
+        if art is not None:
+            return None
+        return getattr(__import__(f"classes.{module}", fromlist=[name]), name)(*args)
+
+    return {
+        "melee": lambda: MeleeWeapon(base_dir, images("GunImage", "GunImage", base_dir), item_level="random",
+                                     melee_guild="random", melee_rarity="random", element_damage="",
+                                     selected_elements=[], prefix="Random", melee_art=art),
+        "shield": lambda: Shield(base_dir, images("ShieldImage", "ShieldImage", base_dir), shield_art=art),
+        "relic": lambda: Relic(base_dir, images("RelicImage", "RelicImage", base_dir), relic_art_path=art),
+        "grenade": lambda: Grenade(base_dir, images("GrenadeImage", "GrenadeImage", base_dir), grenade_art=art),
+        "potion": lambda: Potion(base_dir, images("PotionImage", "PotionImage", base_dir), potion_id="Random",
+                                 potion_art=art),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render a batch of item cards to PNGs.")
+    parser.add_argument("--kind", type=str, default="shield", choices=["melee", "shield", "relic", "grenade", "potion"])
+    parser.add_argument("--count", type=int, default=100, help="number of cards to generate and render")
+    parser.add_argument("--dpi", type=int, default=300, help="resolution of the rendered cards")
+    parser.add_argument("--art", type=str, default=None, help="local image or URL used as the art of every card")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes")
+    parser.add_argument("--seed", type=int, default=None, help="seed for reproducible batches")
+    parser.add_argument("--output-dir", type=str, default="output/cards/", help="folder to save the cards to")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    make_item = build_factories("", args.art)[args.kind]
+
+    # Items are generated here, as melee weapons share one temporary art file, and only rendered in the pool
+    start = time.perf_counter()
+    jobs = []
+    for idx in range(args.count):
+        name, rows, art = make_job(make_item())
+        jobs.append((f"{idx:05d}_{name}", rows, art))
+    generated = time.perf_counter()
+
+    paths = render_batch(jobs, args.output_dir, dpi=args.dpi, workers=args.workers)
+    print(f"Generated {len(jobs)} {args.kind} cards in {generated - start:.2f}s and rendered them at {args.dpi} DPI "
+          f"in {time.perf_counter() - generated:.2f}s to {args.output_dir}")
+    return paths
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+@file simulate_economy.py
+@author Ryan Missel
+
+Handles running the campaign economy Monte Carlo over a process pool and printing the percentiles of the party's
+cumulative gold and loot value, to tune house-rule drop rates offline.
+
+Run from the repository root with: python -m tools.simulate_economy --campaigns 10000 --sessions 40 --drop-rate 0.5
+"""
+import argparse
+import time
+
+from classes.EconomySimulator import EconomySimulator, DROP_KINDS
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate the gold and loot flow of many campaigns.")
+    parser.add_argument("--campaigns", type=int, default=10000, help="number of independent campaigns")
+    parser.add_argument("--sessions", type=int, default=40, help="number of sessions per campaign")
+    parser.add_argument("--enemies", type=float, default=8.0, help="mean number of enemies per session")
+    parser.add_argument("--drop-rate", type=float, default=0.5, help="probability that an enemy drops loot")
+    parser.add_argument("--start-level", type=int, default=1, help="party level of the first session")
+    parser.add_argument("--sessions-per-level", type=int, default=2, help="sessions spent on each level")
+    parser.add_argument("--seed", type=int, default=None, help="seed for reproducible runs")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    simulator = EconomySimulator("", start_level=args.start_level, sessions_per_level=args.sessions_per_level)
+    results = simulator.run(args.campaigns, args.sessions, args.enemies, args.drop_rate,
+                            seed=args.seed, workers=args.workers)
+    summary = simulator.summarize(results)
+
+    header = " | ".join(f"p{p}" for p in summary['percentiles'])
+    print(f"Cumulative value over {args.campaigns} campaigns ({time.perf_counter() - start:.2f}s)")
+    print(f"Session | Gold: {header} | Gold + Loot: {header}")
+    for session in sorted(set(list(range(4, args.sessions, 5)) + [args.sessions - 1])):
+        gold = " | ".join(f"{value:.0f}" for value in summary['gold'][:, session])
+        wealth = " | ".join(f"{value:.0f}" for value in summary['wealth'][:, session])
+        print(f"{session + 1:7d} | {gold} | {wealth}")
+
+    print("Mean drops per session: " + ", ".join(f"{kind} {summary['counts'][kind]:.2f}" for kind in DROP_KINDS))
+
+
+if __name__ == "__main__":
+    main()